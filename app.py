@@ -1,26 +1,122 @@
 import streamlit as st
 import sys
+import time
 from pathlib import Path
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from components.layout import setup_page_config, load_custom_css
+import components.cart
+import components.charts
+import components.cutoff
+import components.forms
+import components.history
+import components.layout
+import components.promise_calendar
+import components.quantity_sensitivity
+import utils.helpers
+from components.layout import setup_page_config, load_custom_css, render_tool_navigation
 from components.forms import render_prediction_form
 from components.charts import render_results_dashboard
+from components.cutoff import render_cutoff_finder
+from components.promise_calendar import render_promise_calendar
+from components.quantity_sensitivity import render_quantity_sensitivity
+from components.cart import render_cart_prediction
+from components.history import render_prediction_history
+from components.perf_panel import (
+    is_memory_mode, is_performance_mode, is_profiling_requested, render_memory_report, render_performance_panel,
+    render_profile_report
+)
+from services.cache_warmer import ensure_cache_warmer
+from services.health import ensure_health_prober
+from services.metrics import ensure_metrics_exporter, observe_rerun, track_session
+from services.response_cache import ensure_warm_from_disk
 from utils.helpers import init_session_state
+from utils.memory import memory_rerun
+from utils.sampling import clear_thread_tags, ensure_sampling_profiler, tag_current_thread
+from utils.perf import cprofile_rerun, deep_sizeof, instrument_namespaces, profile_rerun
+
+PREDICTION_TOOL = "🎯 Análisis Predictivo"
+
+TOOL_PAGES = {
+    "🕐 Hora de Corte": render_cutoff_finder,
+    "🗓️ Calendario de Promesa": render_promise_calendar,
+    "📦 Sensibilidad por Cantidad": render_quantity_sensitivity,
+    "🛒 Pedido Multi-SKU": render_cart_prediction,
+}
+
+# Instrumentación de funciones render_* y constructores de grafos (idempotente)
+instrument_namespaces(
+    [components.charts, components.forms, components.history, components.layout, components.cutoff, components.promise_calendar,
+     components.quantity_sensitivity, components.cart, utils.helpers],
+    namespaces=[globals(), TOOL_PAGES]
+)
 
 
 def main():
     setup_page_config()
     load_custom_css()
     init_session_state()
+    ensure_metrics_exporter()
+    ensure_sampling_profiler()
+    ensure_health_prober()
+    ensure_warm_from_disk()
+    ensure_cache_warmer()
+
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        track_session(ctx.session_id, lambda: deep_sizeof(st.session_state.to_dict()))
+
+    inicio = time.perf_counter()
+    page = "form"
+    with profile_rerun(enabled=is_performance_mode()) as profiler:
+        tool = render_tool_navigation([PREDICTION_TOOL, *TOOL_PAGES])
+
+        if tool in TOOL_PAGES:
+            page = tool
+        else:
+            render_prediction_history()
+            page = "results" if st.session_state.show_results and st.session_state.prediction_data else "form"
+
+        if profiler:
+            profiler.page = page
+        tag_current_thread(
+            page=page,
+            tipo=st.session_state.prediction_data.get('tipo_respuesta') if page == "results" else None
+        )
+
+        try:
+            if page in TOOL_PAGES:
+                TOOL_PAGES[page]()
+            elif page == "results":
+                render_results_dashboard()
+            else:
+                render_prediction_form()
+        finally:
+            # st.rerun() interrumpe con excepción: el rerun igual se mide
+            observe_rerun("tools" if page in TOOL_PAGES else page, time.perf_counter() - inicio)
+            clear_thread_tags()
+
+    render_performance_panel(profiler)
+
 
-    if st.session_state.show_results and st.session_state.prediction_data:
-        render_results_dashboard()
-    else:
-        render_prediction_form()
+def run():
+    """Ejecutar main(); con perfilado o modo memoria solicitados, el rerun completo corre instrumentado"""
+    ctx = get_script_run_ctx()
+    report = None
+    try:
+        with memory_rerun(enabled=is_memory_mode(), session_id=ctx.session_id if ctx else None,
+                          state_getter=st.session_state.to_dict) as memory_report, \
+                cprofile_rerun(enabled=is_profiling_requested()) as report:
+            main()
+    finally:
+        # Se perfila un solo rerun: su reporte se guarda para verlo (y descargarlo) en los siguientes
+        if report:
+            st.session_state.cprofile_report = report
+    render_profile_report(st.session_state.get("cprofile_report"))
+    render_memory_report(memory_report)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run()
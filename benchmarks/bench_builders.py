@@ -0,0 +1,167 @@
+"""
+Benchmark headless de los constructores puros (grafo, insights y DataFrames de análisis).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_builders [--output ruta.json] [--baseline ruta.json] [--filter texto]
+
+Sale con código 1 si algún benchmark supera su umbral de `thresholds.json`.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.fixtures import benchmark_cases
+from components.charts import (
+    _create_central_destination_node, _create_product_node, _create_stock_stores_from_response,
+    _create_logistics_route_enhanced, _create_external_factors_enhanced, _build_graph_config,
+    _get_graph_categories, build_delivery_network
+)
+from utils.helpers import (
+    extract_key_insights, build_stock_dataframe, build_assignment_dataframe,
+    build_cross_option_dataframe, build_option_stores_dataframe
+)
+
+BENCH_DIR = Path(__file__).parent
+THRESHOLDS_PATH = BENCH_DIR / "thresholds.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "builders.json"
+
+
+def build_benchmarks(case: dict) -> dict:
+    """Benchmarks aplicables a un response: nombre -> callable sin argumentos"""
+    request_data = case.get('request', {})
+    evaluacion = case.get('evaluacion_detallada') or {}
+    stock_analysis = evaluacion.get('stock_analysis') or {}
+    cedis_analysis = evaluacion.get('cedis_analysis')
+    destination_name = _create_central_destination_node(request_data.get('codigo_postal', 'N/A'))['name']
+    product_name = _create_product_node(request_data)['name']
+    stock_nodes, _ = _create_stock_stores_from_response(stock_analysis, product_name)
+    nodes, links = build_delivery_network(case)
+    categories = _get_graph_categories()
+
+    benchmarks = {
+        "stock_stores": lambda: _create_stock_stores_from_response(stock_analysis, product_name),
+        "logistics_route": lambda: _create_logistics_route_enhanced(
+            case.get('logistica_entrega', {}), cedis_analysis, stock_nodes, destination_name, case
+        ),
+        "external_factors": lambda: _create_external_factors_enhanced(
+            case.get('factores_externos', {}), destination_name, request_data
+        ),
+        "delivery_network": lambda: build_delivery_network(case),
+        "graph_config": lambda: _build_graph_config(nodes, links, categories, request_data.get('codigo_postal')),
+        "key_insights": lambda: extract_key_insights(case),
+        "df_stock": lambda: build_stock_dataframe(stock_analysis.get('stock_encontrado', [])),
+        "df_assignment": lambda: build_assignment_dataframe(
+            stock_analysis.get('asignacion_detallada', {}).get('plan_asignacion', [])
+        ),
+    }
+
+    options = case.get('delivery_options') or []
+    if options:
+        recommendation = case.get('recommendation', {})
+        benchmarks["df_cross_option"] = lambda: build_cross_option_dataframe(options, recommendation)
+        benchmarks["df_option_stores"] = lambda: build_option_stores_dataframe(options[0], case)
+
+    return benchmarks
+
+
+def time_callable(func, min_runs: int = 5, max_runs: int = 200, budget_s: float = 0.5) -> dict:
+    """Ejecutar `func` hasta agotar el presupuesto de tiempo y devolver estadísticas en ms"""
+    func()  # calentamiento (caches de parseo de fechas, imports perezosos)
+    samples = []
+    inicio = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - inicio < budget_s):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms": samples[0],
+    }
+
+
+def load_thresholds(section: str = "builders") -> dict:
+    with open(THRESHOLDS_PATH, encoding="utf-8") as f:
+        return json.load(f).get(section, {})
+
+
+def run(filter_text: str = None, baseline: dict = None) -> dict:
+    thresholds = load_thresholds()
+    default_ms = thresholds.get("default_ms")
+    baseline_ms = {r["id"]: r["median_ms"] for r in (baseline or {}).get("results", [])}
+
+    results = []
+    for case_name, case in benchmark_cases().items():
+        for bench_name, func in build_benchmarks(case).items():
+            bench_id = f"{case_name}/{bench_name}"
+            if filter_text and filter_text not in bench_id:
+                continue
+
+            stats = time_callable(func)
+            threshold = thresholds.get("benchmarks", {}).get(bench_id, default_ms)
+            result = {
+                "id": bench_id,
+                "case": case_name,
+                "benchmark": bench_name,
+                **{k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()},
+                "threshold_ms": threshold,
+                "status": "ok" if threshold is None or stats["median_ms"] <= threshold else "regression",
+            }
+            if bench_id in baseline_ms and baseline_ms[bench_id]:
+                result["change_pct"] = round((stats["median_ms"] / baseline_ms[bench_id] - 1) * 100, 1)
+            results.append(result)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def print_report(report: dict):
+    print(f"{'Benchmark':<46} {'mediana ms':>11} {'p95 ms':>9} {'umbral':>8} {'cambio':>8}")
+    for r in report["results"]:
+        cambio = f"{r['change_pct']:+.1f}%" if "change_pct" in r else ""
+        marca = "  ❌ REGRESIÓN" if r["status"] == "regression" else ""
+        umbral = f"{r['threshold_ms']:g}" if r["threshold_ms"] is not None else "-"
+        print(f"{r['id']:<46} {r['median_ms']:>11.3f} {r['p95_ms']:>9.3f} {umbral:>8} {cambio:>8}{marca}")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de constructores puros")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Ruta del JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una corrida previa para calcular el cambio")
+    parser.add_argument("--filter", help="Solo benchmarks cuyo id contenga este texto")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run(args.filter, baseline)
+    print_report(report)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados en {output}")
+
+    regresiones = [r["id"] for r in report["results"] if r["status"] == "regression"]
+    if regresiones:
+        print(f"❌ {len(regresiones)} benchmark(s) sobre su umbral: {', '.join(regresiones)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
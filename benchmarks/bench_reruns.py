@@ -0,0 +1,262 @@
+"""
+Benchmark de reruns completos con `streamlit.testing.v1.AppTest`.
+
+Inyecta las fixtures en `st.session_state.prediction_data`, recorre interacciones
+reales (checkbox del JSON, cambio de herramienta en la barra lateral, volver al
+formulario, captura del formulario) y mide la distribución de latencia y los
+elementos emitidos por rerun. Con `--sessions` simula sesiones concurrentes en
+hilos para encontrar el punto de saturación del proceso.
+
+Nota: cambiar de `st.tabs` no provoca rerun (es solo del navegador); el rerun
+equivalente es el cambio de herramienta en la navegación lateral.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_reruns [--iterations 5] [--sessions 1,2,4,8,16] [--output ruta.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fixtures import load_fixture, scale_options, scale_stores
+from benchmarks.bench_builders import load_thresholds
+
+BENCH_DIR = Path(__file__).parent
+APP_PATH = str(BENCH_DIR.parent / "app.py")
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "reruns.json"
+
+PREDICTION_TOOL = "🎯 Análisis Predictivo"
+JSON_CHECKBOX = "📄 Mostrar Response Completo del API"
+
+
+def count_elements(node) -> int:
+    """Elementos y bloques del árbol renderizado por el último rerun"""
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child) for child in children.values())
+
+
+def _timed_run(at: AppTest, step: str, samples: list, action=None):
+    t0 = time.perf_counter()
+    (action(at) if action else at).run()
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].value}")
+    samples.append({"step": step, "ms": elapsed_ms, "elements": count_elements(at._tree)})
+
+
+def results_scenario(fixture_name: str, data: dict):
+    """Dashboard de resultados: carga, JSON on/off, ida y vuelta a una herramienta, volver"""
+
+    def scenario(samples: list):
+        prefix = f"results[{fixture_name}]"
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.session_state["prediction_data"] = data
+        at.session_state["show_results"] = True
+        _timed_run(at, f"{prefix}.initial", samples)
+
+        checkbox = next(cb for cb in at.checkbox if cb.label == JSON_CHECKBOX)
+        _timed_run(at, f"{prefix}.json_on", samples, lambda a: checkbox.check())
+        checkbox = next(cb for cb in at.checkbox if cb.label == JSON_CHECKBOX)
+        _timed_run(at, f"{prefix}.json_off", samples, lambda a: checkbox.uncheck())
+
+        herramienta = next(op for op in at.sidebar.radio[0].options if op != PREDICTION_TOOL)
+        _timed_run(at, f"{prefix}.tool_switch", samples, lambda a: a.sidebar.radio[0].set_value(herramienta))
+        _timed_run(at, f"{prefix}.tool_return", samples, lambda a: a.sidebar.radio[0].set_value(PREDICTION_TOOL))
+        _timed_run(at, f"{prefix}.back", samples, lambda a: a.button(key="back_button").click())
+
+    return scenario
+
+
+def form_scenario(samples: list):
+    """Formulario: carga y captura de CP, SKU, cantidad y hora"""
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    _timed_run(at, "form.initial", samples)
+    _timed_run(at, "form.cp", samples, lambda a: a.text_input[0].input("76000"))
+    _timed_run(at, "form.sku", samples, lambda a: a.text_input[1].input("LIV-001"))
+    _timed_run(at, "form.cantidad", samples, lambda a: a.number_input[0].set_value(3))
+    hora = at.selectbox[0]
+    _timed_run(at, "form.hora", samples, lambda a: hora.set_value(hora.options[-1]))
+
+
+def build_scenarios() -> dict:
+    single = load_fixture("single_delivery_date")
+    multiple = load_fixture("multiple_delivery_dates")
+    return {
+        "form": form_scenario,
+        "single": results_scenario("single", single),
+        "multiple": results_scenario("multiple", multiple),
+        "cedis": results_scenario("cedis", load_fixture("compleja_cedis")),
+        "single_2000_tiendas": results_scenario("single_2000_tiendas", scale_stores(single, 2000)),
+        "multiple_50_opciones": results_scenario(
+            "multiple_50_opciones", scale_options(scale_stores(multiple, 500), 50)
+        ),
+    }
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(samples: list, thresholds: dict = None) -> list:
+    """Distribución por paso: p50/p95/max de latencia y elementos emitidos"""
+    thresholds = thresholds or {}
+    by_step = {}
+    for sample in samples:
+        by_step.setdefault(sample["step"], []).append(sample)
+
+    rows = []
+    for step, step_samples in by_step.items():
+        latencias = [s["ms"] for s in step_samples]
+        threshold = thresholds.get("benchmarks", {}).get(step, thresholds.get("default_p95_ms"))
+        p95 = _percentile(latencias, 0.95)
+        rows.append({
+            "id": step,
+            "runs": len(latencias),
+            "p50_ms": round(statistics.median(latencias), 3),
+            "p95_ms": round(p95, 3),
+            "max_ms": round(max(latencias), 3),
+            "elements": max(s["elements"] for s in step_samples),
+            "threshold_p95_ms": threshold,
+            "status": "ok" if threshold is None or p95 <= threshold else "regression",
+        })
+    return rows
+
+
+def run_sequential(scenarios: dict, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        for scenario in scenarios.values():
+            scenario(samples)
+    return samples
+
+
+@contextmanager
+def shared_runtime():
+    """
+    AppTest instala y luego borra `Runtime._instance` en cada run, lo que rompe a las
+    demás sesiones que corren en paralelo. Mientras dure el bloque, todas las sesiones
+    ven un único runtime simulado (como en un servidor real, que comparte uno por proceso).
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    with patch.object(Runtime, "instance", classmethod(lambda cls: runtime)), \
+            patch.object(Runtime, "exists", classmethod(lambda cls: True)):
+        yield runtime
+
+
+def run_concurrent(scenarios: dict, sessions: int, iterations: int) -> dict:
+    """`sessions` sesiones simultáneas, cada una recorre todos los escenarios `iterations` veces"""
+    lock = threading.Lock()
+    samples = []
+
+    def session_worker():
+        local = []
+        for _ in range(iterations):
+            for scenario in scenarios.values():
+                scenario(local)
+        with lock:
+            samples.extend(local)
+
+    t0 = time.perf_counter()
+    with shared_runtime(), ThreadPoolExecutor(max_workers=sessions) as executor:
+        for future in [executor.submit(session_worker) for _ in range(sessions)]:
+            future.result()
+    wall_s = time.perf_counter() - t0
+
+    latencias = [s["ms"] for s in samples]
+    return {
+        "sessions": sessions,
+        "reruns": len(samples),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 2),
+        "p50_ms": round(statistics.median(latencias), 3),
+        "p95_ms": round(_percentile(latencias, 0.95), 3),
+    }
+
+
+def find_saturation(levels: list, min_gain: float = 0.10) -> int:
+    """Último nivel de concurrencia que todavía mejora el throughput al menos `min_gain`"""
+    saturation = levels[0]["sessions"]
+    for previous, current in zip(levels, levels[1:]):
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 + min_gain):
+            break
+        saturation = current["sessions"]
+    return saturation
+
+
+def print_report(report: dict):
+    print(f"{'Paso':<44} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'elem':>6} {'umbral':>8}")
+    for r in report["steps"]:
+        marca = "  ❌ REGRESIÓN" if r["status"] == "regression" else ""
+        umbral = f"{r['threshold_p95_ms']:g}" if r["threshold_p95_ms"] is not None else "-"
+        print(f"{r['id']:<44} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f} "
+              f"{r['elements']:>6} {umbral:>8}{marca}")
+
+    if report["concurrency"]:
+        print(f"\n{'Sesiones':>8} {'reruns':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for level in report["concurrency"]:
+            print(f"{level['sessions']:>8} {level['reruns']:>7} {level['throughput_rps']:>8.2f} "
+                  f"{level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f}")
+        print(f"Punto de saturación: {report['saturation_sessions']} sesiones")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de reruns con AppTest")
+    parser.add_argument("--iterations", type=int, default=5, help="Repeticiones de cada escenario")
+    parser.add_argument("--sessions", default="", help="Niveles de concurrencia, p. ej. 1,2,4,8,16")
+    parser.add_argument("--filter", help="Solo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Ruta del JSON de resultados")
+    args = parser.parse_args(argv)
+
+    scenarios = {name: s for name, s in build_scenarios().items() if not args.filter or args.filter in name}
+    thresholds = load_thresholds("reruns")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "steps": summarize(run_sequential(scenarios, args.iterations), thresholds),
+        "concurrency": [],
+        "saturation_sessions": None,
+    }
+
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    if levels:
+        report["concurrency"] = [run_concurrent(scenarios, n, max(1, args.iterations // 2)) for n in levels]
+        report["saturation_sessions"] = find_saturation(report["concurrency"])
+
+    print_report(report)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados en {output}")
+
+    regresiones = [r["id"] for r in report["steps"] if r["status"] == "regression"]
+    if regresiones:
+        print(f"❌ {len(regresiones)} paso(s) sobre su umbral: {', '.join(regresiones)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
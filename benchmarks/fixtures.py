@@ -0,0 +1,97 @@
+"""
+Fixtures de benchmark: las tres formas de respuesta del README y escalados sintéticos.
+"""
+import copy
+import json
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+BASE_FIXTURES = ("single_delivery_date", "multiple_delivery_dates", "compleja_cedis")
+
+ESTADOS = ["CDMX", "Jalisco", "Nuevo León", "Querétaro", "Sinaloa", "Yucatán", "Puebla", "Sonora"]
+ZONAS = ["Verde", "Amarilla", "Roja"]
+
+
+def load_fixture(name: str) -> dict:
+    """Cargar una fixture base por nombre (sin extensión)"""
+    with open(FIXTURES_DIR / f"{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _synthetic_store(i: int) -> dict:
+    return {
+        "tienda_id": f"S{i:05d}",
+        "nombre_tienda": f"Liverpool Sintética {i:05d}",
+        "nombre": f"Liverpool Sintética {i:05d}",
+        "stock_disponible": (i * 7) % 23,
+        "distancia_km": round(1.5 + (i * 13.7) % 1800, 1),
+        "es_local": i % 9 == 0,
+        "precio_tienda": 999.0 + (i % 40),
+        "precio_total": 999.0 + (i % 40),
+        "estado": ESTADOS[i % len(ESTADOS)],
+        "alcaldia_municipio": f"Municipio {i % 120}",
+        "zona_seguridad": ZONAS[i % len(ZONAS)],
+    }
+
+
+def scale_stores(data: dict, n_stores: int) -> dict:
+    """Copia de `data` con `n_stores` tiendas con stock, cercanas, autorizadas y un plan de asignación"""
+    scaled = copy.deepcopy(data)
+    stores = [_synthetic_store(i) for i in range(n_stores)]
+    stock_analysis = scaled.setdefault("evaluacion_detallada", {}).setdefault("stock_analysis", {})
+    stock_analysis["stock_encontrado"] = stores
+    stock_analysis["tiendas_cercanas"] = [dict(s) for s in stores]
+    stock_analysis["tiendas_autorizadas"] = [dict(s) for s in stores]
+    stock_analysis["asignacion_detallada"] = {
+        "plan_asignacion": [
+            {
+                **store,
+                "cantidad_asignada": 1 + i % 3,
+                "tiempo_total_h": 4.0 + i % 48,
+                "costo_total_mxn": 50.0 + i % 400,
+                "score_total": round(1 / (1 + i), 4),
+                "fleet_type": "FI" if i % 2 else "FE",
+                "carrier": "Liverpool" if i % 2 else "DHL",
+                "razon_seleccion": "Asignación sintética",
+            }
+            for i, store in enumerate(stores[:max(1, n_stores // 10)])
+        ]
+    }
+    return scaled
+
+
+def scale_options(data: dict, n_options: int, stores_per_option: int = 5) -> dict:
+    """Copia de `data` (multiple_delivery_dates) con `n_options` opciones de entrega"""
+    scaled = copy.deepcopy(data)
+    stores = scaled.get("evaluacion_detallada", {}).get("stock_analysis", {}).get("stock_encontrado", [])
+    nombres = [s.get("nombre_tienda", "") for s in stores] or ["Liverpool Santa Fe"]
+    plantilla = scaled["delivery_options"][0]
+
+    options = []
+    for i in range(n_options):
+        option = copy.deepcopy(plantilla)
+        option.update({
+            "opcion": f"opcion_{i:03d}",
+            "descripcion": f"Opción sintética {i}",
+            "fecha_entrega": f"2025-06-{19 + i % 10:02d}T14:00:00",
+            "costo_envio": 500.0 + 37.5 * i,
+            "probabilidad_cumplimiento": round(0.95 - (i % 50) / 100, 2),
+            "tiendas_origen": [nombres[(i * stores_per_option + k) % len(nombres)] for k in range(stores_per_option)],
+        })
+        option.setdefault("logistica", {})["tiempo_total_h"] = 24.0 + i % 72
+        options.append(option)
+
+    scaled["delivery_options"] = options
+    scaled["total_options"] = n_options
+    scaled["recommendation"] = {"opcion": options[0]["opcion"]}
+    return scaled
+
+
+def benchmark_cases() -> dict:
+    """Casos de benchmark: nombre -> response"""
+    cases = {name: load_fixture(name) for name in BASE_FIXTURES}
+    cases["single_2000_tiendas"] = scale_stores(cases["single_delivery_date"], 2000)
+    cases["cedis_2000_tiendas"] = scale_stores(cases["compleja_cedis"], 2000)
+    cases["multiple_200_opciones"] = scale_options(scale_stores(cases["multiple_delivery_dates"], 2000), 200)
+    return cases
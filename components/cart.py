@@ -0,0 +1,182 @@
+import math
+from datetime import datetime, timedelta, time
+
+import pandas as pd
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from components.layout import render_header
+from components.forms import render_section_header, validate_form_inputs
+from components.charts import (
+    build_delivery_network, merge_delivery_networks, _build_graph_config, _get_graph_categories
+)
+from config.settings import Config
+from services.api_client import APIClient
+from utils.dates import dates_to_arrow, format_date
+from utils.helpers import summarize_prediction, format_currency, format_percentage
+
+EMPTY_CART = pd.DataFrame([{"SKU": "", "Cantidad": 1}])
+
+
+def render_cart_prediction():
+    """Herramienta: predicción de un pedido con varios SKUs"""
+    render_header(
+        "🛒 Pedido Multi-SKU",
+        "Predicción consolidada de un carrito con varias líneas de producto"
+    )
+
+    col1, col2 = st.columns([1, 1], gap="large")
+
+    with col1:
+        render_section_header("📍", "Destino", "Ubicación de entrega final")
+        codigo_postal = st.text_input("Código Postal", placeholder="76000", key="cart_cp")
+
+        render_section_header("⏰", "Temporización", "Fecha y hora del pedido")
+        col_fecha, col_hora = st.columns(2)
+        with col_fecha:
+            fecha = st.date_input("Fecha del Pedido", value=datetime.now().date(), key="cart_fecha")
+        with col_hora:
+            hora = st.time_input("Hora", value=time(11, 0), step=timedelta(minutes=15), key="cart_hora")
+
+    with col2:
+        render_section_header("📦", "Líneas del Carrito", f"Hasta {Config.CART_MAX_LINES} SKUs")
+        lineas = st.data_editor(
+            EMPTY_CART,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "SKU": st.column_config.TextColumn("SKU", required=True),
+                "Cantidad": st.column_config.NumberColumn(
+                    "Cantidad", min_value=1, max_value=Config.MAX_QUANTITY, step=1, default=1, required=True
+                ),
+            },
+            key="cart_lineas"
+        )
+
+    if st.button("🛒 Analizar Carrito", type="primary", key="cart_btn"):
+        lines = _clean_cart_lines(lineas)
+        if not lines:
+            st.error("📦 Agregue al menos una línea con SKU")
+        elif len(lines) > Config.CART_MAX_LINES:
+            st.error(f"📦 Máximo {Config.CART_MAX_LINES} líneas por carrito")
+        elif all(validate_form_inputs(codigo_postal, line['sku_id']) for line in lines):
+            fecha_str = datetime.combine(fecha, hora).strftime("%Y-%m-%dT%H:%M:%S")
+            with st.spinner("🛒 Procesando líneas del carrito..."):
+                st.session_state.cart_result = run_cart_predictions(codigo_postal, lines, fecha_str)
+
+    if st.session_state.get('cart_result'):
+        render_cart_results(st.session_state.cart_result)
+
+
+def _clean_cart_lines(lineas: pd.DataFrame) -> list:
+    """Normalizar las filas del editor a líneas de carrito"""
+    lines = []
+    for row in lineas.to_dict('records'):
+        sku = str(row.get('SKU') or '').strip()
+        cantidad = row.get('Cantidad')
+        if not sku:
+            continue
+        cantidad = 1 if cantidad is None or pd.isna(cantidad) else int(cantidad)
+        lines.append({'sku_id': sku, 'cantidad': cantidad})
+    return lines
+
+
+def run_cart_predictions(codigo_postal: str, lines: list, fecha_compra: str) -> dict:
+    """Predecir todas las líneas en paralelo (las líneas repetidas salen del cache)"""
+    payloads = [
+        APIClient.build_payload(codigo_postal, line['sku_id'], line['cantidad'], fecha_compra)
+        for line in lines
+    ]
+    results = [None] * len(payloads)
+    for index, result, error in APIClient().predict_many(payloads):
+        results[index] = {**lines[index], 'result': result, 'error': error}
+
+    return {'codigo_postal': codigo_postal, 'fecha_compra': fecha_compra, 'lines': results}
+
+
+def consolidate_cart(cart_result: dict) -> dict:
+    """
+    Vista consolidada: promesa más tardía, costo total y probabilidad conjunta. Con líneas
+    fallidas (`completo` False) los valores solo cubren las exitosas y son cotas del pedido.
+    """
+    resumenes = [summarize_prediction(line['result']) for line in cart_result['lines'] if line['result']]
+    fechas = [r['fecha_entrega'] for r in resumenes if r.get('fecha_entrega')]
+    return {
+        'fecha_entrega': max(fechas) if fechas else None,
+        'costo_total': sum(r.get('costo') or 0 for r in resumenes),
+        # Las líneas se entregan de forma independiente: el pedido completo llega si llegan todas
+        'probabilidad': math.prod(r.get('probabilidad') or 0 for r in resumenes) if resumenes else 0,
+        'lineas_ok': len(resumenes),
+        'lineas_error': len(cart_result['lines']) - len(resumenes),
+        'completo': len(resumenes) == len(cart_result['lines']),
+        'resumenes': resumenes,
+    }
+
+
+def render_cart_results(cart_result: dict):
+    """Renderizar vista consolidada, detalle por línea y red logística fusionada"""
+    consolidado = consolidate_cart(cart_result)
+    total_lineas = len(cart_result['lines'])
+
+    if consolidado['lineas_ok'] == 0:
+        st.error(f"🚫 Ninguna de las {total_lineas} líneas tiene predicción: no hay vista consolidada")
+    elif not consolidado['completo']:
+        st.warning(
+            f"⚠️ Consolidado incompleto: {consolidado['lineas_error']} de {total_lineas} líneas sin predicción. "
+            "Las cifras solo cubren las líneas exitosas: el pedido completo cuesta al menos eso, "
+            "llega no antes y con una probabilidad no mayor."
+        )
+
+    if consolidado['lineas_ok']:
+        # Con líneas fallidas las cifras son cotas, no valores del pedido
+        parcial = not consolidado['completo']
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("🎯 Promesa del Pedido",
+                      f"{'≥ ' if parcial else ''}{format_date(consolidado['fecha_entrega'])}",
+                      help="Fecha de la línea que llega más tarde")
+        with col2:
+            st.metric("💰 Costo Total", f"{'≥ ' if parcial else ''}{format_currency(consolidado['costo_total'])}")
+        with col3:
+            st.metric("📈 Probabilidad Conjunta",
+                      f"{'≤ ' if parcial else ''}{format_percentage(consolidado['probabilidad'])}",
+                      help="Probabilidad de que todas las líneas se cumplan")
+        with col4:
+            st.metric("📦 Líneas", f"{consolidado['lineas_ok']}/{total_lineas}",
+                      delta="incompleto" if parcial else None, delta_color="inverse")
+
+    for line in cart_result['lines']:
+        if line['error']:
+            st.error(f"🚫 {line['sku_id']} × {line['cantidad']}: {line['error']}")
+
+    df_lines = pd.DataFrame([
+        {
+            'SKU': line['sku_id'],
+            'Cantidad': line['cantidad'],
+            'Fecha Entrega': summary.get('fecha_entrega'),
+            'Tipo Entrega': summary.get('tipo_entrega', 'N/A'),
+            'Costo ($)': summary.get('costo'),
+            'Probabilidad': summary.get('probabilidad'),
+            'Tiendas Origen': ', '.join(summary.get('tiendas', [])),
+        }
+        for line, summary in (
+            (line, summarize_prediction(line['result'])) for line in cart_result['lines'] if line['result']
+        )
+    ])
+    if not df_lines.empty:
+        df_lines = dates_to_arrow(df_lines, ['Fecha Entrega'])
+        st.dataframe(
+            df_lines,
+            use_container_width=True,
+            column_config={
+                'Fecha Entrega': st.column_config.DatetimeColumn('Fecha Entrega', format="DD/MM/YYYY"),
+                'Probabilidad': st.column_config.NumberColumn('Probabilidad', format="percent"),
+            }
+        )
+
+    networks = [build_delivery_network(line['result']) for line in cart_result['lines'] if line['result']]
+    if networks:
+        st.markdown("#### 🎯 Red Logística Consolidada")
+        nodes, links = merge_delivery_networks(networks)
+        option = _build_graph_config(nodes, links, _get_graph_categories(), cart_result['codigo_postal'])
+        st_echarts(option, height="800px", key="cart_network")
@@ -2,37 +2,33 @@ import streamlit as st
 from streamlit_echarts import st_echarts
 
 from components.layout import render_header, render_back_button
+from components.perf_panel import render_trace_waterfall
+from components.revalidation import render_revalidation_status
 from utils.helpers import (
     format_currency, format_percentage, format_datetime, get_delivery_status_badge,
     extract_key_insights, render_comprehensive_evaluation_table
 )
+from utils.dates import DateLike, parse_iso_datetime, get_parsed_date, format_date_short, dates_to_arrow, strip_parsed_dates
+from utils.tracing import activate, span
 
 
-def calcular_llegada_relativa(fecha_compra_str: str, fecha_entrega_str: str) -> str:
+def calcular_llegada_relativa(fecha_compra: DateLike, fecha_entrega: DateLike) -> str:
     """Calcular cuándo llega el pedido de forma relativa a la fecha de compra"""
-    if not fecha_compra_str or not fecha_entrega_str:
+    compra_dt = parse_iso_datetime(fecha_compra)
+    entrega_dt = parse_iso_datetime(fecha_entrega)
+    if not compra_dt or not entrega_dt:
         return "N/A"
 
-    try:
-        from datetime import datetime
-
-        fecha_compra = datetime.fromisoformat(fecha_compra_str.replace('Z', '+00:00'))
-        fecha_entrega = datetime.fromisoformat(fecha_entrega_str.replace('Z', '+00:00'))
-        dia_compra = fecha_compra.date()
-        dia_entrega = fecha_entrega.date()
-        diferencia_dias = (dia_entrega - dia_compra).days
-
-        if diferencia_dias == 0:
-            return "HOY"
-        elif diferencia_dias == 1:
-            return "MAÑANA"
-        elif diferencia_dias > 0:
-            return f"EN {diferencia_dias} DÍAS"
-        else:
-            return f"HACE {abs(diferencia_dias)} DÍAS"
+    diferencia_dias = (entrega_dt.date() - compra_dt.date()).days
 
-    except Exception as e:
-        return "N/A"
+    if diferencia_dias == 0:
+        return "HOY"
+    elif diferencia_dias == 1:
+        return "MAÑANA"
+    elif diferencia_dias > 0:
+        return f"EN {diferencia_dias} DÍAS"
+    else:
+        return f"HACE {abs(diferencia_dias)} DÍAS"
 
 
 def render_results_dashboard():
@@ -40,29 +36,47 @@ def render_results_dashboard():
     data = st.session_state.prediction_data
 
     render_back_button()
-    render_header(
-        "📊 Análisis de Predicción",
-        "Resultados del análisis de ruta y predicción de entrega"
-    )
+    render_revalidation_status()
 
-    # Métricas principales
-    render_main_metrics(data)
+    # Traza abierta por process_prediction: se completa en este primer rerun de resultados
+    trace = st.session_state.pop('active_trace', None)
+
+    with activate(trace):
+        render_header(
+            "📊 Análisis de Predicción",
+            "Resultados del análisis de ruta y predicción de entrega"
+        )
 
-    # Fecha promesa destacada
-    render_delivery_promise(data)
+        # Métricas principales
+        with span("dashboard.main_metrics"):
+            render_main_metrics(data)
 
-    # Insights
-    render_key_insights(data)
+        # Fecha promesa destacada
+        with span("dashboard.delivery_promise"):
+            render_delivery_promise(data)
 
-    # Visualizaciones
-    render_interactive_charts(data)
+        # Insights
+        with span("dashboard.key_insights"):
+            render_key_insights(data)
 
-    # NUEVA SECCIÓN
-    st.markdown("---")
-    render_comprehensive_evaluation_table(data)
+        # Visualizaciones
+        with span("dashboard.interactive_charts"):
+            render_interactive_charts(data)
 
-    # Detalles técnicos
-    render_technical_details(data)
+        # NUEVA SECCIÓN
+        st.markdown("---")
+        with span("dashboard.evaluation_table"):
+            render_comprehensive_evaluation_table(data)
+
+        # Detalles técnicos
+        with span("dashboard.technical_details"):
+            render_technical_details(data)
+
+    if trace is not None:
+        trace.finish()
+        st.session_state.last_trace = trace
+
+    render_trace_waterfall(st.session_state.get('last_trace'))
 
 
 def render_main_metrics(data: dict):
@@ -112,11 +126,11 @@ def render_main_metrics(data: dict):
 
 def render_delivery_promise(data: dict):
     """Renderizar fecha promesa de entrega adaptada al nuevo response"""
-    fecha_entrega_str = data.get('resultado_final', {}).get('fecha_entrega_estimada', '')
+    fecha_entrega_dt = get_parsed_date(data.get('resultado_final', {}), 'fecha_entrega_estimada')
 
-    if fecha_entrega_str:
+    if fecha_entrega_dt:
         # fecha (sin hora)
-        fecha_entrega = format_datetime(fecha_entrega_str)
+        fecha_entrega = format_datetime(fecha_entrega_dt)
         rango = data.get('resultado_final', {}).get('ventana_entrega', {})
 
         st.markdown(f"""
@@ -144,7 +158,8 @@ def render_delivery_promise(data: dict):
 
 def render_key_insights(data: dict):
     """Renderizar insights clave"""
-    insights = extract_key_insights(data)
+    with span("view_model.key_insights"):
+        insights = extract_key_insights(data)
 
     if insights:
         st.markdown("### 💡 Puntos Clave del Análisis")
@@ -209,49 +224,13 @@ def render_delivery_route_graph(data: dict):
 
     try:
         request_data = data.get('request', {})
-        factores_externos = data.get('factores_externos', {})
         logistica = data.get('logistica_entrega', {})
-        evaluacion_detallada = data.get('evaluacion_detallada', {})
-        stock_analysis = evaluacion_detallada.get('stock_analysis', {})
-        cedis_analysis = evaluacion_detallada.get('cedis_analysis')
-
-        nodes = []
-        links = []
-        categories = _get_graph_categories()
-
-        # 1. NODO CENTRAL: CÓDIGO POSTAL DESTINO
+        stock_analysis = data.get('evaluacion_detallada', {}).get('stock_analysis', {})
         codigo_postal = request_data.get('codigo_postal', 'N/A')
-        destination_node = _create_central_destination_node(codigo_postal)
-        nodes.append(destination_node)
-        destination_node_name = destination_node['name']
-
-        # 2. NODO PRODUCTO/SKU
-        product_node = _create_product_node(request_data)
-        nodes.append(product_node)
-
-        # 3. TIENDAS CON STOCK DISPONIBLE
-        stock_nodes, stock_links = _create_stock_stores_from_response(stock_analysis, product_node['name'])
-        nodes.extend(stock_nodes)
-        links.extend(stock_links)
-
-        # 4. TIENDAS CERCANAS SIN STOCK
-        nearby_nodes, nearby_links = _create_nearby_stores_from_response(stock_analysis, destination_node_name)
-        nodes.extend(nearby_nodes)
-        links.extend(nearby_links)
-
-        # 5. RUTA LOGÍSTICA (MEJORADA)
-        route_nodes, route_links = _create_logistics_route_enhanced(
-            logistica, cedis_analysis, stock_nodes, destination_node_name, data
-        )
-        nodes.extend(route_nodes)
-        links.extend(route_links)
+        categories = _get_graph_categories()
 
-        # 6. FACTORES EXTERNOS (MEJORADOS)
-        factor_nodes, factor_links = _create_external_factors_enhanced(
-            factores_externos, destination_node_name, request_data
-        )
-        nodes.extend(factor_nodes)
-        links.extend(factor_links)
+        with span("view_model.delivery_network"):
+            nodes, links = build_delivery_network(data)
 
         # Verificar datos suficientes
         if len(nodes) < 2:
@@ -259,7 +238,8 @@ def render_delivery_route_graph(data: dict):
             render_debug_info(data)
             return
 
-        option = _build_graph_config(nodes, links, categories, codigo_postal)
+        with span("view_model.graph_config", nodes=len(nodes), links=len(links)):
+            option = _build_graph_config(nodes, links, categories, codigo_postal)
         st_echarts(option, height="900px", key="logistics_network_centered")
         _render_summary_metrics(data, stock_analysis, logistica, codigo_postal)
 
@@ -269,6 +249,91 @@ def render_delivery_route_graph(data: dict):
         render_simple_fallback_graph(data)
 
 
+def build_delivery_network(data: dict):
+    """Construir nodos y enlaces de la red logística de un response (sin renderizar)"""
+    request_data = data.get('request', {})
+    factores_externos = data.get('factores_externos', {})
+
+    nodes = []
+    links = []
+
+    # 1. NODO CENTRAL: CÓDIGO POSTAL DESTINO
+    codigo_postal = request_data.get('codigo_postal', 'N/A')
+    destination_node = _create_central_destination_node(codigo_postal)
+    nodes.append(destination_node)
+    destination_node_name = destination_node['name']
+
+    # 2. NODO PRODUCTO/SKU
+    product_node = _create_product_node(request_data)
+    nodes.append(product_node)
+
+    if data.get('multiple_delivery_options') and data.get('delivery_options'):
+        # MÚLTIPLES OPCIONES: red de la opción recomendada
+        delivery_options = data.get('delivery_options', [])
+        recomendada = data.get('recommendation', {}).get('opcion')
+        option = next((opt for opt in delivery_options if opt.get('opcion') == recomendada), delivery_options[0])
+
+        origen_nodes, origen_links = _create_option_stores_nodes(option.get('tiendas_origen', []), product_node['name'])
+        route_nodes, route_links = _create_option_logistics_route(
+            option.get('logistica', {}), origen_nodes, destination_node_name, option
+        )
+        factor_nodes, factor_links = _create_option_factors(factores_externos, destination_node_name, option)
+
+        for element_nodes, element_links in ((origen_nodes, origen_links), (route_nodes, route_links),
+                                             (factor_nodes, factor_links)):
+            nodes.extend(element_nodes)
+            links.extend(element_links)
+        return nodes, links
+
+    logistica = data.get('logistica_entrega', {})
+    evaluacion_detallada = data.get('evaluacion_detallada', {})
+    stock_analysis = evaluacion_detallada.get('stock_analysis', {})
+    cedis_analysis = evaluacion_detallada.get('cedis_analysis')
+
+    # 3. TIENDAS CON STOCK DISPONIBLE
+    stock_nodes, stock_links = _create_stock_stores_from_response(stock_analysis, product_node['name'])
+    nodes.extend(stock_nodes)
+    links.extend(stock_links)
+
+    # 4. TIENDAS CERCANAS SIN STOCK
+    nearby_nodes, nearby_links = _create_nearby_stores_from_response(stock_analysis, destination_node_name)
+    nodes.extend(nearby_nodes)
+    links.extend(nearby_links)
+
+    # 5. RUTA LOGÍSTICA (MEJORADA)
+    route_nodes, route_links = _create_logistics_route_enhanced(
+        logistica, cedis_analysis, stock_nodes, destination_node_name, data
+    )
+    nodes.extend(route_nodes)
+    links.extend(route_links)
+
+    # 6. FACTORES EXTERNOS (MEJORADOS)
+    factor_nodes, factor_links = _create_external_factors_enhanced(
+        factores_externos, destination_node_name, request_data
+    )
+    nodes.extend(factor_nodes)
+    links.extend(factor_links)
+
+    return nodes, links
+
+
+def merge_delivery_networks(networks: list):
+    """Fusionar varias redes logísticas deduplicando nodos (tiendas, CEDIS, flotas) y enlaces"""
+    nodes_by_name = {}
+    links_by_key = {}
+
+    for nodes, links in networks:
+        for node in nodes:
+            if node['name'] in nodes_by_name:
+                nodes_by_name[node['name']]['value'] = nodes_by_name[node['name']].get('value', 0) + node.get('value', 0)
+            else:
+                nodes_by_name[node['name']] = dict(node)
+        for link in links:
+            links_by_key.setdefault((link['source'], link['target']), link)
+
+    return list(nodes_by_name.values()), list(links_by_key.values())
+
+
 def render_multiple_delivery_options_graph(data: dict):
     """Renderizar gráfico para múltiples opciones de entrega"""
     st.markdown("### 🔄 Análisis de Múltiples Opciones de Entrega")
@@ -928,11 +993,7 @@ def _render_option_metrics(option: dict, codigo_postal: str):
         st.metric("📈 Probabilidad", f"{prob:.1%}")
 
     with col3:
-        fecha_entrega = option.get('fecha_entrega', 'N/A')
-        if 'T' in str(fecha_entrega):
-            fecha_display = fecha_entrega.split('T')[0]
-        else:
-            fecha_display = str(fecha_entrega)
+        fecha_display = format_date_short(get_parsed_date(option, 'fecha_entrega') or option.get('fecha_entrega'))
         st.metric("📅 Fecha Entrega", fecha_display)
 
     with col4:
@@ -954,8 +1015,7 @@ def render_delivery_options_comparison(delivery_options: list, recommendation: d
             'Opción': option.get('opcion', f'Opción {i + 1}').replace('_', ' ').title(),
             'Descripción': option.get('descripcion', 'N/A'),
             'Tipo Entrega': option.get('tipo_entrega', 'N/A'),
-            'Fecha Entrega': option.get('fecha_entrega', 'N/A').split('T')[0] if 'T' in str(
-                option.get('fecha_entrega', '')) else option.get('fecha_entrega', 'N/A'),
+            'Fecha Entrega': get_parsed_date(option, 'fecha_entrega'),
             'Costo ($)': f"{option.get('costo_envio', 0):,.2f}",
             'Probabilidad': f"{option.get('probabilidad_cumplimiento', 0):.1%}",
             'Tiempo (h)': f"{option.get('logistica', {}).get('tiempo_total_h', 0):.1f}",
@@ -963,8 +1023,12 @@ def render_delivery_options_comparison(delivery_options: list, recommendation: d
             'Recomendada': '🏆 SÍ' if is_recommended else '❌ No'
         })
 
-    df_comparison = pd.DataFrame(comparison_data)
-    st.dataframe(df_comparison, use_container_width=True)
+    df_comparison = dates_to_arrow(pd.DataFrame(comparison_data), ['Fecha Entrega'])
+    st.dataframe(
+        df_comparison,
+        use_container_width=True,
+        column_config={'Fecha Entrega': st.column_config.DatetimeColumn('Fecha Entrega', format="YYYY-MM-DD")}
+    )
 
     # Métricas consolidadas
     st.markdown("#### 📈 Resumen Comparativo")
@@ -1413,10 +1477,10 @@ def render_simple_fallback_graph(data: dict):
 def render_delivery_summary(data: dict):
     """Renderizar resumen adaptado al nuevo response"""
     request_data = data.get('request', {})
-    fecha_compra_str = request_data.get('fecha_compra', '')
-    fecha_entrega_str = data.get('resultado_final', {}).get('fecha_entrega_estimada', '')
+    fecha_compra_dt = get_parsed_date(request_data, 'fecha_compra')
+    fecha_entrega_dt = get_parsed_date(data.get('resultado_final', {}), 'fecha_entrega_estimada')
     rango_horario = data.get('resultado_final', {}).get('ventana_entrega', {})
-    dias_entrega = calcular_llegada_relativa(fecha_compra_str, fecha_entrega_str)
+    dias_entrega = calcular_llegada_relativa(fecha_compra_dt, fecha_entrega_dt)
 
     st.markdown(f"""
     <div style='
@@ -1430,11 +1494,11 @@ def render_delivery_summary(data: dict):
         <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1.5rem; text-align: center;'>
             <div>
                 <h4 style='color: #6B5B73; margin: 0; font-size: 0.9rem; text-transform: uppercase; letter-spacing: 1px;'>📅 Fecha de Compra</h4>
-                <p style='color: #4A4A4A; font-size: 1.1rem; font-weight: 600; margin: 0.5rem 0;'>{format_datetime(fecha_compra_str) if fecha_compra_str else "N/A"}</p>
+                <p style='color: #4A4A4A; font-size: 1.1rem; font-weight: 600; margin: 0.5rem 0;'>{format_datetime(fecha_compra_dt)}</p>
             </div>
             <div>
                 <h4 style='color: #6B5B73; margin: 0; font-size: 0.9rem; text-transform: uppercase; letter-spacing: 1px;'>🎯 Fecha de Entrega</h4>
-                <p style='color: #4A4A4A; font-size: 1.1rem; font-weight: 600; margin: 0.5rem 0;'>{format_datetime(fecha_entrega_str) if fecha_entrega_str else "N/A"}</p>
+                <p style='color: #4A4A4A; font-size: 1.1rem; font-weight: 600; margin: 0.5rem 0;'>{format_datetime(fecha_entrega_dt)}</p>
             </div>
             <div>
                 <h4 style='color: #6B5B73; margin: 0; font-size: 0.9rem; text-transform: uppercase; letter-spacing: 1px;'>⏰ Llega en</h4>
@@ -1783,7 +1847,7 @@ def render_technical_details(data: dict):
         # DEBUG -> PARA VER EL FK Request
         show_json = st.checkbox("📄 Mostrar Response Completo del API")
         if show_json:
-            st.json(data)
+            st.json(strip_parsed_dates(data))
 
 
 
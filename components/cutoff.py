@@ -0,0 +1,116 @@
+import pandas as pd
+import streamlit as st
+from datetime import datetime, time
+
+from components.layout import render_header
+from components.forms import render_section_header, validate_form_inputs
+from components.charts import calcular_llegada_relativa
+from config.settings import Config
+from services.cutoff_finder import CutoffFinder
+from utils.dates import format_date, dates_to_arrow
+
+HORIZONTES = {
+    "📅 Un día": 24,
+    "🗓️ Una semana": 24 * 7,
+}
+
+
+def render_cutoff_finder():
+    """Herramienta: hasta qué hora se puede comprar y conservar la promesa"""
+    render_header(
+        "🕐 Buscador de Hora de Corte",
+        "Hasta qué hora puede comprar un cliente y mantener la misma promesa de entrega"
+    )
+
+    col1, col2 = st.columns([1, 1], gap="large")
+
+    with col1:
+        render_section_header("📍", "Destino y Producto", "CP, SKU y cantidad a evaluar")
+        codigo_postal = st.text_input("Código Postal", placeholder="76000", key="cutoff_cp")
+        sku_id = st.text_input("SKU", placeholder="LIV-001", key="cutoff_sku")
+        cantidad = st.number_input("Cantidad", min_value=1, max_value=Config.MAX_QUANTITY, value=1, key="cutoff_qty")
+
+    with col2:
+        render_section_header("⏰", "Rango de Búsqueda", "Día de inicio y horizonte")
+        fecha_inicio = st.date_input("Fecha de inicio", value=datetime.now().date(), key="cutoff_fecha")
+        horizonte = st.radio("Horizonte", list(HORIZONTES), horizontal=True, key="cutoff_horizonte")
+
+    if st.button("🔎 Buscar Horas de Corte", type="primary", key="cutoff_btn"):
+        if validate_form_inputs(codigo_postal, sku_id):
+            finder = CutoffFinder(
+                codigo_postal, sku_id, int(cantidad),
+                inicio=datetime.combine(fecha_inicio, time(0, 0)),
+                horas=HORIZONTES[horizonte]
+            )
+            with st.spinner("🔎 Buscando fronteras de promesa..."):
+                fronteras = finder.find()
+            st.session_state.cutoff_result = {
+                'fronteras': fronteras,
+                'probes': finder.probes(),
+                'probe_count': finder.probe_count,
+                'total_slots': finder.total_slots,
+            }
+
+    if st.session_state.get('cutoff_result'):
+        render_cutoff_results(st.session_state.cutoff_result)
+
+
+def render_cutoff_results(cutoff_result: dict):
+    """Renderizar fronteras encontradas y puntos evaluados"""
+    fronteras = cutoff_result['fronteras']
+    probes = cutoff_result['probes']
+    errores = [p for p in probes if p['error']]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🔀 Cambios de Promesa", len(fronteras))
+    with col2:
+        st.metric("📡 Consultas Realizadas", cutoff_result['probe_count'],
+                  delta=f"de {cutoff_result['total_slots'] + 1} horarios posibles", delta_color="off")
+    with col3:
+        st.metric("⚠️ Consultas con Error", len(errores))
+
+    if errores and len(errores) == len(probes):
+        st.error(f"🚫 {errores[0]['error']}")
+        return
+
+    if not fronteras:
+        primera = next((p for p in probes if not p['error']), {})
+        st.info(
+            f"✅ La promesa no cambia en el rango: entrega "
+            f"**{calcular_llegada_relativa(primera.get('fecha_compra'), primera.get('fecha_entrega'))}** "
+            f"({format_date(primera.get('fecha_entrega'))}, {primera.get('tipo_entrega', 'N/A')})"
+        )
+    else:
+        st.markdown("### 🕐 Horas de Corte")
+        for frontera in fronteras:
+            antes, despues = frontera['antes'], frontera['despues']
+            st.success(
+                f"🛒 Comprando hasta las **{format_date(antes['fecha_compra'], '%d/%m %H:%M')}** → entrega "
+                f"**{calcular_llegada_relativa(antes['fecha_compra'], antes['fecha_entrega'])}** "
+                f"({antes['tipo_entrega'] or 'N/A'}); desde las "
+                f"**{format_date(despues['fecha_compra'], '%d/%m %H:%M')}** → "
+                f"**{calcular_llegada_relativa(despues['fecha_compra'], despues['fecha_entrega'])}** "
+                f"({despues['tipo_entrega'] or 'N/A'})"
+            )
+
+    with st.expander("📋 Horarios Evaluados", expanded=False):
+        df_probes = pd.DataFrame([
+            {
+                'Hora Compra': p['fecha_compra'],
+                'Fecha Entrega': p['fecha_entrega'],
+                'Tipo Entrega': p['tipo_entrega'] or 'N/A',
+                'Costo ($)': p['costo'],
+                'Error': p['error'] or '',
+            }
+            for p in probes
+        ])
+        df_probes = dates_to_arrow(df_probes, ['Hora Compra', 'Fecha Entrega'])
+        st.dataframe(
+            df_probes,
+            use_container_width=True,
+            column_config={
+                'Hora Compra': st.column_config.DatetimeColumn('Hora Compra', format="DD/MM/YYYY HH:mm"),
+                'Fecha Entrega': st.column_config.DatetimeColumn('Fecha Entrega', format="DD/MM/YYYY"),
+            }
+        )
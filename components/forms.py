@@ -1,8 +1,19 @@
 import streamlit as st
+from concurrent.futures import wait
 from datetime import datetime, timedelta, time
 from config.settings import Config
 from services.api_client import APIClient
+from services.cancellation import CancelToken
+from services.catalog import catalog_errors
+from services.health import backend_health
+from services.prediction_history import prediction_history
+from services.prediction_jobs import prediction_jobs
+from services.prefetch import prefetcher
 from components.layout import render_header
+from components.revalidation import cancel_revalidation
+from utils.dates import normalize_response_dates
+from utils.helpers import current_session_id, format_seconds
+from utils.tracing import Trace, activate, span
 
 
 def render_prediction_form():
@@ -16,6 +27,8 @@ def render_prediction_form():
     <div style='max-width: 900px; margin: 0 auto; padding: 0 1rem;'>
     """, unsafe_allow_html=True)
 
+    render_backend_status()
+
     with st.container():
         st.markdown("""
         <div style='
@@ -109,10 +122,79 @@ def render_prediction_form():
             if not validate_form_inputs(codigo_postal, sku_id):
                 return
             process_prediction(codigo_postal, sku_id, cantidad)
+        elif st.session_state.get('prediction_job'):
+            render_prediction_job()
+        elif st.session_state.get('prediction_error'):
+            render_prediction_error()
+        elif st.session_state.get('queued_prediction'):
+            render_queued_prediction()
+        elif Config.PREFETCH_ENABLED and not form_input_errors(codigo_postal, sku_id):
+            prefetcher.schedule(current_session_id(), APIClient.build_payload(
+                codigo_postal, sku_id, cantidad, build_fecha_compra()
+            ))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+def render_backend_status():
+    """Indicador del estado del backend según el sondeo de salud"""
+    salud = backend_health.snapshot()
+    if salud["state"] == "down":
+        desde = datetime.fromtimestamp(salud["down_since"]).strftime("%H:%M") if salud["down_since"] else "N/A"
+        detalle = f"desde las {desde}"
+    elif salud["latency_ms"] is not None:
+        detalle = f"{salud['latency_ms']:,.0f} ms"
+    else:
+        detalle = ""
+    colores = {"up": "#ecfdf5", "degraded": "#fffbeb", "down": "#fef2f2", "unknown": "#f1f5f9"}
+    st.markdown(f"""
+    <div style='text-align: right; margin-bottom: 0.5rem;'>
+        <span style='background: {colores[salud["state"]]}; color: #334155; border-radius: 999px;
+                     padding: 0.25rem 0.75rem; font-size: 0.8rem;'>
+            {salud["label"]}{" · " + detalle if detalle else ""}
+        </span>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def queue_prediction(codigo_postal: str, sku_id: str, cantidad: int):
+    """Dejar la predicción en espera hasta que el backend vuelva a responder"""
+    st.session_state.queued_prediction = {
+        "codigo_postal": codigo_postal,
+        "sku_id": sku_id,
+        "cantidad": cantidad,
+        "queued_at": datetime.now().timestamp(),
+    }
+
+
+def render_queued_prediction():
+    """Predicción en espera: se ejecuta sola al recuperarse el backend o caduca"""
+    pendiente = st.session_state.queued_prediction
+    if not backend_health.is_down():
+        st.session_state.queued_prediction = None
+        process_prediction(pendiente["codigo_postal"], pendiente["sku_id"], pendiente["cantidad"])
+        return
+
+    if datetime.now().timestamp() - pendiente["queued_at"] > Config.HEALTH_QUEUE_MAX_WAIT_SECONDS:
+        st.session_state.queued_prediction = None
+        st.error("🔴 El backend sigue sin conexión. La predicción en espera se descartó; intente más tarde.")
+        return
+
+    st.info(f"⏳ Backend sin conexión. La predicción para CP {pendiente['codigo_postal']} · "
+            f"{pendiente['sku_id']} se ejecutará automáticamente cuando vuelva a responder.")
+    if st.button("✖️ Cancelar predicción en espera", key="cancel_queued_prediction"):
+        st.session_state.queued_prediction = None
+        st.rerun()
+    _poll_backend_recovery()
+
+
+@st.fragment(run_every=Config.HEALTH_QUEUE_POLL_SECONDS)
+def _poll_backend_recovery():
+    """Relanzar la app en cuanto el sondeo vea al backend disponible"""
+    if st.session_state.get('queued_prediction') and not backend_health.is_down():
+        st.rerun()
+
+
 def render_section_header(icon: str, title: str, subtitle: str):
     """Renderizar header de sección """
     st.markdown(f"""
@@ -243,8 +325,8 @@ def render_methodology_panel():
     """, unsafe_allow_html=True)
 
 
-def validate_form_inputs(codigo_postal: str, sku_id: str) -> bool:
-    """Validar entradas del formulario"""
+def form_input_errors(codigo_postal: str, sku_id: str) -> list:
+    """Errores de validación de las entradas del formulario (sin UI)"""
     errors = []
 
     if not codigo_postal:
@@ -259,6 +341,15 @@ def validate_form_inputs(codigo_postal: str, sku_id: str) -> bool:
     elif len(sku_id) < 3:
         errors.append("📦 SKU incompleto (mínimo 3 caracteres)")
 
+    if not errors:
+        errors.extend(catalog_errors(codigo_postal, sku_id))
+
+    return errors
+
+
+def validate_form_inputs(codigo_postal: str, sku_id: str) -> bool:
+    """Validar entradas del formulario"""
+    errors = form_input_errors(codigo_postal, sku_id)
     if errors:
         for error in errors:
             st.error(error)
@@ -293,47 +384,152 @@ def render_examples_panel():
             """)
 
 
-def process_prediction(codigo_postal: str, sku_id: str, cantidad: int):
-    """Procesar la predicción con feedback"""
-    try:
-        fecha_hora_compra = datetime.combine(
-            st.session_state.fecha_compra,
-            st.session_state.hora_compra
-        )
-        fecha_str = fecha_hora_compra.strftime("%Y-%m-%dT%H:%M:%S")
-
-        with st.status("🔄 Ejecutando Análisis Inteligente...", expanded=True) as status:
-            st.write("🔍 Validando parámetros de entrada...")
-            st.write("🏪 Identificando ubicaciones con inventario...")
-            st.write("🛣️ Calculando rutas óptimas...")
-            st.write("🤖 Procesando con algoritmos de IA...")
-            st.write("📊 Generando insights predictivos...")
-
-            api_client = APIClient()
-            result, error = api_client.predict_delivery(codigo_postal, sku_id, cantidad, fecha_str)
-
-            if result:
-                st.write("✅ Análisis completado exitosamente")
-                status.update(label="✅ Análisis Completado", state="complete", expanded=False)
+def build_fecha_compra() -> str:
+    """Fecha y hora de compra capturadas en el formulario, en el formato del API"""
+    fecha_hora_compra = datetime.combine(st.session_state.fecha_compra, st.session_state.hora_compra)
+    return fecha_hora_compra.strftime("%Y-%m-%dT%H:%M:%S")
 
-                st.session_state.prediction_data = result
-                st.session_state.show_results = True
 
-                render_success_summary(result)
-                st.balloons()
-                st.rerun()
-
-            else:
-                st.write("❌ Error en el procesamiento")
-                status.update(label="❌ Error en Análisis", state="error", expanded=False)
-                st.error(f"🚫 {error}")
-                render_error_guidance(error)
+def process_prediction(codigo_postal: str, sku_id: str, cantidad: int):
+    """Enviar la predicción como trabajo en segundo plano y mostrar su avance"""
+    try:
+        fecha_str = build_fecha_compra()
+
+        reset_revalidation_state()
+        if Config.SWR_ENABLED:
+            serve_stale_prediction(codigo_postal, sku_id, cantidad, fecha_str)
+
+        trace = Trace("prediccion", {"codigo_postal": codigo_postal, "sku_id": sku_id, "cantidad": cantidad})
+        job_id = prediction_jobs.submit(current_session_id(), codigo_postal, sku_id, cantidad, fecha_str, trace=trace)
+        pendiente = st.session_state.get('prediction_job')
+        if pendiente and pendiente["id"] == job_id:
+            # Doble envío: se sigue mostrando la predicción que ya estaba en curso
+            st.toast("⏳ Esa predicción ya está en curso")
+        else:
+            st.session_state.prediction_error = None
+            st.session_state.prediction_job = {
+                "id": job_id,
+                "codigo_postal": codigo_postal,
+                "sku_id": sku_id,
+                "cantidad": cantidad,
+                "trace": trace,
+            }
+        # Respuestas en cache o muy rápidas se muestran en este mismo rerun, sin esperar al sondeo
+        job = prediction_jobs.get(current_session_id(), job_id)
+        if job is not None:
+            wait([job.future], timeout=Config.PREDICTION_INLINE_WAIT_SECONDS)
+        render_prediction_job()
 
     except Exception as e:
         st.error(f"❌ Error crítico del sistema: {str(e)}")
         st.info("💼 Contacte al equipo de soporte técnico para asistencia inmediata.")
 
 
+def render_prediction_job():
+    """Avance de la predicción en curso; la sesión queda libre mientras el backend responde"""
+    _poll_prediction_job()
+    if st.button("✖️ Cancelar predicción", key="cancel_prediction_job"):
+        prediction_jobs.cancel(current_session_id(), "user")
+        st.session_state.prediction_job = None
+        st.rerun()
+
+
+@st.fragment(run_every=Config.PREDICTION_POLL_SECONDS)
+def _poll_prediction_job():
+    """Refrescar las fases del trabajo y mostrar el resultado al terminar"""
+    pendiente = st.session_state.get('prediction_job')
+    if not pendiente:
+        return
+    job = prediction_jobs.get(current_session_id(), pendiente["id"])
+    if job is None:
+        # Cancelado desde otra vía o el proceso se reinició
+        st.session_state.prediction_job = None
+        st.rerun()
+
+    avance = job.snapshot()
+    with st.status(avance["label"], expanded=True) as status:
+        for fase in avance["completed"]:
+            st.write(f"{fase['label']} · {format_seconds(fase['duration_s'])}")
+        if not avance["done"]:
+            st.write(f"{avance['label']}... {format_seconds(avance['phase_elapsed_s'])}")
+            return
+
+        st.session_state.prediction_job = None
+        prediction_jobs.forget(current_session_id(), job.id)
+        complete_prediction_job(pendiente, job.future.result(), status)
+
+
+def complete_prediction_job(pendiente: dict, respuesta: tuple, status):
+    """Guardar el resultado del trabajo (o su error) y relanzar la app"""
+    result, error = respuesta
+    trace = pendiente["trace"]
+    solicitud = {k: pendiente[k] for k in ("codigo_postal", "sku_id", "cantidad")}
+    with activate(trace):
+        if result:
+            with span("normalize_dates"):
+                result = normalize_response_dates(result)
+
+    if result:
+        status.update(label="✅ Análisis Completado", state="complete", expanded=False)
+        st.session_state.prediction_data = result
+        st.session_state.show_results = True
+        st.session_state.history_entry_id = prediction_history.add(current_session_id(), solicitud, result)
+        # El rerun de resultados completa la traza con los spans del dashboard
+        st.session_state.active_trace = trace
+
+        render_success_summary(result)
+        st.balloons()
+        st.rerun()
+
+    trace.finish(error=error)
+    if backend_health.is_down() and Config.HEALTH_WHEN_DOWN == "queue":
+        status.update(label="⏳ Backend sin conexión: predicción en espera", state="error", expanded=False)
+        queue_prediction(**solicitud)
+        st.rerun()
+    status.update(label="❌ Error en Análisis", state="error", expanded=False)
+    st.session_state.prediction_error = error
+    st.rerun()
+
+
+def render_prediction_error():
+    """Error de la última predicción (se muestra una sola vez)"""
+    error = st.session_state.prediction_error
+    st.session_state.prediction_error = None
+    st.error(f"🚫 {error}")
+    render_error_guidance(error)
+
+
+def reset_revalidation_state():
+    """Cancelar la revalidación y olvidar los cambios de la predicción anterior"""
+    cancel_revalidation()
+    st.session_state.swr_changes = None
+    st.session_state.swr_error = None
+
+
+def serve_stale_prediction(codigo_postal: str, sku_id: str, cantidad: int, fecha_str: str):
+    """
+    Stale-while-revalidate: si hay una respuesta conocida con más de SWR_REVALIDATE_AFTER_SECONDS,
+    mostrarla de inmediato y revalidar en segundo plano. Sin respuesta conocida no hace nada.
+    """
+    api_client = APIClient()
+    stale, age_s = api_client.get_cached_prediction(codigo_postal, sku_id, cantidad, fecha_str)
+    if stale is None or age_s < Config.SWR_REVALIDATE_AFTER_SECONDS:
+        return
+
+    request = {"codigo_postal": codigo_postal, "sku_id": sku_id, "cantidad": cantidad}
+    st.session_state.prediction_data = normalize_response_dates(stale)
+    st.session_state.show_results = True
+    st.session_state.history_entry_id = prediction_history.add(current_session_id(), request, stale)
+    token = CancelToken()
+    st.session_state.swr_refresh = {
+        "future": api_client.refresh_prediction(codigo_postal, sku_id, cantidad, fecha_str, cancel_token=token),
+        "token": token,
+        "entry_id": st.session_state.history_entry_id,
+        "stored_at": datetime.now().timestamp() - age_s,
+    }
+    st.rerun()
+
+
 def render_success_summary(result: dict):
     """Resumen ejecutivo de éxito"""
     st.markdown("""
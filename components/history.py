@@ -0,0 +1,33 @@
+import streamlit as st
+
+from components.revalidation import cancel_revalidation
+from services.prediction_history import prediction_history
+from utils.helpers import current_session_id
+
+
+def render_prediction_history():
+    """Historial de predicciones de la sesión en la barra lateral (abrir no llama al backend)"""
+    session_id = current_session_id()
+    entries = prediction_history.entries(session_id)
+    if not entries:
+        return
+
+    with st.sidebar:
+        st.markdown("### 🕘 Historial")
+        activa = st.session_state.get('history_entry_id') if st.session_state.show_results else None
+        for entry in entries:
+            etiqueta = (f"{entry.created_at:%H:%M} · CP {entry.codigo_postal} · "
+                        f"{entry.sku_id} ×{entry.cantidad}")
+            if st.button(etiqueta, key=f"history_{entry.entry_id}", use_container_width=True,
+                         type="primary" if entry.entry_id == activa else "secondary"):
+                result = prediction_history.open(session_id, entry.entry_id)
+                if result is None:
+                    st.warning("⚠️ Esta predicción ya no está disponible en el historial")
+                    return
+                st.session_state.prediction_data = result
+                st.session_state.show_results = True
+                st.session_state.history_entry_id = entry.entry_id
+                cancel_revalidation()
+                st.session_state.swr_changes = None
+                st.session_state.swr_error = None
+                st.rerun()
@@ -1,6 +1,9 @@
 import streamlit as st
 from pathlib import Path
 from config.settings import Config
+from components.revalidation import cancel_revalidation
+from services.prediction_jobs import prediction_jobs
+from utils.helpers import current_session_id
 
 
 def setup_page_config():
@@ -152,5 +155,18 @@ def render_back_button():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col1:
         if st.button("← Volver al Formulario", key="back_button"):
+            prediction_jobs.cancel(current_session_id(), "back")
+            cancel_revalidation()
             st.session_state.show_results = False
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+
+def render_tool_navigation(tools: list) -> str:
+    """Renderizar navegación lateral entre herramientas"""
+    with st.sidebar:
+        st.markdown("### 🧰 Herramientas")
+        return st.radio(
+            "Herramienta",
+            tools,
+            label_visibility="collapsed",
+            key="tool_nav"
+        )
@@ -0,0 +1,236 @@
+import json
+
+import pandas as pd
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from config.settings import Config
+
+
+def is_performance_mode() -> bool:
+    """Panel de performance activo por configuración o con ?perf=1"""
+    return Config.PERF_PANEL_ENABLED or st.query_params.get("perf") == "1"
+
+
+def is_profiling_requested() -> bool:
+    """
+    cProfile de un solo rerun, pedido con ?profile=1 o con el botón del panel de performance.
+    El pedido se consume al leerlo: los reruns siguientes corren sin perfilar.
+    """
+    if st.query_params.get("profile") == "1":
+        del st.query_params["profile"]
+        return True
+    return st.session_state.pop("cprofile_next", False)
+
+
+def _request_profile():
+    st.session_state.cprofile_next = True
+
+
+def is_memory_mode() -> bool:
+    """tracemalloc del rerun por configuración, con ?mem=1 o con el toggle del panel de performance"""
+    return (Config.MEMORY_MODE_ENABLED or st.query_params.get("mem") == "1"
+            or st.session_state.get("memory_toggle", False))
+
+
+def render_performance_panel(profiler):
+    """Panel oculto con tiempos por función del último rerun"""
+    if profiler is None:
+        return
+
+    with st.expander("⚙️ Performance", expanded=False):
+        st.button("🔬 Perfilar el próximo rerun con cProfile", key="cprofile_button", on_click=_request_profile)
+        st.toggle("🧠 Medir memoria con tracemalloc", key="memory_toggle")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("⏱️ Rerun", f"{profiler.total_s * 1000:,.1f} ms")
+        with col2:
+            st.metric("🧩 Elementos Emitidos", profiler.elements)
+        with col3:
+            st.metric("🔧 Funciones Medidas", len(profiler.functions))
+        with col4:
+            st.metric("📄 Página", profiler.page)
+
+        rows = profiler.rows()
+        if not rows:
+            st.info("Sin funciones instrumentadas en este rerun")
+            return
+
+        df_perf = pd.DataFrame([
+            {
+                "Función": row["function"],
+                "Llamadas": row["calls"],
+                "Total (ms)": row["total_s"] * 1000,
+                "Propio (ms)": row["self_s"] * 1000,
+                "Elementos": row["elements"],
+            }
+            for row in rows
+        ])
+        st.dataframe(
+            df_perf,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Total (ms)": st.column_config.NumberColumn(format="%.2f"),
+                "Propio (ms)": st.column_config.NumberColumn(format="%.2f"),
+            }
+        )
+
+        st.markdown("##### 🔥 Desglose por llamada")
+        st_echarts(build_waterfall_chart(profiler.spans, "Tiempo (ms)"),
+                   height=f"{max(240, 22 * min(len(profiler.spans), Config.PERF_CHART_SPANS) + 80)}px",
+                   key="perf_waterfall")
+
+
+def render_profile_report(report: dict):
+    """Top de funciones por tiempo acumulado y propio del último rerun perfilado (sigue visible después)"""
+    if not report:
+        return
+
+    with st.expander(f"🔬 cProfile del Rerun ({report['total_ms']:,.0f} ms · {report['timestamp']})", expanded=False):
+        column_config = {
+            "Propio (ms)": st.column_config.NumberColumn(format="%.2f"),
+            "Acumulado (ms)": st.column_config.NumberColumn(format="%.2f"),
+        }
+        tab_cumulative, tab_self = st.tabs(["📚 Tiempo Acumulado", "🎯 Tiempo Propio"])
+        for tab, rows in ((tab_cumulative, report["top_cumulative"]), (tab_self, report["top_self"])):
+            with tab:
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            "Función": row["function"],
+                            "Llamadas": row["calls"],
+                            "Propio (ms)": row["self_ms"],
+                            "Acumulado (ms)": row["cumulative_ms"],
+                        }
+                        for row in rows
+                    ]),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config=column_config
+                )
+
+        nombre = f"rerun_{report['timestamp'].replace(':', '')}"
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("⬇️ Descargar .prof", report["prof"], file_name=f"{nombre}.prof",
+                               mime="application/octet-stream", help="Compatible con pstats, snakeviz y gprof2dot")
+        with col2:
+            st.download_button("⬇️ Descargar stacks colapsados", report["collapsed"], file_name=f"{nombre}.folded",
+                               mime="text/plain", help="Entrada para flamegraph.pl o speedscope")
+
+
+def render_memory_report(report: dict):
+    """Sitios de asignación, tamaño por clave de la sesión y diff contra el rerun anterior"""
+    if not report:
+        return
+
+    with st.expander(f"🧠 Memoria del Rerun ({report['traced_current_kb'] / 1024:,.1f} MB · {report['timestamp']})",
+                     expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📦 Memoria Trazada", f"{report['traced_current_kb'] / 1024:,.1f} MB")
+        with col2:
+            st.metric("📈 Pico", f"{report['traced_peak_kb'] / 1024:,.1f} MB")
+        with col3:
+            st.metric("🗂️ Sesión", f"{report['session_total_kb']:,.1f} KB")
+        if report["traced_sessions"] > 1:
+            st.caption(f"⚠️ {report['traced_sessions']} sesiones con modo memoria: los diffs incluyen sus asignaciones.")
+
+        kb_config = {
+            column: st.column_config.NumberColumn(format="%.1f")
+            for column in ("KB", "Δ KB")
+        }
+        tab_top, tab_rerun, tab_previous, tab_session = st.tabs([
+            "🔝 Top Asignaciones", "🔄 Δ Durante el Rerun", "🕳️ Δ vs Rerun Anterior", "🗂️ Session State"
+        ])
+        with tab_top:
+            st.dataframe(pd.DataFrame([
+                {"Sitio": row["site"], "KB": row["size_kb"], "Bloques": row["count"]}
+                for row in report["top_allocations"]
+            ]), use_container_width=True, hide_index=True, column_config=kb_config)
+        for tab, rows in ((tab_rerun, report["rerun_diff"]), (tab_previous, report["previous_rerun_diff"])):
+            with tab:
+                if not rows:
+                    st.info("Sin crecimiento (o sin snapshot previo de esta sesión)")
+                    continue
+                st.dataframe(pd.DataFrame([
+                    {"Sitio": row["site"], "Δ KB": row["size_diff_kb"], "Δ Bloques": row["count_diff"],
+                     "KB": row["size_kb"]}
+                    for row in rows
+                ]), use_container_width=True, hide_index=True, column_config=kb_config)
+        with tab_session:
+            st.dataframe(pd.DataFrame([
+                {"Clave": row["key"], "KB": row["size_kb"]} for row in report["session_state"]
+            ]), use_container_width=True, hide_index=True, column_config=kb_config)
+
+        st.download_button(
+            "⬇️ Descargar JSON", json.dumps(report, ensure_ascii=False, indent=2),
+            file_name=f"memoria_{report['timestamp'].replace(':', '')}.json", mime="application/json"
+        )
+
+
+def render_trace_waterfall(trace):
+    """Waterfall de la traza de la última predicción (solicitud, decodificación y render)"""
+    if trace is None:
+        return
+
+    with st.expander("🧭 Traza de la Predicción", expanded=False):
+        spans = trace.waterfall_spans()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("🆔 Trace ID", trace.trace_id[:12])
+        with col2:
+            st.metric("⏱️ Duración Total", f"{max(s['start_ms'] + s['duration_ms'] for s in spans):,.1f} ms")
+        with col3:
+            st.metric("🧩 Spans", len(spans))
+
+        st_echarts(build_waterfall_chart(spans, "Tiempo desde el envío (ms)"),
+                   height=f"{max(240, 22 * min(len(spans), Config.PERF_CHART_SPANS) + 80)}px",
+                   key="trace_waterfall")
+        st.caption(f"Exportada en formato OTLP/JSON a `{Config.TRACE_LOG_PATH}`")
+
+
+def build_waterfall_chart(spans: list, x_label: str) -> dict:
+    """
+    Gráfico tipo flame/waterfall: una barra por span, desplazada por su inicio
+    y con sangría según su profundidad.
+    """
+    spans = sorted(spans, key=lambda span: span["start_ms"])[:Config.PERF_CHART_SPANS]
+    labels = [f"{'  ' * span['depth']}{span['name']}" for span in spans]
+    colores = ["#1e40af", "#3b82f6", "#0ea5e9", "#10b981", "#f59e0b", "#8b5cf6"]
+
+    return {
+        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
+        "grid": {"left": 280, "right": 30, "top": 20, "bottom": 40},
+        "xAxis": {"type": "value", "name": x_label, "nameLocation": "middle", "nameGap": 25},
+        "yAxis": {
+            "type": "category",
+            "inverse": True,
+            "data": labels,
+            "axisLabel": {"fontSize": 10, "fontFamily": "monospace"}
+        },
+        "series": [
+            {
+                "name": "Inicio",
+                "type": "bar",
+                "stack": "span",
+                "silent": True,
+                "itemStyle": {"color": "transparent"},
+                "data": [round(span["start_ms"], 3) for span in spans]
+            },
+            {
+                "name": "Duración",
+                "type": "bar",
+                "stack": "span",
+                "data": [
+                    {
+                        "value": round(span["duration_ms"], 3),
+                        "itemStyle": {"color": colores[span["depth"] % len(colores)]}
+                    }
+                    for span in spans
+                ]
+            }
+        ]
+    }
@@ -0,0 +1,220 @@
+import time as time_module
+from datetime import datetime, timedelta, time
+
+import pandas as pd
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from components.layout import render_header
+from components.forms import render_section_header, validate_form_inputs
+from config.settings import Config
+from services.api_client import APIClient
+from utils.dates import dates_to_arrow, parse_iso_datetime
+from utils.helpers import summarize_prediction
+
+FECHA_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+CALENDAR_METRICS = {
+    "📅 Días de Promesa": ("lag_dias", "días", ["#10b981", "#f59e0b", "#ef4444"]),
+    "💰 Costo de Envío": ("costo", "MXN", ["#dbeafe", "#3b82f6", "#1e40af"]),
+}
+
+
+def render_promise_calendar():
+    """Herramienta: evolución de la promesa de entrega en los próximos días"""
+    render_header(
+        "🗓️ Calendario de Promesa",
+        "Cómo evolucionan fecha promesa, costo y probabilidad según el día de compra"
+    )
+
+    col1, col2 = st.columns([1, 1], gap="large")
+
+    with col1:
+        render_section_header("📍", "Destino y Producto", "CP, SKU y cantidad a evaluar")
+        codigo_postal = st.text_input("Código Postal", placeholder="76000", key="calendar_cp")
+        sku_id = st.text_input("SKU", placeholder="LIV-001", key="calendar_sku")
+        cantidad = st.number_input("Cantidad", min_value=1, max_value=Config.MAX_QUANTITY, value=1,
+                                   key="calendar_qty")
+
+    with col2:
+        render_section_header("⏰", "Periodo", "Primer día, hora de compra y número de días")
+        fecha_inicio = st.date_input("Primer día de compra", value=datetime.now().date(), key="calendar_fecha")
+        hora = st.time_input("Hora de compra", value=time(11, 0), step=timedelta(minutes=15), key="calendar_hora")
+        dias = st.slider("Días a evaluar", min_value=7, max_value=Config.CALENDAR_MAX_DAYS,
+                         value=Config.CALENDAR_DEFAULT_DAYS, key="calendar_dias")
+
+    placeholder = st.empty()
+
+    if st.button("🗓️ Generar Calendario", type="primary", key="calendar_btn"):
+        if validate_form_inputs(codigo_postal, sku_id):
+            st.session_state.calendar_result = run_calendar_predictions(
+                codigo_postal, sku_id, int(cantidad), datetime.combine(fecha_inicio, hora), dias, placeholder
+            )
+
+    calendar_result = st.session_state.get('calendar_result')
+    if calendar_result:
+        with placeholder.container():
+            render_calendar_results(calendar_result, final=True)
+
+
+def run_calendar_predictions(codigo_postal: str, sku_id: str, cantidad: int, inicio: datetime, dias: int,
+                             placeholder) -> dict:
+    """Lanzar las predicciones por día en paralelo y pintar conforme llegan"""
+    payloads = [
+        APIClient.build_payload(codigo_postal, sku_id, cantidad, (inicio + timedelta(days=i)).strftime(FECHA_FORMAT))
+        for i in range(dias)
+    ]
+    calendar_result = {
+        'inicio': inicio,
+        'dias': dias,
+        'rows': [None] * dias,
+    }
+
+    ultimo_render = 0.0
+    completados = 0
+    for index, result, error in APIClient().predict_many(payloads):
+        calendar_result['rows'][index] = _build_calendar_row(payloads[index], result, error)
+        completados += 1
+
+        # Repintar como máximo cada CALENDAR_REFRESH_SECONDS para no saturar el frontend
+        ahora = time_module.monotonic()
+        if completados == dias or ahora - ultimo_render >= Config.CALENDAR_REFRESH_SECONDS:
+            ultimo_render = ahora
+            with placeholder.container():
+                st.progress(completados / dias, text=f"📡 {completados}/{dias} días calculados")
+                # Clave única por repintado: dos repintados con los mismos datos chocarían en el mismo rerun
+                render_calendar_results(calendar_result, final=False, heatmap_key=f"calendar_heatmap_{completados}")
+
+    return calendar_result
+
+
+def _build_calendar_row(payload: dict, result: dict, error: str) -> dict:
+    """Fila del calendario a partir de una respuesta"""
+    fecha_compra = parse_iso_datetime(payload['fecha_compra'])
+    resumen = summarize_prediction(result) if result else {}
+    fecha_entrega = resumen.get('fecha_entrega')
+    return {
+        'fecha_compra': fecha_compra,
+        'fecha_entrega': fecha_entrega,
+        'lag_dias': (fecha_entrega.date() - fecha_compra.date()).days if fecha_entrega else None,
+        'tipo_entrega': resumen.get('tipo_entrega'),
+        'costo': resumen.get('costo'),
+        'probabilidad': resumen.get('probabilidad'),
+        'evento': resumen.get('evento'),
+        'error': error,
+    }
+
+
+def render_calendar_results(calendar_result: dict, final: bool, heatmap_key: str = "calendar_heatmap"):
+    """Renderizar heatmap de calendario y tabla de detalle"""
+    rows = [row for row in calendar_result['rows'] if row]
+    if not rows:
+        return
+
+    validas = [row for row in rows if not row['error']]
+    if final:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("📆 Días Evaluados", f"{len(rows)}/{calendar_result['dias']}")
+        with col2:
+            lags = [row['lag_dias'] for row in validas if row['lag_dias'] is not None]
+            st.metric("📅 Promesa Mín-Máx", f"{min(lags)} - {max(lags)} días" if lags else "N/A")
+        with col3:
+            costos = [row['costo'] for row in validas if row['costo'] is not None]
+            st.metric("💰 Costo Mín-Máx", f"${min(costos):,.0f} - ${max(costos):,.0f}" if costos else "N/A")
+        with col4:
+            eventos = {row['evento'] for row in validas if row['evento'] and row['evento'] != 'Normal'}
+            st.metric("🎉 Eventos Detectados", len(eventos))
+
+        errores = [row for row in rows if row['error']]
+        if errores:
+            st.warning(f"⚠️ {len(errores)} días sin predicción: {errores[0]['error']}")
+
+    metrica = st.radio("Métrica", list(CALENDAR_METRICS), horizontal=True, key="calendar_metric") \
+        if final else next(iter(CALENDAR_METRICS))
+    st_echarts(_build_calendar_heatmap(calendar_result, validas, metrica), height="260px",
+               key=heatmap_key)
+
+    if final:
+        with st.expander("📋 Detalle por Día", expanded=False):
+            df_calendar = pd.DataFrame([
+                {
+                    'Fecha Compra': row['fecha_compra'],
+                    'Fecha Entrega': row['fecha_entrega'],
+                    'Días': row['lag_dias'],
+                    'Tipo Entrega': row['tipo_entrega'] or 'N/A',
+                    'Costo ($)': row['costo'],
+                    'Probabilidad': row['probabilidad'],
+                    'Evento': row['evento'] or 'N/A',
+                    'Error': row['error'] or '',
+                }
+                for row in rows
+            ])
+            df_calendar = dates_to_arrow(df_calendar, ['Fecha Compra', 'Fecha Entrega'])
+            st.dataframe(
+                df_calendar,
+                use_container_width=True,
+                column_config={
+                    'Fecha Compra': st.column_config.DatetimeColumn('Fecha Compra', format="ddd DD/MM/YYYY"),
+                    'Fecha Entrega': st.column_config.DatetimeColumn('Fecha Entrega', format="ddd DD/MM/YYYY"),
+                    'Probabilidad': st.column_config.NumberColumn('Probabilidad', format="percent"),
+                }
+            )
+
+
+def _build_calendar_heatmap(calendar_result: dict, rows: list, metrica: str) -> dict:
+    """Configuración ECharts de heatmap tipo calendario"""
+    campo, unidad, colores = CALENDAR_METRICS[metrica]
+    inicio = calendar_result['inicio'].date()
+    fin = inicio + timedelta(days=calendar_result['dias'] - 1)
+
+    data = [
+        [row['fecha_compra'].strftime('%Y-%m-%d'), row[campo], row['evento'] or 'Normal']
+        for row in rows if row[campo] is not None
+    ]
+    valores = [item[1] for item in data] or [0]
+
+    return {
+        "tooltip": {"position": "top"},
+        "visualMap": {
+            "min": min(valores),
+            "max": max(max(valores), min(valores) + 1),
+            "calculable": True,
+            "orient": "horizontal",
+            "left": "center",
+            "bottom": 0,
+            "text": [unidad, ""],
+            "inRange": {"color": colores}
+        },
+        "calendar": {
+            "range": [inicio.strftime('%Y-%m-%d'), fin.strftime('%Y-%m-%d')],
+            "orient": "horizontal",
+            "cellSize": ["auto", 28],
+            "top": 40,
+            "left": 40,
+            "right": 20,
+            "dayLabel": {"firstDay": 1, "nameMap": ["D", "L", "M", "M", "J", "V", "S"]},
+            "monthLabel": {"nameMap": MESES},
+            "yearLabel": {"show": False},
+            "itemStyle": {"borderColor": "#e2e8f0"}
+        },
+        "series": [{
+            "type": "heatmap",
+            "coordinateSystem": "calendar",
+            "data": data,
+            "label": {"show": True, "fontSize": 10, "color": "#1e293b"}
+        }, {
+            # Marcador de días con evento detectado (factores_externos.evento_detectado)
+            "type": "scatter",
+            "name": "Evento",
+            "coordinateSystem": "calendar",
+            "data": [[item[0], item[2]] for item in data if item[2] != 'Normal'],
+            "symbol": "pin",
+            "symbolSize": 14,
+            "symbolOffset": [10, -8],
+            "itemStyle": {"color": "#8b5cf6"},
+            "tooltip": {"formatter": "{c}"}
+        }]
+    }
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, time
+
+import pandas as pd
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from components.layout import render_header
+from components.forms import render_section_header, validate_form_inputs
+from config.settings import Config
+from services.quantity_sweep import QuantitySweep
+
+
+def render_quantity_sensitivity():
+    """Herramienta: a partir de qué cantidad el pedido se divide o consolida"""
+    render_header(
+        "📦 Sensibilidad por Cantidad",
+        "Detección automática de las cantidades donde cambia el tipo de respuesta y las tiendas origen"
+    )
+
+    col1, col2 = st.columns([1, 1], gap="large")
+
+    with col1:
+        render_section_header("📍", "Destino y Producto", "CP y SKU a evaluar")
+        codigo_postal = st.text_input("Código Postal", placeholder="76000", key="sweep_cp")
+        sku_id = st.text_input("SKU", placeholder="LIV-001", key="sweep_sku")
+
+    with col2:
+        render_section_header("📊", "Rango de Cantidades", f"Hasta {Config.MAX_QUANTITY} unidades")
+        cantidad_min, cantidad_max = st.slider(
+            "Cantidades", min_value=1, max_value=Config.MAX_QUANTITY, value=(1, Config.MAX_QUANTITY),
+            key="sweep_rango"
+        )
+        col_fecha, col_hora = st.columns(2)
+        with col_fecha:
+            fecha = st.date_input("Fecha de compra", value=datetime.now().date(), key="sweep_fecha")
+        with col_hora:
+            hora = st.time_input("Hora", value=time(11, 0), step=timedelta(minutes=15), key="sweep_hora")
+
+    if st.button("📈 Ejecutar Barrido", type="primary", key="sweep_btn"):
+        if validate_form_inputs(codigo_postal, sku_id):
+            sweep = QuantitySweep(
+                codigo_postal, sku_id, datetime.combine(fecha, hora).strftime("%Y-%m-%dT%H:%M:%S"),
+                cantidad_min=cantidad_min, cantidad_max=cantidad_max
+            )
+            with st.spinner("📈 Barriendo cantidades..."):
+                points = sweep.run()
+            st.session_state.sweep_result = {
+                'points': points,
+                'change_points': sweep.change_points(),
+                'rounds': sweep.rounds,
+                'rango': (cantidad_min, cantidad_max),
+            }
+
+    if st.session_state.get('sweep_result'):
+        render_sweep_results(st.session_state.sweep_result)
+
+
+def render_sweep_results(sweep_result: dict):
+    """Renderizar puntos de cambio y gráfico escalonado"""
+    points = sweep_result['points']
+    validos = [p for p in points if not p['error']]
+    cantidad_min, cantidad_max = sweep_result['rango']
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📡 Cantidades Consultadas", len(points),
+                  delta=f"de {cantidad_max - cantidad_min + 1} posibles", delta_color="off")
+    with col2:
+        st.metric("🔁 Rondas de Refinamiento", sweep_result['rounds'])
+    with col3:
+        st.metric("🔀 Puntos de Cambio", len(sweep_result['change_points']))
+    with col4:
+        split = next((p for p in validos if p['tipo_respuesta'] == 'multiple_delivery_dates'), None)
+        st.metric("✂️ División desde", f"{split['cantidad']} uds" if split else "Sin división")
+
+    if not validos:
+        st.error(f"🚫 {points[0]['error'] if points else 'Sin resultados'}")
+        return
+
+    for cambio in sweep_result['change_points']:
+        antes, despues = cambio['antes'], cambio['despues']
+        detalle = f" — {despues['split_reason']}" if despues['split_reason'] else ""
+        st.info(
+            f"🔀 Entre **{antes['cantidad']}** y **{despues['cantidad']}** unidades: "
+            f"{antes['tipo_respuesta']} ({len(antes['tiendas'])} tiendas) → "
+            f"{despues['tipo_respuesta']} ({len(despues['tiendas'])} tiendas){detalle}"
+        )
+
+    st_echarts(_build_sweep_chart(validos, sweep_result['change_points']), height="420px", key="sweep_chart")
+
+    with st.expander("📋 Cantidades Evaluadas", expanded=False):
+        df_points = pd.DataFrame([
+            {
+                'Cantidad': p['cantidad'],
+                'Tipo Respuesta': p['tipo_respuesta'] or 'N/A',
+                'Costo ($)': p['costo'],
+                'Probabilidad': p['probabilidad'],
+                'Tiendas Origen': len(p['tiendas']),
+                'Consolidación': '✅' if p['consolidation_available'] else '❌',
+                'Error': p['error'] or '',
+            }
+            for p in points
+        ])
+        st.dataframe(
+            df_points,
+            use_container_width=True,
+            column_config={'Probabilidad': st.column_config.NumberColumn('Probabilidad', format="percent")}
+        )
+
+
+def _build_sweep_chart(points: list, change_points: list) -> dict:
+    """Gráfico escalonado de costo, probabilidad y tiendas origen contra cantidad"""
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"data": ["Costo", "Probabilidad", "Tiendas Origen"], "top": 0},
+        "grid": {"left": 70, "right": 120, "top": 40, "bottom": 50},
+        "xAxis": {"type": "value", "name": "Cantidad", "nameLocation": "middle", "nameGap": 30,
+                  "min": points[0]['cantidad'], "max": points[-1]['cantidad']},
+        "yAxis": [
+            {"type": "value", "name": "Costo ($)", "position": "left"},
+            {"type": "value", "name": "Prob.", "position": "right", "min": 0, "max": 1},
+            {"type": "value", "name": "Tiendas", "position": "right", "offset": 55, "minInterval": 1},
+        ],
+        "series": [
+            {
+                "name": "Costo",
+                "type": "line",
+                "step": "end",
+                "yAxisIndex": 0,
+                "data": [[p['cantidad'], p['costo']] for p in points],
+                "itemStyle": {"color": "#1e40af"},
+                "markLine": {
+                    "symbol": "none",
+                    "lineStyle": {"color": "#ef4444", "type": "dashed"},
+                    "label": {"formatter": "{c}"},
+                    "data": [{"xAxis": cambio['despues']['cantidad']} for cambio in change_points]
+                }
+            },
+            {
+                "name": "Probabilidad",
+                "type": "line",
+                "step": "end",
+                "yAxisIndex": 1,
+                "data": [[p['cantidad'], p['probabilidad']] for p in points],
+                "itemStyle": {"color": "#10b981"}
+            },
+            {
+                "name": "Tiendas Origen",
+                "type": "line",
+                "step": "end",
+                "yAxisIndex": 2,
+                "data": [[p['cantidad'], len(p['tiendas'])] for p in points],
+                "itemStyle": {"color": "#f59e0b"}
+            },
+        ]
+    }
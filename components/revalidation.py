@@ -0,0 +1,75 @@
+import time
+
+import streamlit as st
+
+from config.settings import Config
+from services.prediction_history import prediction_history
+from utils.dates import normalize_response_dates
+from utils.helpers import current_session_id, diff_predictions
+
+
+def _age_label(stored_at: float) -> str:
+    minutos = int((time.time() - stored_at) // 60)
+    return "hace menos de 1 min" if minutos < 1 else f"hace {minutos} min"
+
+
+def cancel_revalidation():
+    """Cancelar la revalidación en curso de la sesión (al volver, reenviar o abrir el historial)"""
+    swr = st.session_state.get('swr_refresh')
+    if swr is not None:
+        swr["token"].cancel()
+    st.session_state.swr_refresh = None
+
+
+def render_revalidation_status():
+    """Badge de antigüedad mientras se revalida y campos que cambiaron al llegar la respuesta fresca"""
+    if st.session_state.get('swr_refresh') is not None:
+        _poll_revalidation()
+
+    fallo = st.session_state.get('swr_error')
+    if fallo:
+        st.warning(f"⚠️ No se pudo actualizar ({fallo['error']}). Mostrando datos de {_age_label(fallo['stored_at'])}.")
+
+    cambios = st.session_state.get('swr_changes')
+    if cambios:
+        filas = "".join(
+            f"<li><strong>{c['campo']}</strong>: <s>{c['antes']}</s> → "
+            f"<mark style='background: #fef08a; padding: 0 4px; border-radius: 4px;'>{c['ahora']}</mark></li>"
+            for c in cambios
+        )
+        st.markdown(f"""
+        <div style='background: #fffbeb; border: 1px solid #f59e0b; border-radius: 8px; padding: 0.75rem 1rem; margin-bottom: 1rem;'>
+            <strong>🔄 Datos actualizados: {len(cambios)} cambio(s) respecto a lo mostrado</strong>
+            <ul style='margin: 0.5rem 0 0 0;'>{filas}</ul>
+        </div>
+        """, unsafe_allow_html=True)
+    elif cambios == []:
+        st.caption("✅ Datos confirmados por el backend: sin cambios")
+
+
+@st.fragment(run_every=Config.SWR_POLL_SECONDS)
+def _poll_revalidation():
+    """Revisar la revalidación en curso; al terminar reemplaza el response y relanza la app"""
+    swr = st.session_state.get('swr_refresh')
+    if swr is None:
+        return
+
+    if not swr["future"].done():
+        st.markdown(f"""
+        <div style='display: inline-block; background: #f1f5f9; color: #475569; border-radius: 999px;
+                    padding: 0.25rem 0.75rem; font-size: 0.85rem; margin-bottom: 0.5rem;'>
+            🕒 Datos de {_age_label(swr['stored_at'])} · actualizando…
+        </div>
+        """, unsafe_allow_html=True)
+        return
+
+    result, error = swr["future"].result()
+    st.session_state.swr_refresh = None
+    if result:
+        fresco = normalize_response_dates(result)
+        st.session_state.swr_changes = diff_predictions(st.session_state.prediction_data, fresco)
+        st.session_state.prediction_data = fresco
+        prediction_history.replace(current_session_id(), swr["entry_id"], fresco)
+    else:
+        st.session_state.swr_error = {"error": error, "stored_at": swr["stored_at"]}
+    st.rerun()
@@ -4,6 +4,159 @@ class Config:
     API_PREDICT_ENDPOINT = "/api/v1/fee/predict"
     API_TIMEOUT = 30
 
+    # Zona horaria para fechas del backend sin offset
+    TIMEZONE = "America/Mexico_City"
+
+    # Concurrency & Response Cache
+    API_MAX_CONCURRENCY = 8
+    RESPONSE_CACHE_TTL = 600  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = 512
+
+    # Admission Control (process-wide limits toward the backend, tune per deployment)
+    ADMISSION_ENABLED = True
+    ADMISSION_RATE_PER_SECOND = 20.0  # token bucket refill; 0 disables the rate limit
+    ADMISSION_BURST = 40
+    ADMISSION_MAX_IN_FLIGHT = API_MAX_CONCURRENCY
+    ADMISSION_MAX_QUEUE = 64  # waiting requests beyond this are rejected at once
+    ADMISSION_QUEUE_TIMEOUT = 20  # seconds
+    # Weighted fair share of free slots between lanes (interactive = form, background = SWR/prefetch/warm-up,
+    # bulk = batches, calendars and sweeps)
+    ADMISSION_LANE_WEIGHTS = {"interactive": 8, "background": 2, "bulk": 1}
+    ADMISSION_INTERACTIVE_RESERVED = 1  # in-flight slots only interactive requests may take
+    ADMISSION_INTERACTIVE_RESERVED_TOKENS = 4  # rate tokens other lanes never drain from the bucket
+
+    # Prediction Jobs (form predictions run in background, per session, cancelled when the session moves on)
+    PREDICTION_WORKERS = 32  # shared by every session of the process; extra jobs wait in the executor
+    PREDICTION_POLL_SECONDS = 0.5  # progress refresh while a job runs
+    PREDICTION_INLINE_WAIT_SECONDS = 0.15  # cached/fast answers render in the submitting rerun
+    PREDICTION_REAP_SECONDS = 5  # how often jobs of disconnected sessions are cancelled
+
+    # Idempotency (double-submit suppression per session and a key header for backend dedupe)
+    IDEMPOTENCY_HEADER = "Idempotency-Key"
+    IDEMPOTENCY_WINDOW_SECONDS = 30  # same payload within the window shares its key
+
+    # Backend Health Probing (fail fast or queue submissions while the backend is down)
+    HEALTH_ENABLED = True
+    HEALTH_ENDPOINT = "/health"  # any HTTP status below 500 counts as reachable
+    HEALTH_INTERVAL_SECONDS = 10
+    HEALTH_DOWN_INTERVAL_SECONDS = 3  # probe faster while down to notice recovery
+    HEALTH_TIMEOUT = 2
+    HEALTH_DEGRADED_LATENCY_MS = 1500
+    HEALTH_FAILURES_TO_DOWN = 2  # consecutive connection failures
+    HEALTH_WHEN_DOWN = "queue"  # "queue" retries automatically on recovery, "fail" rejects at once
+    HEALTH_QUEUE_POLL_SECONDS = 2.0
+    HEALTH_QUEUE_MAX_WAIT_SECONDS = 300
+
+    # Negative Cache (short-lived 4xx results, e.g. unknown SKU or CP)
+    NEGATIVE_CACHE_TTL = 120  # seconds
+    NEGATIVE_CACHE_MAX_ENTRIES = 2048
+    NEGATIVE_CACHE_STATUSES = (400, 404, 422)
+
+    # Local Catalogs (optional, one CP / SKU per line; unset disables the check)
+    CATALOG_CP_PATH = None
+    CATALOG_SKU_PATH = None
+    CATALOG_BLOOM_ERROR_RATE = 0.001
+
+    # Disk Response Cache (SQLite WAL, shared by every worker process on the host)
+    DISK_CACHE_ENABLED = True
+    DISK_CACHE_PATH = ".cache/responses.sqlite3"
+    DISK_CACHE_TTL = 3600  # seconds
+    DISK_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    DISK_CACHE_BUSY_TIMEOUT = 5  # seconds waiting on another process' write lock
+    DISK_CACHE_COMPRESSION_LEVEL = 6
+    DISK_CACHE_EVICT_EVERY = 50  # writes between eviction passes
+    DISK_CACHE_WARM_ENTRIES = 128  # hottest keys loaded into memory at startup
+    DISK_CACHE_WARM_WINDOW = 3600  # only keys accessed within this many seconds
+
+    # Stale-While-Revalidate (cached response shown at once, refreshed in background)
+    SWR_ENABLED = True
+    SWR_MAX_STALENESS_SECONDS = 3600  # oldest cached response shown instead of waiting
+    SWR_REVALIDATE_AFTER_SECONDS = 60  # younger responses are served without a refresh
+    SWR_POLL_SECONDS = 1.0
+    SWR_MAX_REFRESHES = 4
+
+    # Cache Warm-up (opt-in per deployment: hot CP/SKU combos fetched in background for the current
+    # 15-min slot). Off by default so local, benchmark and test processes never call the backend on their own.
+    WARMUP_ENABLED = False
+    WARMUP_COMBOS = [  # (codigo_postal, sku_id, cantidad); add top sellers here
+        ("76000", "LIV-001", 1), ("76000", "LIV-004", 1),
+        ("05050", "LIV-001", 1), ("05050", "LIV-004", 1),
+        ("44100", "LIV-001", 1), ("44100", "LIV-004", 1),
+        ("64000", "LIV-001", 1), ("64000", "LIV-004", 1),
+    ]
+    WARMUP_SLOTS_AHEAD = 1  # also warm the next slot(s) the form will default to
+    WARMUP_SCHEDULE_SECONDS = 900  # re-warm at each wall-clock slot start (TTL is shorter); None runs once
+    WARMUP_MAX_CONCURRENCY = 2  # well below API_MAX_CONCURRENCY, leaves room for users
+    WARMUP_RATE_PER_SECOND = 2.0
+
+    # Speculative Prefetch (opt-in: predict in background once the form inputs are valid)
+    PREFETCH_ENABLED = False
+    PREFETCH_DEBOUNCE_SECONDS = 0.8
+    PREFETCH_MAX_PER_SESSION = 10  # speculative backend calls per session
+    PREFETCH_MAX_CONCURRENCY = 2  # process-wide
+    PREFETCH_MAX_SESSIONS = 4096
+    PREFETCH_SESSION_TTL = 3600  # seconds
+
+    # Prediction History (per-session ring buffer of zlib-compressed responses)
+    HISTORY_SIZE = 10
+    HISTORY_MAX_BYTES = 32 * 1024 * 1024  # process-wide cap, idle sessions evicted first
+    HISTORY_IDLE_SECONDS = 1800
+    HISTORY_COMPRESSION_LEVEL = 6
+
+    # Cutoff Finder
+    CUTOFF_STEP_MINUTES = 15
+    CUTOFF_COARSE_PROBES_PER_DAY = 8
+    CUTOFF_PROBE_RETRIES = 2  # extra attempts on timeouts/connection errors before a probe counts as unknown
+    CUTOFF_MAX_FAILED_PROBES = 3  # failed probes tolerated while looking for a known midpoint
+    CUTOFF_PROBE_RETRY_DELAY = 0.5  # seconds, grows linearly per attempt
+
+    # Promise Calendar
+    CALENDAR_DEFAULT_DAYS = 14
+    CALENDAR_MAX_DAYS = 30
+    CALENDAR_REFRESH_SECONDS = 0.5
+
+    # Quantity Sweep
+    SWEEP_COARSE_POINTS = 9
+    SWEEP_COST_TOLERANCE = 0.15  # relative cost step (in both total and unit cost) that triggers refinement
+
+    # Multi-SKU Cart
+    CART_MAX_LINES = 20
+
+    # Performance Instrumentation
+    PERF_PANEL_ENABLED = False  # also enabled per session with ?perf=1
+    PERF_LOG_PATH = "logs/render_metrics.jsonl"
+    PERF_MAX_SPANS = 2000
+    PERF_CHART_SPANS = 150
+    PROFILE_TOP_N = 25  # cProfile of one rerun with ?profile=1 (off by default)
+    MEMORY_MODE_ENABLED = False  # tracemalloc around each rerun; also per session with ?mem=1
+    MEMORY_TRACE_FRAMES = 1  # frames stored per allocation (more frames, more overhead)
+    MEMORY_TOP_N = 20
+    MEMORY_MAX_SESSIONS = 8  # previous-rerun snapshots kept for leak diffs
+    MEMORY_SESSION_IDLE_SECONDS = 300  # tracing stops once no memory-mode session reran within this window
+
+    # Background Sampling Profiler (opt-in, flamegraph-ready .folded files)
+    SAMPLER_ENABLED = False
+    SAMPLER_INTERVAL_MS = 20
+    SAMPLER_DIR = "logs/profiles"
+    SAMPLER_FLUSH_SECONDS = 60
+    SAMPLER_MAX_STACKS = 5000  # distinct stacks kept per flush window
+    SAMPLER_MAX_DEPTH = 64
+    SAMPLER_MAX_FILES = 48
+    SAMPLER_MAX_OVERHEAD = 0.01  # sampling interval doubles above this CPU fraction, halves back below half of it
+
+    # Prometheus Metrics (one snapshot file per worker, merged on export)
+    METRICS_ENABLED = True
+    METRICS_DIR = "logs/metrics"
+    METRICS_FLUSH_SECONDS = 15
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = None  # e.g. 9464 to serve /metrics from the first worker that binds it
+    METRICS_SESSION_IDLE_SECONDS = 300
+    METRICS_SESSION_SAMPLE_SECONDS = 30
+
+    # Tracing (OTLP/JSON lines, no collector required)
+    TRACE_LOG_PATH = "logs/traces.jsonl"
+    TRACE_SERVICE_NAME = "logistica-front"
+
     # App Configuration
     APP_TITLE = "Logistics Intelligence Platform"
     APP_ICON = "📊"
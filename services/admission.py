@@ -0,0 +1,204 @@
+"""
+Control de admisión de requests hacia el backend, compartido por todo el proceso.
+
+Combina tres límites configurables por despliegue:
+  - un token bucket de requests por segundo (`ADMISSION_RATE_PER_SECOND`, ráfagas de
+    hasta `ADMISSION_BURST`),
+  - un máximo de requests en vuelo (`ADMISSION_MAX_IN_FLIGHT`),
+  - colas FIFO acotadas (`ADMISSION_MAX_QUEUE`) con tiempo máximo de espera.
+
+Hay una cola por carril de prioridad: "interactive" (el formulario), "background"
+(revalidación, prefetch, precalentamiento) y "bulk" (lotes, calendarios, barridos).
+Cada lugar libre se reparte entre los carriles con espera según sus pesos
+(`ADMISSION_LANE_WEIGHTS`, stride scheduling) y `ADMISSION_INTERACTIVE_RESERVED`
+lugares quedan solo para el carril interactivo. El token del bucket se toma en el
+mismo reparto, antes de ocupar el lugar, y los otros carriles no bajan el bucket de
+`ADMISSION_INTERACTIVE_RESERVED_TOKENS`: un clic nunca espera detrás de los lotes
+encolados, ni por un lugar ni por un token.
+
+Quien espera puede recibir su posición en su cola para mostrarla en la UI.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config.settings import Config
+from services.metrics import observe_admission, set_admission_queue_depth
+
+LANE_INTERACTIVE = "interactive"
+LANE_BACKGROUND = "background"
+LANE_BULK = "bulk"
+
+
+class AdmissionRejected(Exception):
+    """La cola está llena, se agotó el tiempo de espera o el request se canceló"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Token bucket sin espera propia: quien lo usa decide cuándo reintentar"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, reserve: float = 0) -> bool:
+        """Tomar un token solo si después quedan al menos `reserve`"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1 + reserve:
+                return False
+            self._tokens -= 1
+            return True
+
+    def time_until(self, reserve: float = 0) -> float:
+        """Segundos hasta que `try_acquire(reserve)` pueda tener éxito"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1 + reserve - self._tokens) / self.rate)
+
+
+class AdmissionController:
+    """Semáforo de requests en vuelo con colas por carril, reparto ponderado y token bucket"""
+
+    def __init__(self, max_in_flight: int = Config.ADMISSION_MAX_IN_FLIGHT, max_queue: int = Config.ADMISSION_MAX_QUEUE,
+                 rate_per_second: float = Config.ADMISSION_RATE_PER_SECOND, burst: int = Config.ADMISSION_BURST,
+                 queue_timeout: float = Config.ADMISSION_QUEUE_TIMEOUT, weights: dict = None,
+                 interactive_reserved: int = Config.ADMISSION_INTERACTIVE_RESERVED,
+                 interactive_reserved_tokens: int = Config.ADMISSION_INTERACTIVE_RESERVED_TOKENS):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.weights = dict(weights or Config.ADMISSION_LANE_WEIGHTS)
+        # Los carriles no interactivos nunca ocupan los lugares reservados (pero siempre tienen al menos uno)
+        self.shared_limit = min(max_in_flight, max(1, max_in_flight - interactive_reserved))
+        self.bucket = TokenBucket(rate_per_second, burst) if rate_per_second else None
+        # Tokens que solo el carril interactivo puede gastar (los demás siempre pueden tomar al menos uno)
+        self.token_reserve = min(interactive_reserved_tokens, self.bucket.capacity - 1) if self.bucket else 0
+        self.in_flight = 0
+        self._queues = {lane: deque() for lane in self.weights}  # tickets en orden de llegada por carril
+        self._pass = {lane: 0.0 for lane in self.weights}
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+
+    def queue_depth(self, lane: str = None) -> int:
+        with self._cond:
+            if lane is not None:
+                return len(self._queues[lane])
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _lane_has_room(self, lane: str) -> bool:
+        limit = self.max_in_flight if lane == LANE_INTERACTIVE else self.shared_limit
+        return self.in_flight < limit
+
+    def _token_reserve(self, lane: str) -> int:
+        return 0 if lane == LANE_INTERACTIVE else self.token_reserve
+
+    def _lane_ready(self, lane: str) -> bool:
+        if not self._lane_has_room(lane):
+            return False
+        return self.bucket is None or self.bucket.time_until(self._token_reserve(lane)) == 0
+
+    def _next_ticket(self):
+        """Ticket a admitir: la cabeza del carril con cupo, token y menor pase (empate: orden de los pesos)"""
+        candidatos = [lane for lane, queue in self._queues.items() if queue and self._lane_ready(lane)]
+        if not candidatos:
+            return None
+        return self._queues[min(candidatos, key=lambda lane: self._pass[lane])][0]
+
+    def _wait_seconds(self, lane: str, restante: float) -> float:
+        """Cuánto dormir antes de revisar de nuevo: los tokens se reponen sin que nadie avise"""
+        espera = min(restante, 0.5)
+        if self.bucket is not None and self._lane_has_room(lane):
+            espera = min(espera, max(0.001, self.bucket.time_until(self._token_reserve(lane))))
+        return espera
+
+    def _acquire_slot(self, lane: str, deadline: float, on_wait, is_cancelled):
+        ticket = object()
+        queue = self._queues[lane]
+        with self._cond:
+            if len(queue) >= self.max_queue:
+                raise AdmissionRejected(
+                    f"🚦 Backend saturado: {len(queue)} solicitudes en espera. Intente en unos segundos.",
+                    "rejected"
+                )
+            if not queue:
+                # Un carril que vuelve a tener espera no acumula crédito por el tiempo que estuvo vacío
+                self._pass[lane] = max(self._pass[lane], self._virtual_time)
+            queue.append(ticket)
+            set_admission_queue_depth(lane, len(queue))
+
+        posicion_reportada = None
+        try:
+            while True:
+                with self._cond:
+                    if self._next_ticket() is ticket and (
+                            self.bucket is None or self.bucket.try_acquire(self._token_reserve(lane))):
+                        queue.popleft()
+                        self.in_flight += 1
+                        self._virtual_time = self._pass[lane]
+                        self._pass[lane] += 1 / self.weights[lane]
+                        set_admission_queue_depth(lane, len(queue))
+                        self._cond.notify_all()
+                        return
+                    if is_cancelled is not None and is_cancelled():
+                        raise AdmissionRejected("🛑 Solicitud cancelada mientras esperaba en cola.", "cancelled")
+                    restante = deadline - time.monotonic()
+                    if restante <= 0:
+                        raise AdmissionRejected("⏳ Tiempo de espera en cola agotado. El backend está saturado.",
+                                                "timeout")
+                    posicion = queue.index(ticket) + 1
+                    if posicion == posicion_reportada:
+                        self._cond.wait(self._wait_seconds(lane, restante))
+                        continue
+                if on_wait is not None:
+                    on_wait(posicion)
+                posicion_reportada = posicion
+        except BaseException:
+            with self._cond:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    set_admission_queue_depth(lane, len(queue))
+                    self._cond.notify_all()
+            raise
+
+    def _release_slot(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, lane: str = LANE_INTERACTIVE, on_wait=None, timeout: float = None, is_cancelled=None):
+        """
+        Reservar un lugar para un request del carril `lane`. `on_wait(posicion)` se llama cada vez
+        que cambia la posición en la cola; `is_cancelled()` permite abandonar la espera.
+        Lanza AdmissionRejected si la cola está llena, se agota la espera o se cancela.
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Carril de admisión desconocido: {lane}")
+        inicio = time.monotonic()
+        deadline = inicio + (self.queue_timeout if timeout is None else timeout)
+        try:
+            self._acquire_slot(lane, deadline, on_wait, is_cancelled)
+        except AdmissionRejected as e:
+            observe_admission(e.reason, time.monotonic() - inicio, lane)
+            raise
+        try:
+            observe_admission("admitted", time.monotonic() - inicio, lane)
+            yield
+        finally:
+            self._release_slot()
+
+
+admission_controller = AdmissionController()
@@ -1,6 +1,53 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
 import requests
 import streamlit as st
+
 from config.settings import Config
+from services.metrics import observe_prediction
+from services.admission import LANE_BACKGROUND, LANE_BULK, LANE_INTERACTIVE, AdmissionRejected, admission_controller
+from services.cancellation import CancelToken, CancellableHTTPAdapter
+from services.catalog import catalog_errors
+from services.health import backend_health
+from services.response_cache import response_cache, negative_cache, canonical_request_key, idempotency_key
+from utils.tracing import span, trace_headers, SPAN_KIND_CLIENT
+
+# Sesión HTTP compartida: reutiliza conexiones entre reruns y entre hilos (requests cancelables)
+_http_session = requests.Session()
+_http_session.mount("http://", CancellableHTTPAdapter(pool_connections=1, pool_maxsize=Config.API_MAX_CONCURRENCY))
+_http_session.mount("https://", CancellableHTTPAdapter(pool_connections=1, pool_maxsize=Config.API_MAX_CONCURRENCY))
+
+CANCELLED_MESSAGE = "🛑 Predicción cancelada."
+TIMEOUT_MESSAGE = "⏰ Tiempo de espera agotado. El servidor tardó demasiado en responder."
+CONNECTION_ERROR_MESSAGE = "🔌 Error de conexión. Verifique que el servidor esté disponible."
+# Fallas que pueden no repetirse; catálogo, 4xx o fail-fast fallarían igual al reintentar
+TRANSIENT_ERRORS = (TIMEOUT_MESSAGE, CONNECTION_ERROR_MESSAGE)
+
+# Revalidaciones en segundo plano (stale-while-revalidate): sobreviven al rerun que las lanza
+_refresh_executor = ThreadPoolExecutor(max_workers=Config.SWR_MAX_REFRESHES, thread_name_prefix="swr-refresh")
+_refreshes_in_flight = {}  # clave canónica -> {"future", "token", "waiters"}
+_refreshes_lock = threading.Lock()
+
+
+def _forget_refresh(key: str, refresh: dict):
+    with _refreshes_lock:
+        if _refreshes_in_flight.get(key) is refresh:
+            del _refreshes_in_flight[key]
+
+
+def _release_refresh(key: str, refresh: dict):
+    """Quien esperaba la revalidación ya no la quiere; sin nadie más esperando, abortarla"""
+    with _refreshes_lock:
+        refresh["waiters"] -= 1
+        if refresh["waiters"] > 0:
+            return
+        if _refreshes_in_flight.get(key) is refresh:
+            del _refreshes_in_flight[key]
+    refresh["future"].cancel()  # si aún no empezó, nunca llega a correr
+    refresh["token"].cancel()
 
 
 class APIClient:
@@ -8,33 +55,183 @@ class APIClient:
         self.base_url = Config.API_BASE_URL
         self.timeout = Config.API_TIMEOUT
 
-    def predict_delivery(self, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str):
-        """
-        Realizar predicción de entrega
-        """
-        url = f"{self.base_url}{Config.API_PREDICT_ENDPOINT}"
-        payload = {
+    @staticmethod
+    def build_payload(codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str) -> dict:
+        """Construir el payload del endpoint de predicción"""
+        return {
             "codigo_postal": codigo_postal,
             "sku_id": sku_id,
             "cantidad": cantidad,
             "fecha_compra": fecha_compra
         }
 
+    def fetch_prediction(self, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str,
+                         use_cache: bool = True, on_queue=None, lane: str = LANE_INTERACTIVE,
+                         cancel_token=None, on_phase=None, idempotency: str = None):
+        """
+        Obtener predicción sin elementos de UI (seguro para hilos en segundo plano).
+        `lane` es el carril de prioridad en el control de admisión; `on_queue(posicion)` se
+        llama mientras el request espera en su cola. `cancel_token` (CancelToken) permite
+        abortar la espera en cola o el request en curso y `on_phase(fase)` recibe "backend"
+        al enviar el request y "decoding" al leer la respuesta. `idempotency` fija la clave de
+        idempotencia enviada al backend (por omisión se deriva del payload y la ventana actual).
+        """
+        url = f"{self.base_url}{Config.API_PREDICT_ENDPOINT}"
+        payload = self.build_payload(codigo_postal, sku_id, cantidad, fecha_compra)
+        cache_key = canonical_request_key(payload)
+
+        # CP o SKU inexistentes en los catálogos locales: se rechazan sin llamar al backend
+        errores_catalogo = catalog_errors(codigo_postal, sku_id)
+        if errores_catalogo:
+            return None, " · ".join(errores_catalogo)
+
+        if use_cache:
+            negative = negative_cache.get(cache_key)
+            if negative is not None:
+                return None, negative
+
+            with span("api.cache_lookup") as cache_span:
+                cached = response_cache.get(cache_key)
+                if cache_span is not None:
+                    cache_span["attributes"]["cache.hit"] = cached is not None
+            if cached is not None:
+                return cached, None
+
+        # Backend caído según el sondeo: fallar al instante en vez de esperar el timeout
+        if backend_health.is_down():
+            observe_prediction("fail_fast", 0.0, lane)
+            return None, "🔴 Backend sin conexión. La predicción no se envió para no esperar el timeout."
+
+        if cancel_token is not None and cancel_token.cancelled:
+            return None, CANCELLED_MESSAGE
+
+        inicio = time.perf_counter()
+        outcome = "success"
         try:
-            with st.spinner("🔮 Procesando predicción..."):
-                response = requests.post(url, json=payload, timeout=self.timeout)
+            is_cancelled = (lambda: cancel_token.cancelled) if cancel_token is not None else None
+            admission = (admission_controller.slot(lane, on_wait=on_queue, is_cancelled=is_cancelled)
+                         if Config.ADMISSION_ENABLED else nullcontext())
+            cancellable = cancel_token.bound() if cancel_token is not None else nullcontext()
+            request_span_cm = span("api.request", SPAN_KIND_CLIENT, **{"http.method": "POST", "http.url": url})
+            with admission, cancellable, request_span_cm as request_span:
+                if on_phase is not None:
+                    on_phase("backend")
+                # El backend puede deduplicar reintentos y dobles envíos del mismo request
+                headers = dict(trace_headers(), **{Config.IDEMPOTENCY_HEADER: idempotency or idempotency_key(payload)})
+                response = _http_session.post(url, json=payload, timeout=self.timeout, headers=headers)
+                if request_span is not None:
+                    request_span["attributes"]["http.status_code"] = response.status_code
+            backend_health.report_reachable(server_error=response.status_code >= 500)
 
-                if response.status_code == 200:
-                    return response.json(), None
-                else:
-                    error_msg = f"Error {response.status_code}: {response.text}"
-                    return None, error_msg
+            if response.status_code == 200:
+                if on_phase is not None:
+                    on_phase("decoding")
+                with span("api.decode", **{"response.bytes": len(response.content)}):
+                    result = response.json()
+                response_cache.set(cache_key, result)
+                return result, None
+            else:
+                outcome = "http_error"
+                error_msg = f"Error {response.status_code}: {response.text}"
+                if response.status_code in Config.NEGATIVE_CACHE_STATUSES:
+                    negative_cache.set(cache_key, error_msg)
+                return None, error_msg
 
-        except requests.exceptions.Timeout:
-            return None, "⏰ Tiempo de espera agotado. El servidor tardó demasiado en responder."
+        except AdmissionRejected as e:
+            outcome = "cancelled" if e.reason == "cancelled" else "admission_rejected"
+            return None, str(e)
+        except requests.exceptions.Timeout as e:
+            outcome = "timeout"
+            if isinstance(e, requests.exceptions.ConnectTimeout):
+                backend_health.report_failure("ConnectTimeout")
+            else:
+                # El backend aceptó el request: una predicción lenta no es una caída
+                backend_health.report_slow("ReadTimeout")
+            return None, TIMEOUT_MESSAGE
         except requests.exceptions.ConnectionError:
-            return None, "🔌 Error de conexión. Verifique que el servidor esté disponible."
+            if cancel_token is not None and cancel_token.cancelled:
+                # Nosotros cerramos el socket: no es una falla del backend
+                outcome = "cancelled"
+                return None, CANCELLED_MESSAGE
+            outcome = "connection_error"
+            backend_health.report_failure("ConnectionError")
+            return None, CONNECTION_ERROR_MESSAGE
         except requests.exceptions.RequestException as e:
+            outcome = "request_error"
             return None, f"🚫 Error de solicitud: {str(e)}"
         except Exception as e:
-            return None, f"❌ Error inesperado: {str(e)}"
\ No newline at end of file
+            outcome = "unexpected_error"
+            return None, f"❌ Error inesperado: {str(e)}"
+        finally:
+            observe_prediction(outcome, time.perf_counter() - inicio, lane)
+
+    def get_cached_prediction(self, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str,
+                              max_age: float = Config.SWR_MAX_STALENESS_SECONDS):
+        """Última respuesta conocida aunque esté vencida: (response, antigüedad en segundos) o (None, None)"""
+        payload = self.build_payload(codigo_postal, sku_id, cantidad, fecha_compra)
+        result, stored_at = response_cache.get_entry(canonical_request_key(payload), max_age)
+        if result is None:
+            return None, None
+        return result, time.time() - stored_at
+
+    def refresh_prediction(self, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str,
+                           cancel_token=None):
+        """
+        Revalidar contra el backend en segundo plano (sin cache). Devuelve un Future con
+        (resultado, error); las revalidaciones de la misma clave en curso se comparten.
+        Cancelar `cancel_token` retira a quien llama; el request se aborta cuando ya
+        nadie lo espera.
+        """
+        key = canonical_request_key(self.build_payload(codigo_postal, sku_id, cantidad, fecha_compra))
+        with _refreshes_lock:
+            refresh = _refreshes_in_flight.get(key)
+            if refresh is None:
+                token = CancelToken()
+                refresh = {"future": None, "token": token, "waiters": 0}
+                refresh["future"] = _refresh_executor.submit(
+                    self.fetch_prediction, codigo_postal, sku_id, cantidad, fecha_compra, use_cache=False,
+                    lane=LANE_BACKGROUND, cancel_token=token
+                )
+                _refreshes_in_flight[key] = refresh
+            refresh["waiters"] += 1
+        # Fuera del lock: si ya terminó, el callback corre en este mismo hilo
+        refresh["future"].add_done_callback(lambda _: _forget_refresh(key, refresh))
+        if cancel_token is not None:
+            cancel_token.on_cancel(lambda: _release_refresh(key, refresh))
+        return refresh["future"]
+
+    def predict_delivery(self, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str, on_queue=None):
+        """
+        Realizar predicción de entrega
+        """
+        with st.spinner("🔮 Procesando predicción..."):
+            return self.fetch_prediction(codigo_postal, sku_id, cantidad, fecha_compra, on_queue=on_queue)
+
+    def predict_many(self, payloads: list, max_workers: int = Config.API_MAX_CONCURRENCY, lane: str = LANE_BULK):
+        """
+        Ejecutar varias predicciones en paralelo con un pool acotado, en el carril `lane`.
+        Los payloads repetidos se consultan una sola vez.
+        Genera (índice, resultado, error) conforme van terminando.
+        """
+        if not payloads:
+            return
+
+        indices_por_clave = {}
+        for index, payload in enumerate(payloads):
+            indices_por_clave.setdefault(canonical_request_key(payload), []).append(index)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(indices_por_clave)))) as executor:
+            futures = {}
+            for key, indices in indices_por_clave.items():
+                payload = payloads[indices[0]]
+                future = executor.submit(
+                    self.fetch_prediction,
+                    payload["codigo_postal"], payload["sku_id"], payload["cantidad"], payload["fecha_compra"],
+                    lane=lane
+                )
+                futures[future] = indices
+
+            for future in as_completed(futures):
+                result, error = future.result()
+                for index in futures[future]:
+                    yield index, result, error
@@ -0,0 +1,105 @@
+"""
+Precalentamiento del cache de respuestas con las combinaciones más consultadas.
+
+Si el despliegue lo habilita (`WARMUP_ENABLED`, apagado por omisión), al arrancar el
+proceso y al inicio de cada periodo de `WARMUP_SCHEDULE_SECONDS` (por omisión, cada
+franja) consulta en segundo plano las combinaciones (CP, SKU, cantidad) de `WARMUP_COMBOS` para la franja
+de 15 minutos actual y las siguientes, que es la hora que el formulario propone por
+defecto. Usa pocos hilos y un límite de requests por segundo para no competir con el
+tráfico interactivo.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config.settings import Config
+from services.admission import LANE_BACKGROUND
+from services.api_client import APIClient
+from services.metrics import observe_warmup
+from services.response_cache import response_cache, canonical_request_key
+
+SLOT_MINUTES = 15
+
+
+def warmup_payloads(now: datetime = None) -> list:
+    """Payloads a precalentar: cada combinación en la franja actual y las WARMUP_SLOTS_AHEAD siguientes"""
+    now = now or datetime.now()
+    slot = now.replace(minute=(now.minute // SLOT_MINUTES) * SLOT_MINUTES, second=0, microsecond=0)
+    fechas = [
+        (slot + timedelta(minutes=SLOT_MINUTES * i)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(Config.WARMUP_SLOTS_AHEAD + 1)
+    ]
+    return [
+        APIClient.build_payload(codigo_postal, sku_id, cantidad, fecha)
+        for fecha in fechas
+        for codigo_postal, sku_id, cantidad in Config.WARMUP_COMBOS
+    ]
+
+
+def run_warmup(payloads: list = None, max_workers: int = Config.WARMUP_MAX_CONCURRENCY,
+               rate_per_second: float = Config.WARMUP_RATE_PER_SECOND) -> dict:
+    """Consultar los payloads que no estén en cache; devuelve el conteo por resultado"""
+    payloads = warmup_payloads() if payloads is None else payloads
+    conteo = {"warmed": 0, "cached": 0, "error": 0}
+    client = APIClient()
+
+    def warm(payload: dict):
+        result, _ = client.fetch_prediction(
+            payload["codigo_postal"], payload["sku_id"], payload["cantidad"], payload["fecha_compra"],
+            use_cache=False, lane=LANE_BACKGROUND
+        )
+        return "warmed" if result else "error"
+
+    intervalo = 1 / rate_per_second if rate_per_second else 0
+    siguiente = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-warmer") as executor:
+        futures = []
+        for payload in payloads:
+            if response_cache.get_entry(canonical_request_key(payload))[0] is not None:
+                conteo["cached"] += 1
+                observe_warmup("cached")
+                continue
+            # Límite de ritmo: a lo más `rate_per_second` requests nuevos por segundo
+            espera = siguiente - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            siguiente = max(siguiente, time.monotonic()) + intervalo
+            futures.append(executor.submit(warm, payload))
+
+        for future in futures:
+            outcome = future.result()
+            conteo[outcome] += 1
+            observe_warmup(outcome)
+    return conteo
+
+
+def seconds_to_next_run(now: float = None, period: float = None) -> float:
+    """Segundos hasta el siguiente múltiplo de `period` en el reloj: con 900, el inicio de la próxima franja"""
+    now = time.time() if now is None else now
+    period = period or Config.WARMUP_SCHEDULE_SECONDS
+    return period - now % period
+
+
+def _warmer_loop():
+    while True:
+        run_warmup()
+        if not Config.WARMUP_SCHEDULE_SECONDS:
+            return
+        time.sleep(seconds_to_next_run())
+
+
+_warmer_thread = None
+_warmer_lock = threading.Lock()
+
+
+def ensure_cache_warmer():
+    """Lanzar el precalentamiento una sola vez por proceso si está habilitado"""
+    global _warmer_thread
+    if not Config.WARMUP_ENABLED or _warmer_thread is not None:
+        return _warmer_thread
+    with _warmer_lock:
+        if _warmer_thread is None:
+            _warmer_thread = threading.Thread(target=_warmer_loop, name="cache-warmer", daemon=True)
+            _warmer_thread.start()
+    return _warmer_thread
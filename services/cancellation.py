@@ -0,0 +1,115 @@
+"""
+Cancelación de requests HTTP en curso.
+
+`requests` no permite abortar un POST bloqueado esperando la respuesta. El adaptador
+`CancellableHTTPAdapter` registra el socket de cada request en el `CancelToken` activo
+del hilo; `CancelToken.cancel()` lo cierra, el POST falla al instante con
+ConnectionError y urllib3 descarta la conexión, liberando su lugar en el pool.
+"""
+import socket
+import threading
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_active = threading.local()
+
+
+class CancelToken:
+    """Marca de cancelación compartida entre quien lanza un request y el hilo que lo ejecuta"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._sock = None
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> bool:
+        """Cancelar; devuelve False si ya estaba cancelado"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._event.set()
+            sock = self._sock
+            callbacks, self._callbacks = self._callbacks, []
+        if sock is not None:
+            _abort(sock)
+        for callback in callbacks:
+            callback()
+        return True
+
+    def on_cancel(self, callback):
+        """Llamar `callback()` al cancelar (al instante si ya estaba cancelado)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def _attach(self, sock):
+        with self._lock:
+            self._sock = sock
+            cancelled = self._event.is_set()
+        if cancelled:
+            _abort(sock)
+
+    @contextmanager
+    def bound(self):
+        """Asociar el token a los requests que haga este hilo dentro del bloque"""
+        previous = getattr(_active, "token", None)
+        _active.token = self
+        try:
+            yield self
+        finally:
+            _active.token = previous
+            with self._lock:
+                self._sock = None
+
+
+def _abort(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _CancellableConnectionMixin:
+    def getresponse(self, *args, **kwargs):
+        # La petición ya se envió: desde aquí el hilo solo espera al backend
+        token = getattr(_active, "token", None)
+        if token is not None and self.sock is not None:
+            token._attach(self.sock)
+        return super().getresponse(*args, **kwargs)
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter cuyos requests se pueden abortar con un CancelToken"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
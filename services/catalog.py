@@ -0,0 +1,103 @@
+"""
+Validación local opcional contra catálogos de códigos postales y SKUs.
+
+Los CPs (5 dígitos) se guardan como enteros ordenados en un `array('I')` (4 bytes por
+CP) y se buscan con bisect. Los SKUs se cargan en un filtro de Bloom: nunca rechaza un
+SKU que sí está en el catálogo y, ante un falso positivo, el request simplemente llega
+al backend. Sin catálogos configurados no se valida nada.
+"""
+import hashlib
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from config.settings import Config
+
+
+class SortedIntSet:
+    """Conjunto de enteros ordenados en un array compacto con búsqueda binaria"""
+
+    def __init__(self, values):
+        self._values = array("I", sorted(set(values)))
+
+    def __contains__(self, value: int) -> bool:
+        i = bisect_left(self._values, value)
+        return i < len(self._values) and self._values[i] == value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre un bytearray con doble hashing (blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float = Config.CATALOG_BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def normalize_sku(sku_id: str) -> str:
+    return str(sku_id).strip().upper()
+
+
+def _read_lines(path: str) -> list:
+    with open(Path(path), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+_catalogs = None
+_catalogs_lock = threading.Lock()
+
+
+def load_catalogs() -> dict:
+    """Cargar una sola vez por proceso los catálogos configurados (None si no hay o no se pueden leer)"""
+    global _catalogs
+    if _catalogs is not None:
+        return _catalogs
+    with _catalogs_lock:
+        if _catalogs is None:
+            catalogs = {"cp": None, "sku": None}
+            if Config.CATALOG_CP_PATH:
+                try:
+                    catalogs["cp"] = SortedIntSet(int(cp) for cp in _read_lines(Config.CATALOG_CP_PATH) if cp.isdigit())
+                except OSError:
+                    pass
+            if Config.CATALOG_SKU_PATH:
+                try:
+                    skus = _read_lines(Config.CATALOG_SKU_PATH)
+                    bloom = BloomFilter(len(skus))
+                    for sku in skus:
+                        bloom.add(normalize_sku(sku))
+                    catalogs["sku"] = bloom
+                except OSError:
+                    pass
+            _catalogs = catalogs
+    return _catalogs
+
+
+def catalog_errors(codigo_postal: str, sku_id: str) -> list:
+    """Errores de CP o SKU que no existen en los catálogos locales"""
+    catalogs = load_catalogs()
+    errors = []
+    cp = str(codigo_postal).strip()
+    if catalogs["cp"] is not None and cp.isdigit() and int(cp) not in catalogs["cp"]:
+        errors.append(f"📍 El código postal {cp} no existe en el catálogo")
+    if catalogs["sku"] is not None and normalize_sku(sku_id) not in catalogs["sku"]:
+        errors.append(f"📦 El SKU {normalize_sku(sku_id)} no existe en el catálogo")
+    return errors
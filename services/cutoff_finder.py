@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config.settings import Config
+from services.admission import LANE_BULK
+from services.api_client import TRANSIENT_ERRORS, APIClient
+from utils.helpers import summarize_prediction
+
+FECHA_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class CutoffFinder:
+    """
+    Busca las horas de compra en las que cambia la promesa de entrega
+    (fecha_entrega_estimada o tipo_entrega) para un CP/SKU.
+
+    Sondea el rango con pocos puntos en paralelo y después hace búsqueda
+    binaria dentro de cada tramo donde la firma cambia: O(log n) llamadas
+    al backend por frontera. Solo se reintentan las fallas transitorias; un sondeo
+    que sigue fallando queda sin firma: no se sabe qué promesa tiene, así que
+    nunca define una frontera.
+    """
+
+    def __init__(self, codigo_postal: str, sku_id: str, cantidad: int, inicio: datetime, horas: int = 24,
+                 step_minutes: int = Config.CUTOFF_STEP_MINUTES, api_client: APIClient = None):
+        self.codigo_postal = codigo_postal
+        self.sku_id = sku_id
+        self.cantidad = cantidad
+        self.inicio = inicio
+        self.step = timedelta(minutes=step_minutes)
+        self.total_slots = int(horas * 60 // step_minutes)
+        self.api_client = api_client or APIClient()
+        self._probes = {}
+        self._lock = threading.Lock()
+        self.probe_count = 0
+
+    def slot_time(self, slot: int) -> datetime:
+        return self.inicio + self.step * slot
+
+    def probe(self, slot: int) -> dict:
+        """Evaluar un slot (memoizado por instancia y por el cache de respuestas)"""
+        with self._lock:
+            if slot in self._probes:
+                return self._probes[slot]
+
+        fecha = self.slot_time(slot).strftime(FECHA_FORMAT)
+        for intento in range(Config.CUTOFF_PROBE_RETRIES + 1):
+            if intento:
+                time.sleep(Config.CUTOFF_PROBE_RETRY_DELAY * intento)
+            result, error = self.api_client.fetch_prediction(self.codigo_postal, self.sku_id, self.cantidad, fecha,
+                                                             lane=LANE_BULK)
+            if error not in TRANSIENT_ERRORS:
+                break
+        resumen = summarize_prediction(result) if result else {}
+        fecha_entrega = resumen.get('fecha_entrega')
+        probe = {
+            'slot': slot,
+            'fecha_compra': self.slot_time(slot),
+            'fecha_entrega': fecha_entrega,
+            'tipo_entrega': resumen.get('tipo_entrega'),
+            'costo': resumen.get('costo'),
+            'error': error,
+            # None = desconocida: un error transitorio no es un cambio de promesa
+            'firma': None if error else (fecha_entrega.date() if fecha_entrega else None,
+                                         resumen.get('tipo_entrega')),
+        }
+
+        with self._lock:
+            self.probe_count += intento + 1
+            self._probes[slot] = probe
+        return probe
+
+    def _known_probe(self, lo: int, hi: int):
+        """
+        Sondeo con firma más cercano al centro de (lo, hi), o None si no queda ninguno o
+        ya fallaron CUTOFF_MAX_FAILED_PROBES seguidos (un error persistente no recorre el tramo).
+        """
+        mid = (lo + hi) // 2
+        fallidos = 0
+        for distancia in range(hi - lo):
+            for slot in (mid + distancia, mid - distancia):
+                if lo < slot < hi:
+                    probe = self.probe(slot)
+                    if probe['firma'] is not None:
+                        return probe
+                    fallidos += 1
+                    if fallidos >= Config.CUTOFF_MAX_FAILED_PROBES:
+                        return None
+                if distancia == 0:
+                    break
+        return None
+
+    def _bisect(self, lo: int, hi: int) -> list:
+        """Búsqueda binaria de las fronteras entre dos slots con firmas conocidas y distintas"""
+        probe_lo = self.probe(lo)
+        probe_hi = self.probe(hi)
+        while hi - lo > 1:
+            probe_mid = self._known_probe(lo, hi)
+            if probe_mid is None:
+                break  # lo intermedio falló: la frontera queda acotada a (lo, hi)
+            mid = probe_mid['slot']
+            if probe_mid['firma'] == probe_lo['firma']:
+                lo, probe_lo = mid, probe_mid
+            elif probe_mid['firma'] == probe_hi['firma']:
+                hi, probe_hi = mid, probe_mid
+            else:
+                # Una tercera promesa en medio (A→C→B): hay fronteras en ambas mitades
+                return self._bisect(lo, mid) + self._bisect(mid, hi)
+        return [{'antes': probe_lo, 'despues': probe_hi}]
+
+    def find(self, coarse_probes_per_day: int = Config.CUTOFF_COARSE_PROBES_PER_DAY,
+             max_workers: int = Config.API_MAX_CONCURRENCY) -> list:
+        """
+        Encontrar todas las fronteras del rango. Cada tramo grueso con cambio
+        se refina en su propio hilo.
+        """
+        dias = self.total_slots * self.step / timedelta(days=1)
+        coarse_probes = max(2, min(round(coarse_probes_per_day * dias) + 1, self.total_slots + 1))
+        coarse_slots = sorted({round(i * self.total_slots / (coarse_probes - 1)) for i in range(coarse_probes)})
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            coarse = list(executor.map(self.probe, coarse_slots))
+
+            conocidos = [p for p in coarse if p['firma'] is not None]
+            tramos = [
+                (a['slot'], b['slot']) for a, b in zip(conocidos, conocidos[1:])
+                if a['firma'] != b['firma']
+            ]
+            fronteras = [frontera for lista in executor.map(lambda tramo: self._bisect(*tramo), tramos)
+                         for frontera in lista]
+
+        return fronteras
+
+    def probes(self) -> list:
+        """Todos los puntos evaluados, ordenados por hora de compra"""
+        with self._lock:
+            return [self._probes[slot] for slot in sorted(self._probes)]
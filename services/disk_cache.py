@@ -0,0 +1,184 @@
+"""
+Segundo nivel del cache de respuestas: SQLite en modo WAL, compartido por todos los
+procesos de Streamlit del host y persistente entre despliegues.
+
+Los payloads se guardan comprimidos con zlib bajo la clave canónica del request.
+Cada entrada expira por TTL y el archivo se mantiene bajo `DISK_CACHE_MAX_BYTES`
+descartando primero lo expirado y después lo usado hace más tiempo. Cualquier error
+de SQLite se trata como fallo de cache: el request sigue contra el backend.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from config.settings import Config
+from utils.dates import strip_parsed_dates
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses (expires_at);
+"""
+
+
+class DiskCache:
+    """Cache persistente de respuestas en SQLite (WAL), seguro entre hilos y procesos"""
+
+    def __init__(self, path: str = Config.DISK_CACHE_PATH, ttl: int = Config.DISK_CACHE_TTL,
+                 max_bytes: int = Config.DISK_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=Config.DISK_CACHE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get_entry(self, key: str, max_age: float = None, count: bool = True):
+        """
+        (response, created_at) vigente por TTL o, con `max_age`, creado hace menos de `max_age`
+        segundos aunque ya haya expirado (lectura obsoleta). (None, None) si no hay.
+        `count=False` no suma la consulta a hits/misses.
+        """
+        now = time.time()
+        condition, param = ("created_at > ?", now - max_age) if max_age is not None else ("expires_at > ?", now)
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                f"SELECT payload, created_at FROM responses WHERE key = ? AND {condition}", (key, param)
+            ).fetchone()
+            if row is None:
+                if count:
+                    self._count("misses")
+                return None, None
+            conn.execute("UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            value = json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError):
+            self._count("errors")
+            if count:
+                self._count("misses")
+            return None, None
+        if count:
+            self._count("hits")
+        return value, row[1]
+
+    def get(self, key: str):
+        return self.get_entry(key)[0]
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        payload = zlib.compress(
+            json.dumps(strip_parsed_dates(value), ensure_ascii=False, separators=(",", ":"), default=str)
+            .encode("utf-8"),
+            Config.DISK_CACHE_COMPRESSION_LEVEL
+        )
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, created_at, expires_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, COALESCE((SELECT hits FROM responses WHERE key = ?), 0))",
+                (key, payload, len(payload), now, now + self.ttl, now, key)
+            )
+        except sqlite3.Error:
+            self._count("errors")
+            return
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % Config.DISK_CACHE_EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Borrar expirados y, si el total supera max_bytes, los menos usados recientemente"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excedente = total - self.max_bytes
+                acumulado, keys = 0, []
+                for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if acumulado >= excedente:
+                        break
+                    keys.append((key,))
+                    acumulado += size
+                conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+                removed += len(keys)
+            conn.execute("COMMIT")
+            return removed
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._count("errors")
+            return 0
+
+    def hot_entries(self, limit: int, max_age: float = None):
+        """Entradas vigentes más consultadas recientemente (para precalentar la memoria), de menos de `max_age` s"""
+        now = time.time()
+        try:
+            rows = self._connect().execute(
+                "SELECT key, payload, created_at FROM responses WHERE expires_at > ? AND last_access > ? "
+                "AND created_at > ? ORDER BY hits DESC, last_access DESC LIMIT ?",
+                (now, now - Config.DISK_CACHE_WARM_WINDOW, now - max_age if max_age is not None else 0, limit)
+            ).fetchall()
+        except sqlite3.Error:
+            self._count("errors")
+            return []
+        entries = []
+        for key, payload, created_at in rows:
+            try:
+                entries.append((key, json.loads(zlib.decompress(payload)), created_at))
+            except (zlib.error, ValueError):
+                continue
+        return entries
+
+    def stats(self) -> dict:
+        """Estadísticas del proceso (hits/misses) y del archivo compartido (entradas/bytes)"""
+        try:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,138 @@
+"""
+Estado de salud del backend: un hilo por proceso lo sondea cada `HEALTH_INTERVAL_SECONDS`
+con un GET barato y las llamadas reales de `APIClient` también lo alimentan.
+
+Estados: "up" (responde rápido), "degraded" (lento, 5xx, predicciones que agotan el
+timeout o un fallo aislado), "down" (`HEALTH_FAILURES_TO_DOWN` fallos de conexión
+seguidos) y "unknown" antes del primer sondeo. Mientras está "down" y el sondeo está
+activo, las predicciones fallan al instante en lugar de esperar el timeout completo.
+"""
+import threading
+import time
+
+import requests
+
+from config.settings import Config
+from services.metrics import observe_health_probe
+
+STATE_LABELS = {
+    "up": "🟢 Backend disponible",
+    "degraded": "🟡 Backend degradado",
+    "down": "🔴 Backend sin conexión",
+    "unknown": "⚪ Verificando backend",
+}
+
+
+class BackendHealth:
+    """Estado compartido por todo el proceso, seguro para hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = "unknown"
+        self.latency_ms = None
+        self.checked_at = None
+        self.down_since = None
+        self.error = None
+        self.consecutive_failures = 0
+
+    def report_success(self, latency_s: float, server_error: bool = False):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.latency_ms = latency_s * 1000
+            self.checked_at = time.time()
+            self.error = None
+            self.down_since = None
+            slow = self.latency_ms >= Config.HEALTH_DEGRADED_LATENCY_MS
+            self.state = "degraded" if server_error or slow else "up"
+
+    def report_reachable(self, server_error: bool = False):
+        """Señal pasiva de una llamada real: no evalúa latencia (las predicciones tardan por diseño)"""
+        with self._lock:
+            self.consecutive_failures = 0
+            if server_error:
+                self.state = "degraded"
+            elif self.state in ("down", "unknown"):
+                self.state = "up"
+                self.error = None
+                self.down_since = None
+
+    def report_slow(self, error: str):
+        """Una llamada real agotó el timeout de lectura: el backend atiende, pero lento (nunca cuenta como caída)"""
+        with self._lock:
+            self.error = error
+            if self.state != "down":
+                self.state = "degraded"
+
+    def report_failure(self, error: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.checked_at = time.time()
+            self.error = error
+            if self.consecutive_failures >= Config.HEALTH_FAILURES_TO_DOWN:
+                if self.state != "down":
+                    self.down_since = time.time()
+                self.state = "down"
+            elif self.state != "down":
+                self.state = "degraded"
+
+    def is_down(self) -> bool:
+        """Caído según el sondeo; sin hilo de sondeo nunca, porque nada confirmaría la recuperación"""
+        return self.state == "down" and prober_running()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "label": STATE_LABELS[self.state],
+                "latency_ms": self.latency_ms,
+                "checked_at": self.checked_at,
+                "down_since": self.down_since,
+                "error": self.error,
+            }
+
+
+backend_health = BackendHealth()
+
+_probe_session = requests.Session()
+
+
+def probe_once() -> str:
+    """Un sondeo: cualquier respuesta HTTP < 500 cuenta como backend alcanzable"""
+    url = f"{Config.API_BASE_URL}{Config.HEALTH_ENDPOINT}"
+    inicio = time.perf_counter()
+    try:
+        response = _probe_session.get(url, timeout=Config.HEALTH_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        backend_health.report_failure(type(e).__name__)
+    else:
+        backend_health.report_success(time.perf_counter() - inicio, server_error=response.status_code >= 500)
+    observe_health_probe(backend_health.state, time.perf_counter() - inicio)
+    return backend_health.state
+
+
+def _probe_loop():
+    while True:
+        probe_once()
+        # Más seguido tras un fallo para confirmar la caída o detectar la recuperación pronto
+        fallando = backend_health.consecutive_failures > 0
+        time.sleep(Config.HEALTH_DOWN_INTERVAL_SECONDS if fallando else Config.HEALTH_INTERVAL_SECONDS)
+
+
+_prober_thread = None
+_prober_lock = threading.Lock()
+
+
+def prober_running() -> bool:
+    return _prober_thread is not None and _prober_thread.is_alive()
+
+
+def ensure_health_prober():
+    """Arrancar el sondeo una sola vez por proceso si está habilitado"""
+    global _prober_thread
+    if not Config.HEALTH_ENABLED or _prober_thread is not None:
+        return _prober_thread
+    with _prober_lock:
+        if _prober_thread is None:
+            _prober_thread = threading.Thread(target=_probe_loop, name="health-prober", daemon=True)
+            _prober_thread.start()
+    return _prober_thread
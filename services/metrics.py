@@ -0,0 +1,376 @@
+"""
+Métricas en formato Prometheus (texto) sin dependencias externas.
+
+Cada proceso de Streamlit acumula sus métricas en memoria y las vuelca
+periódicamente a `METRICS_DIR/worker_<pid>.json`. Cualquier proceso puede
+fusionar los snapshots de todos los workers vivos del host y publicarlos:
+  - como archivo `METRICS_DIR/metrics.prom` (textfile collector), y/o
+  - en un puerto sidecar (`METRICS_PORT`), atendido por el primer worker que
+    logre abrirlo.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from config.settings import Config
+from services.prediction_history import prediction_history
+from services.response_cache import response_cache, negative_cache
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+RERUN_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Definición de familias: nombre -> (tipo, ayuda, buckets)
+FAMILIES = {
+    "logistica_predict_latency_seconds": (
+        "histogram", "Latencia de predicciones contra el backend por resultado y carril", LATENCY_BUCKETS),
+    "logistica_predict_requests_total": (
+        "counter", "Llamadas al backend por resultado (success, http_error, timeout, fail_fast, ...) y carril", None),
+    "logistica_admission_total": (
+        "counter", "Decisiones del control de admisión por resultado (admitted, rejected, timeout) y carril", None),
+    "logistica_admission_wait_seconds": ("histogram", "Espera en la cola de admisión por resultado y carril", WAIT_BUCKETS),
+    "logistica_admission_queue_depth": ("gauge", "Requests esperando en la cola de admisión por carril", None),
+    "logistica_prediction_cancellations_total": (
+        "counter", "Predicciones en curso canceladas por motivo (resubmit, back, user, disconnect)", None),
+    "logistica_cancel_saved_seconds_total": (
+        "counter", "Tiempo de backend estimado que se ahorró al cancelar (mediana reciente - transcurrido)", None),
+    "logistica_duplicate_submissions_total": (
+        "counter", "Envíos repetidos del formulario unidos a la predicción en curso de la sesión", None),
+    "logistica_response_cache_hits_total": ("counter", "Aciertos del cache de respuestas por nivel", None),
+    "logistica_response_cache_misses_total": ("counter", "Fallos del cache de respuestas por nivel", None),
+    "logistica_response_cache_hit_ratio": ("gauge", "Proporción de aciertos del cache de respuestas por nivel", None),
+    "logistica_negative_cache_hits_total": ("counter", "Requests inválidos respondidos desde el cache negativo", None),
+    "logistica_backend_probe_seconds": ("histogram", "Latencia del sondeo de salud del backend por estado", LATENCY_BUCKETS),
+    "logistica_backend_state": ("gauge", "Workers que ven al backend en cada estado (up, degraded, down)", None),
+    "logistica_active_sessions": ("gauge", "Sesiones con actividad reciente", None),
+    "logistica_rerun_duration_seconds": ("histogram", "Duración de reruns por página", RERUN_BUCKETS),
+    "logistica_session_state_bytes": ("gauge", "Tamaño estimado del session_state de las sesiones activas", None),
+    "logistica_history_entries": ("gauge", "Predicciones guardadas en el historial de sesiones", None),
+    "logistica_history_bytes": ("gauge", "Bytes comprimidos del historial de sesiones", None),
+    "logistica_history_evictions_total": ("counter", "Entradas del historial descartadas por el tope de memoria", None),
+    "logistica_prefetch_total": (
+        "counter", "Prefetch especulativo por resultado (issued, hit, wasted, skipped_cap, skipped_cached)", None),
+    "logistica_warmup_total": ("counter", "Precalentamiento del cache por resultado (warmed, cached, error)", None),
+    "logistica_prefetch_hit_ratio": ("gauge", "Proporción de prefetch emitidos que se aprovecharon", None),
+    "logistica_workers": ("gauge", "Procesos de Streamlit que reportan métricas", None),
+}
+
+
+def _label_key(labels: dict) -> str:
+    return json.dumps(labels or {}, sort_keys=True)
+
+
+class MetricsRegistry:
+    """Registro en memoria del proceso, seguro para hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._collectors = []
+
+    def inc(self, name: str, labels: dict = None, value: float = 1.0):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        buckets = FAMILIES[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.setdefault(key, {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def set_gauge(self, name: str, value: float, labels: dict = None):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def set_counter(self, name: str, value: float, labels: dict = None):
+        """Fijar un contador a partir de un total que se lleva en otro lugar (p. ej. el cache)"""
+        with self._lock:
+            self._counters[(name, _label_key(labels))] = value
+
+    def register_collector(self, collector):
+        """Función llamada en cada snapshot para actualizar métricas derivadas"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception:
+                continue
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "updated_at": time.time(),
+                "counters": [[n, k, v] for (n, k), v in self._counters.items()],
+                "histograms": [[n, k, dict(h, buckets=list(h["buckets"]))] for (n, k), h in self._histograms.items()],
+                "gauges": [[n, k, v] for (n, k), v in self._gauges.items()],
+            }
+
+
+registry = MetricsRegistry()
+
+_sessions_lock = threading.Lock()
+_sessions = {}  # session_id -> {"last_seen", "state_bytes", "sampled_at"}
+
+
+def observe_prediction(outcome: str, seconds: float, lane: str = "interactive"):
+    """Registrar una llamada al backend (outcome coincide con las ramas de APIClient)"""
+    registry.inc("logistica_predict_requests_total", {"outcome": outcome, "lane": lane})
+    registry.observe("logistica_predict_latency_seconds", seconds, {"outcome": outcome, "lane": lane})
+
+
+def observe_prefetch(outcome: str):
+    registry.inc("logistica_prefetch_total", {"outcome": outcome})
+
+
+def observe_warmup(outcome: str):
+    registry.inc("logistica_warmup_total", {"outcome": outcome})
+
+
+def observe_health_probe(state: str, seconds: float):
+    registry.observe("logistica_backend_probe_seconds", seconds, {"state": state})
+    for estado in ("up", "degraded", "down"):
+        registry.set_gauge("logistica_backend_state", 1.0 if estado == state else 0.0, {"state": estado})
+
+
+def observe_admission(outcome: str, wait_seconds: float, lane: str):
+    registry.inc("logistica_admission_total", {"outcome": outcome, "lane": lane})
+    registry.observe("logistica_admission_wait_seconds", wait_seconds, {"outcome": outcome, "lane": lane})
+
+
+def observe_cancellation(reason: str, saved_seconds: float):
+    registry.inc("logistica_prediction_cancellations_total", {"reason": reason})
+    registry.inc("logistica_cancel_saved_seconds_total", {"reason": reason}, saved_seconds)
+
+
+def observe_duplicate_submission():
+    registry.inc("logistica_duplicate_submissions_total")
+
+
+def set_admission_queue_depth(lane: str, depth: int):
+    registry.set_gauge("logistica_admission_queue_depth", depth, {"lane": lane})
+
+
+def observe_rerun(page: str, seconds: float):
+    registry.observe("logistica_rerun_duration_seconds", seconds, {"page": page})
+
+
+def track_session(session_id: str, state_sizer):
+    """
+    Marcar actividad de una sesión. `state_sizer` estima el tamaño del session_state y
+    solo se invoca cada METRICS_SESSION_SAMPLE_SECONDS por sesión.
+    """
+    now = time.time()
+    with _sessions_lock:
+        entry = _sessions.setdefault(session_id, {"last_seen": now, "state_bytes": 0, "sampled_at": 0.0})
+        entry["last_seen"] = now
+        resample = now - entry["sampled_at"] >= Config.METRICS_SESSION_SAMPLE_SECONDS
+        if resample:
+            entry["sampled_at"] = now
+    if resample:
+        size = state_sizer()
+        with _sessions_lock:
+            entry["state_bytes"] = size
+
+
+def _collect_sessions(reg: MetricsRegistry):
+    cutoff = time.time() - Config.METRICS_SESSION_IDLE_SECONDS
+    with _sessions_lock:
+        for session_id in [sid for sid, entry in _sessions.items() if entry["last_seen"] < cutoff]:
+            del _sessions[session_id]
+        reg.set_gauge("logistica_active_sessions", len(_sessions))
+        reg.set_gauge("logistica_session_state_bytes", sum(e["state_bytes"] for e in _sessions.values()))
+
+
+def _collect_cache(reg: MetricsRegistry):
+    stats = response_cache.stats()
+    reg.set_counter("logistica_response_cache_hits_total", stats["hits"], {"tier": "memory"})
+    reg.set_counter("logistica_response_cache_misses_total", stats["misses"], {"tier": "memory"})
+    if "disk" in stats:
+        reg.set_counter("logistica_response_cache_hits_total", stats["disk"]["hits"], {"tier": "disk"})
+        reg.set_counter("logistica_response_cache_misses_total", stats["disk"]["misses"], {"tier": "disk"})
+    reg.set_counter("logistica_negative_cache_hits_total", negative_cache.stats()["hits"])
+
+
+def _collect_history(reg: MetricsRegistry):
+    stats = prediction_history.stats()
+    reg.set_gauge("logistica_history_entries", stats["entries"])
+    reg.set_gauge("logistica_history_bytes", stats["bytes"])
+    reg.set_counter("logistica_history_evictions_total", stats["evictions"])
+
+
+registry.register_collector(_collect_sessions)
+registry.register_collector(_collect_cache)
+registry.register_collector(_collect_history)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _atomic_write(path: Path, content: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_worker_snapshot(metrics_dir: str = Config.METRICS_DIR):
+    """Volcar el snapshot de este proceso a su archivo propio"""
+    directory = Path(metrics_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    _atomic_write(directory / f"worker_{os.getpid()}.json", json.dumps(registry.snapshot()))
+
+
+def load_worker_snapshots(metrics_dir: str = Config.METRICS_DIR) -> list:
+    """Leer snapshots de los workers vivos; elimina los de procesos muertos"""
+    snapshots = []
+    for path in Path(metrics_dir).glob("worker_*.json"):
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(snapshot.get("pid", -1)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            continue
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _format_labels(label_key: str, extra: dict = None) -> str:
+    labels = {**json.loads(label_key), **(extra or {})}
+    if not labels:
+        return ""
+    pairs = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def render_prometheus_text(snapshots: list) -> str:
+    """Fusionar snapshots (suma entre workers) y renderizar en formato de exposición Prometheus"""
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        for name, key, value in snapshot["counters"]:
+            counters[(name, key)] = counters.get((name, key), 0.0) + value
+        for name, key, value in snapshot["gauges"]:
+            gauges[(name, key)] = gauges.get((name, key), 0.0) + value
+        for name, key, hist in snapshot["histograms"]:
+            merged = histograms.setdefault((name, key), {"buckets": [0] * len(hist["buckets"]), "sum": 0.0, "count": 0})
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], hist["buckets"])]
+            merged["sum"] += hist["sum"]
+            merged["count"] += hist["count"]
+
+    # Métricas derivadas del agregado
+    for (name, key), hits in list(counters.items()):
+        if name == "logistica_response_cache_hits_total":
+            misses = counters.get(("logistica_response_cache_misses_total", key), 0.0)
+            gauges[("logistica_response_cache_hit_ratio", key)] = hits / (hits + misses) if hits + misses else 0.0
+    issued = counters.get(("logistica_prefetch_total", _label_key({"outcome": "issued"})), 0.0)
+    prefetch_hits = counters.get(("logistica_prefetch_total", _label_key({"outcome": "hit"})), 0.0)
+    gauges[("logistica_prefetch_hit_ratio", "{}")] = prefetch_hits / issued if issued else 0.0
+    gauges[("logistica_workers", "{}")] = len(snapshots)
+
+    lines = []
+    for name, (kind, help_text, buckets) in FAMILIES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (n, key), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        elif kind == "gauge":
+            for (n, key), value in sorted(gauges.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        else:
+            for (n, key), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                # Los buckets ya son acumulativos (observe suma en todos los límites >= valor)
+                for bound, count in zip(buckets, hist["buckets"]):
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {hist['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(metrics_dir: str = Config.METRICS_DIR) -> str:
+    """Volcar snapshot propio, fusionar el host y escribir metrics.prom"""
+    write_worker_snapshot(metrics_dir)
+    text = render_prometheus_text(load_worker_snapshots(metrics_dir))
+    _atomic_write(Path(metrics_dir) / "metrics.prom", text)
+    return text
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = export_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def _flush_loop():
+    while True:
+        time.sleep(Config.METRICS_FLUSH_SECONDS)
+        try:
+            export_metrics()
+        except OSError:
+            continue
+
+
+def ensure_metrics_exporter():
+    """Arrancar (una vez por proceso) el volcado periódico y, si está configurado, el puerto sidecar"""
+    global _exporter_started
+    if not Config.METRICS_ENABLED or _exporter_started:
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+        if Config.METRICS_PORT:
+            try:
+                server = ThreadingHTTPServer((Config.METRICS_HOST, Config.METRICS_PORT), _MetricsHandler)
+            except OSError:
+                # Otro worker del host ya atiende el puerto; este solo vuelca su snapshot
+                return
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
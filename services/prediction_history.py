@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from config.settings import Config
+from utils.dates import normalize_response_dates, strip_parsed_dates
+
+
+class HistoryEntry:
+    """Predicción guardada: metadatos para listar y el response comprimido con zlib"""
+
+    __slots__ = ("entry_id", "created_at", "codigo_postal", "sku_id", "cantidad", "tipo_respuesta",
+                 "payload", "raw_bytes")
+
+    def __init__(self, entry_id: int, request: dict, result: dict):
+        self.entry_id = entry_id
+        self.created_at = datetime.now()
+        self.codigo_postal = str(request.get("codigo_postal", ""))
+        self.sku_id = str(request.get("sku_id", ""))
+        self.cantidad = int(request.get("cantidad", 0))
+        self.store(result)
+
+    def store(self, result: dict):
+        """Comprimir el response en la entrada"""
+        self.tipo_respuesta = result.get("tipo_respuesta")
+        raw = json.dumps(strip_parsed_dates(result), ensure_ascii=False, separators=(",", ":"), default=str)
+        self.raw_bytes = len(raw.encode("utf-8"))
+        self.payload = zlib.compress(raw.encode("utf-8"), Config.HISTORY_COMPRESSION_LEVEL)
+
+    @property
+    def size(self) -> int:
+        return len(self.payload)
+
+    def load(self) -> dict:
+        """Descomprimir el response (solo al abrir la entrada)"""
+        return normalize_response_dates(json.loads(zlib.decompress(self.payload)))
+
+
+class PredictionHistory:
+    """
+    Historial por sesión (buffer circular de HISTORY_SIZE entradas) con un tope de memoria
+    para todo el proceso. Al superarlo se descarta primero el historial de sesiones
+    inactivas y después las entradas más antiguas de las sesiones usadas hace más tiempo.
+    """
+
+    def __init__(self, size: int = Config.HISTORY_SIZE, max_bytes: int = Config.HISTORY_MAX_BYTES,
+                 idle_seconds: int = Config.HISTORY_IDLE_SECONDS):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._sessions = OrderedDict()  # session_id -> {"entries": deque, "last_seen": float}, LRU primero
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def _touch(self, session_id: str) -> dict:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {"entries": deque(), "last_seen": time.time()}
+        session["last_seen"] = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def add(self, session_id: str, request: dict, result: dict) -> int:
+        """Guardar una predicción en el historial de la sesión; devuelve el id de la entrada"""
+        with self._lock:
+            self._next_id += 1
+            entry = HistoryEntry(self._next_id, request, result)
+            entries = self._touch(session_id)["entries"]
+            entries.appendleft(entry)
+            self.total_bytes += entry.size
+            while len(entries) > self.size:
+                self.total_bytes -= entries.pop().size
+            self._enforce_cap(session_id)
+            return entry.entry_id
+
+    def replace(self, session_id: str, entry_id: int, result: dict) -> bool:
+        """Reemplazar el response de una entrada (p. ej. al llegar la revalidación)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            entry = next((e for e in session["entries"] if e.entry_id == entry_id), None) if session else None
+            if entry is None:
+                return False
+            self.total_bytes -= entry.size
+            entry.store(result)
+            self.total_bytes += entry.size
+            self._enforce_cap(session_id)
+            return True
+
+    def entries(self, session_id: str) -> list:
+        """Entradas de la sesión, más reciente primero"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            self._touch(session_id)
+            return list(session["entries"])
+
+    def open(self, session_id: str, entry_id: int):
+        """Response completo de una entrada, o None si ya fue descartada"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            entry = next((e for e in session["entries"] if e.entry_id == entry_id), None) if session else None
+        return entry.load() if entry else None
+
+    def _evict_oldest(self, session_id: str):
+        session = self._sessions[session_id]
+        self.total_bytes -= session["entries"].pop().size
+        self.evictions += 1
+        if not session["entries"]:
+            del self._sessions[session_id]
+
+    def _enforce_cap(self, current_session: str):
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        # 1. Sesiones inactivas completas
+        cutoff = time.time() - self.idle_seconds
+        for session_id in [sid for sid, s in self._sessions.items() if s["last_seen"] < cutoff]:
+            while session_id in self._sessions and self.total_bytes > self.max_bytes:
+                self._evict_oldest(session_id)
+
+        # 2. Entradas más antiguas de las sesiones usadas hace más tiempo; la sesión actual conserva la última
+        for session_id in list(self._sessions):
+            if session_id == current_session:
+                continue
+            while session_id in self._sessions and self.total_bytes > self.max_bytes:
+                self._evict_oldest(session_id)
+        session = self._sessions.get(current_session)
+        while session and len(session["entries"]) > 1 and self.total_bytes > self.max_bytes:
+            self._evict_oldest(current_session)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "entries": sum(len(s["entries"]) for s in self._sessions.values()),
+                "bytes": self.total_bytes,
+                "evictions": self.evictions,
+            }
+
+
+prediction_history = PredictionHistory()
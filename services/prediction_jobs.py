@@ -0,0 +1,194 @@
+"""
+Predicciones del formulario como trabajos en segundo plano con dueño por sesión.
+
+El hilo del script solo envía el trabajo y guarda su id en `session_state`; la UI
+consulta el avance (fases reales: cache, cola de admisión, backend, respuesta) hasta
+que termina. Cada sesión tiene a lo más una predicción en curso: un nuevo envío cancela
+la anterior, igual que volver al formulario o cerrar la pestaña (un hilo revisa cada
+`PREDICTION_REAP_SECONDS` las sesiones que ya no están conectadas). Cancelar cierra el
+socket del request y libera su lugar en la admisión y en el pool de conexiones.
+"""
+import secrets
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime import Runtime
+
+from config.settings import Config
+from services.api_client import APIClient
+from services.metrics import observe_cancellation, observe_duplicate_submission
+from services.cancellation import CancelToken
+from services.prefetch import prefetcher
+from services.response_cache import canonical_request_key, idempotency_key
+from utils.tracing import activate
+
+_executor = ThreadPoolExecutor(max_workers=Config.PREDICTION_WORKERS, thread_name_prefix="prediction")
+
+PHASE_LABELS = {
+    "pending": "⏳ Esperando un worker disponible",
+    "cache": "🗄️ Consultando predicciones recientes",
+    "queued": "🚦 En cola para el backend",
+    "backend": "🤖 Calculando rutas y promesa en el backend",
+    "decoding": "📊 Procesando la respuesta",
+    "done": "✅ Análisis completado",
+}
+
+
+class PredictionJob:
+    """Predicción en curso: future, token de cancelación y fases recorridas"""
+
+    __slots__ = ("id", "session_id", "request", "idempotency_key", "future", "token", "trace", "started_at",
+                 "finished_at", "phase", "position", "phases")
+
+    def __init__(self, session_id: str, request: dict, trace=None):
+        self.id = secrets.token_hex(8)
+        self.session_id = session_id
+        self.request = request
+        self.idempotency_key = idempotency_key(request)
+        self.future = None
+        self.token = CancelToken()
+        self.trace = trace
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.phase = "pending"
+        self.position = None
+        self.phases = [("pending", self.started_at)]  # (fase, inicio monotónico)
+
+    def advance(self, phase: str, position: int = None):
+        """Llamado desde el hilo del trabajo al pasar de fase (o al moverse en la cola)"""
+        self.position = position
+        if phase != self.phase:
+            self.phases.append((phase, time.monotonic()))
+            self.phase = phase
+
+    def snapshot(self) -> dict:
+        fases = list(self.phases)
+        now = self.finished_at or time.monotonic()
+        label = PHASE_LABELS[fases[-1][0]]
+        if fases[-1][0] == "queued" and self.position is not None:
+            label = f"{label} (posición {self.position})"
+        return {
+            "id": self.id,
+            "phase": fases[-1][0],
+            "label": label,
+            "phase_elapsed_s": now - fases[-1][1],
+            "elapsed_s": now - self.started_at,
+            "completed": [
+                {"phase": fase, "label": PHASE_LABELS[fase], "duration_s": siguiente - inicio}
+                for (fase, inicio), (_, siguiente) in zip(fases, fases[1:])
+            ],
+            "done": self.future is not None and self.future.done(),
+        }
+
+
+class PredictionJobs:
+    """Trabajos de predicción por id y por sesión, seguro para hilos"""
+
+    def __init__(self):
+        self._jobs = {}  # job_id -> PredictionJob
+        self._by_session = {}  # session_id -> job_id vigente
+        self._lock = threading.Lock()
+        # Duraciones recientes de predicciones completas, para estimar el tiempo que ahorra cancelar
+        self._durations = deque(maxlen=200)
+
+    def submit(self, session_id: str, codigo_postal: str, sku_id: str, cantidad: int, fecha_compra: str,
+               trace=None) -> str:
+        """
+        Enviar la predicción al executor compartido y devolver su id. Si la sesión ya tiene en curso
+        el mismo request (doble clic, reintento impaciente) devuelve ese trabajo; si tiene otro, lo cancela.
+        """
+        request = APIClient.build_payload(codigo_postal, sku_id, cantidad, fecha_compra)
+        with self._lock:
+            actual = self._jobs.get(self._by_session.get(session_id))
+        if (actual is not None and not actual.future.done()
+                and canonical_request_key(actual.request) == canonical_request_key(request)):
+            observe_duplicate_submission()
+            return actual.id
+
+        self.cancel(session_id, "resubmit")
+        job = PredictionJob(session_id, request, trace)
+        job.future = _executor.submit(self._run, job)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._by_session[session_id] = job.id
+        _ensure_reaper()
+        return job.id
+
+    def _run(self, job: PredictionJob):
+        request = job.request
+        with activate(job.trace):
+            job.advance("cache")
+            if Config.PREFETCH_ENABLED:
+                prefetcher.claim(job.session_id, request)
+            result = APIClient().fetch_prediction(
+                request["codigo_postal"], request["sku_id"], request["cantidad"], request["fecha_compra"],
+                on_queue=lambda posicion: job.advance("queued", posicion), on_phase=job.advance,
+                cancel_token=job.token, idempotency=job.idempotency_key
+            )
+        job.finished_at = time.monotonic()
+        job.advance("done")
+        if not job.token.cancelled:
+            with self._lock:
+                self._durations.append(job.finished_at - job.started_at)
+        return result
+
+    def get(self, session_id: str, job_id: str):
+        """Trabajo `job_id` si pertenece a la sesión (None si no existe o ya se olvidó)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None and job.session_id == session_id else None
+
+    def cancel(self, session_id: str, reason: str) -> bool:
+        """Cancelar la predicción en curso de la sesión; devuelve True si había una"""
+        with self._lock:
+            job = self._jobs.pop(self._by_session.pop(session_id, None), None)
+            tipica = statistics.median(self._durations) if self._durations else 0.0
+        if job is None or job.future.done() or not job.token.cancel():
+            return False
+        job.future.cancel()  # si aún no empezó, nunca llega a correr
+        observe_cancellation(reason, max(0.0, tipica - (time.monotonic() - job.started_at)))
+        return True
+
+    def forget(self, session_id: str, job_id: str):
+        """Soltar un trabajo terminado cuyo resultado ya se mostró"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.session_id == session_id:
+                del self._jobs[job_id]
+                if self._by_session.get(session_id) == job_id:
+                    del self._by_session[session_id]
+
+    def sessions(self) -> list:
+        with self._lock:
+            return list(self._by_session)
+
+
+prediction_jobs = PredictionJobs()
+
+
+def _reap_disconnected():
+    while True:
+        time.sleep(Config.PREDICTION_REAP_SECONDS)
+        if not Runtime.exists():
+            continue
+        runtime = Runtime.instance()
+        for session_id in prediction_jobs.sessions():
+            if not runtime.is_active_session(session_id):
+                prediction_jobs.cancel(session_id, "disconnect")
+
+
+_reaper_thread = None
+_reaper_lock = threading.Lock()
+
+
+def _ensure_reaper():
+    global _reaper_thread
+    if _reaper_thread is not None:
+        return
+    with _reaper_lock:
+        if _reaper_thread is None:
+            _reaper_thread = threading.Thread(target=_reap_disconnected, name="prediction-reaper", daemon=True)
+            _reaper_thread.start()
@@ -0,0 +1,129 @@
+"""
+Prefetch especulativo de predicciones mientras el usuario llena el formulario (opt-in).
+
+Cuando las entradas del formulario son válidas se programa, con debounce, una llamada
+en segundo plano que deja la respuesta en el cache; al presionar el botón la predicción
+sale del cache. Cada sesión tiene un tope de llamadas especulativas y se mide cuántas
+se aprovecharon (hits) y cuántas no (desperdiciadas), incluidas las que quedan sin
+reclamar cuando la sesión se va o caduca.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TTLCache
+
+from config.settings import Config
+from services.admission import LANE_BACKGROUND
+from services.api_client import APIClient
+from services.metrics import observe_prefetch
+from services.response_cache import response_cache, canonical_request_key
+
+_executor = ThreadPoolExecutor(max_workers=Config.PREFETCH_MAX_CONCURRENCY, thread_name_prefix="prefetch")
+
+
+def _discard_session(session: dict):
+    """La sesión se fue sin reclamar sus prefetch: no se van a usar"""
+    if session["timer"] is not None:
+        session["timer"].cancel()
+    for _ in session["pending"]:
+        observe_prefetch("wasted")
+
+
+class _SessionCache(TTLCache):
+    """TTLCache de sesiones de prefetch que descarta lo pendiente al caducar o al ser desalojadas"""
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for _, session in expired:
+            _discard_session(session)
+        return expired
+
+    def popitem(self):
+        key, session = super().popitem()
+        _discard_session(session)
+        return key, session
+
+
+class Prefetcher:
+    """Estado de prefetch por sesión: timer de debounce, llamadas emitidas y claves sin reclamar"""
+
+    def __init__(self, debounce_s: float = Config.PREFETCH_DEBOUNCE_SECONDS,
+                 max_per_session: int = Config.PREFETCH_MAX_PER_SESSION):
+        self.debounce_s = debounce_s
+        self.max_per_session = max_per_session
+        # session_id -> {"timer", "issued", "pending": {key: future}}; las sesiones inactivas caducan
+        self._sessions = _SessionCache(maxsize=Config.PREFETCH_MAX_SESSIONS, ttl=Config.PREFETCH_SESSION_TTL)
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str) -> dict:
+        return self._sessions.setdefault(session_id, {"timer": None, "issued": 0, "pending": {}})
+
+    def schedule(self, session_id: str, payload: dict) -> bool:
+        """Programar el prefetch de `payload` tras el debounce; reemplaza al programado antes"""
+        key = canonical_request_key(payload)
+        with self._lock:
+            session = self._session(session_id)
+            if session["timer"] is not None:
+                session["timer"].cancel()
+                session["timer"] = None
+            if key in session["pending"]:
+                return False
+            if session["issued"] >= self.max_per_session:
+                observe_prefetch("skipped_cap")
+                return False
+            timer = threading.Timer(self.debounce_s, self._fire, (session_id, key, payload))
+            timer.daemon = True
+            session["timer"] = timer
+        timer.start()
+        return True
+
+    def _fire(self, session_id: str, key: str, payload: dict):
+        with self._lock:
+            session = self._session(session_id)
+            session["timer"] = None
+            if key in response_cache:
+                observe_prefetch("skipped_cached")
+                return
+            if session["issued"] >= self.max_per_session:
+                observe_prefetch("skipped_cap")
+                return
+            session["issued"] += 1
+            # La especulación anterior que nunca se reclamó ya no se va a usar
+            for _ in session["pending"]:
+                observe_prefetch("wasted")
+            session["pending"] = {key: _executor.submit(
+                APIClient().fetch_prediction,
+                payload["codigo_postal"], payload["sku_id"], payload["cantidad"], payload["fecha_compra"],
+                lane=LANE_BACKGROUND
+            )}
+        observe_prefetch("issued")
+
+    def claim(self, session_id: str, payload: dict, timeout: float = Config.API_TIMEOUT) -> bool:
+        """
+        Al ejecutar la predicción real: cancela el debounce pendiente, espera el prefetch en
+        curso de la misma clave (para no duplicar la llamada) y registra hit o desperdicio.
+        """
+        key = canonical_request_key(payload)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            if session["timer"] is not None:
+                session["timer"].cancel()
+                session["timer"] = None
+            pending, session["pending"] = session["pending"], {}
+
+        future = pending.pop(key, None)
+        for _ in pending:
+            observe_prefetch("wasted")
+        if future is None:
+            return False
+        try:
+            result, _ = future.result(timeout=timeout)
+        except Exception:
+            result = None
+        observe_prefetch("hit" if result else "wasted")
+        return result is not None
+
+
+prefetcher = Prefetcher()
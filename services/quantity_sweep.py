@@ -0,0 +1,115 @@
+from config.settings import Config
+from services.api_client import APIClient
+from utils.helpers import summarize_prediction
+
+
+def _relative_change(antes: float, despues: float) -> float:
+    return abs(despues - antes) / max(abs(antes), 1e-9)
+
+
+class QuantitySweep:
+    """
+    Barrido de sensibilidad sobre `cantidad` con muestreo adaptativo.
+
+    Primero consulta una malla gruesa de cantidades y después refina, por
+    bisección y en paralelo, solo los tramos donde cambia tipo_respuesta,
+    el conjunto de tiendas origen o hay un escalón en el costo. Las cantidades
+    que fallaron no tienen respuesta que comparar: los tramos se forman entre
+    vecinos exitosos y un error nunca motiva un refinamiento.
+    """
+
+    def __init__(self, codigo_postal: str, sku_id: str, fecha_compra: str, cantidad_min: int = 1,
+                 cantidad_max: int = Config.MAX_QUANTITY, api_client: APIClient = None):
+        self.codigo_postal = codigo_postal
+        self.sku_id = sku_id
+        self.fecha_compra = fecha_compra
+        self.cantidad_min = cantidad_min
+        self.cantidad_max = max(cantidad_min, cantidad_max)
+        self.api_client = api_client or APIClient()
+        self.points = {}
+        self.rounds = 0
+
+    def _probe_many(self, cantidades: list):
+        """Consultar en paralelo las cantidades que aún no se han evaluado"""
+        pendientes = sorted({c for c in cantidades if c not in self.points})
+        payloads = [
+            APIClient.build_payload(self.codigo_postal, self.sku_id, cantidad, self.fecha_compra)
+            for cantidad in pendientes
+        ]
+        for index, result, error in self.api_client.predict_many(payloads):
+            self.points[pendientes[index]] = self._build_point(pendientes[index], result, error)
+        self.rounds += 1
+
+    @staticmethod
+    def _build_point(cantidad: int, result: dict, error: str) -> dict:
+        resumen = summarize_prediction(result) if result else {}
+        return {
+            'cantidad': cantidad,
+            'tipo_respuesta': resumen.get('tipo_respuesta'),
+            'costo': resumen.get('costo'),
+            'probabilidad': resumen.get('probabilidad'),
+            'tiendas': tuple(resumen.get('tiendas', [])),
+            'split_reason': (result or {}).get('split_reason'),
+            'consolidation_available': (result or {}).get('consolidation_available', False),
+            'error': error,
+        }
+
+    def _needs_refinement(self, a: dict, b: dict) -> bool:
+        """
+        Un tramo se refina si cambia el tipo de respuesta, las tiendas o el costo total. Un cambio
+        de costo que se explica por una tarifa fija (total igual) o por unidad (unitario igual) no
+        es un escalón y no se refina.
+        """
+        if b['cantidad'] - a['cantidad'] <= 1:
+            return False
+        if (a['tipo_respuesta'], a['tiendas']) != (b['tipo_respuesta'], b['tiendas']):
+            return True
+        if a['costo'] is None or b['costo'] is None:
+            return False
+        cambio_total = _relative_change(a['costo'], b['costo'])
+        cambio_unitario = _relative_change(a['costo'] / a['cantidad'], b['costo'] / b['cantidad'])
+        return min(cambio_total, cambio_unitario) > Config.SWEEP_COST_TOLERANCE
+
+    def _midpoint(self, a: dict, b: dict):
+        """Cantidad aún no consultada más cercana al centro de (a, b), o None si no queda ninguna"""
+        mid = (a['cantidad'] + b['cantidad']) // 2
+        for distancia in range(b['cantidad'] - a['cantidad']):
+            for cantidad in (mid + distancia, mid - distancia):
+                if a['cantidad'] < cantidad < b['cantidad'] and cantidad not in self.points:
+                    return cantidad
+        return None
+
+    def run(self, coarse_points: int = Config.SWEEP_COARSE_POINTS) -> list:
+        """Ejecutar el barrido completo y devolver los puntos ordenados por cantidad"""
+        rango = self.cantidad_max - self.cantidad_min
+        coarse_points = max(2, min(coarse_points, rango + 1))
+        self._probe_many([
+            self.cantidad_min + round(i * rango / (coarse_points - 1)) for i in range(coarse_points)
+        ])
+
+        while True:
+            exitosos = self.successful_points()
+            midpoints = [
+                self._midpoint(a, b)
+                for a, b in zip(exitosos, exitosos[1:])
+                if self._needs_refinement(a, b)
+            ]
+            midpoints = [cantidad for cantidad in midpoints if cantidad is not None]
+            if not midpoints:
+                return self.sorted_points()
+            self._probe_many(midpoints)
+
+    def sorted_points(self) -> list:
+        return [self.points[cantidad] for cantidad in sorted(self.points)]
+
+    def successful_points(self) -> list:
+        return [point for point in self.sorted_points() if not point['error']]
+
+    def change_points(self) -> list:
+        """Cantidades donde cambia tipo_respuesta o el conjunto de tiendas (entre puntos exitosos)"""
+        exitosos = self.successful_points()
+        return [
+            {'antes': a, 'despues': b}
+            for a, b in zip(exitosos, exitosos[1:])
+            if (a['tipo_respuesta'], a['tiendas']) != (b['tipo_respuesta'], b['tiendas'])
+        ]
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from cachetools import TLRUCache, TTLCache
+
+from config.settings import Config
+from services.disk_cache import DiskCache
+
+
+def canonical_request_key(payload: dict) -> str:
+    """Clave canónica de un request de predicción (orden y formato estables)"""
+    normalized = {
+        "codigo_postal": str(payload.get("codigo_postal", "")).strip(),
+        "sku_id": str(payload.get("sku_id", "")).strip().upper(),
+        "cantidad": int(payload.get("cantidad", 0)),
+        "fecha_compra": str(payload.get("fecha_compra", "")),
+    }
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def idempotency_key(payload: dict, now: float = None, window: int = Config.IDEMPOTENCY_WINDOW_SECONDS) -> str:
+    """Clave de idempotencia: el mismo request dentro de la misma ventana de `window` segundos comparte clave"""
+    ventana = int((time.time() if now is None else now) // window)
+    return hashlib.sha256(f"{canonical_request_key(payload)}|{ventana}".encode("utf-8")).hexdigest()[:32]
+
+
+class ResponseCache:
+    """
+    Cache de respuestas del backend compartido por todo el proceso: memoria y, opcionalmente,
+    un segundo nivel en disco compartido entre procesos. En memoria una respuesta vence `ttl`
+    segundos después de que el backend la entregó (`guardado_en`), no de cuando entró a la
+    memoria: lo que sube del disco no vuelve a empezar su TTL.
+    """
+
+    def __init__(self, maxsize: int = Config.RESPONSE_CACHE_MAX_ENTRIES, ttl: int = Config.RESPONSE_CACHE_TTL,
+                 disk: DiskCache = None):
+        self._cache = TLRUCache(maxsize=maxsize, ttu=lambda _key, entry, _now: entry[1] + ttl, timer=time.time)
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """Lookup de la ruta de servicio: el único que cuenta para los hit ratios por nivel"""
+        return self.get_entry(key, count=True)[0]
+
+    def get_entry(self, key: str, max_age: float = None, count: bool = False):
+        """
+        (response, guardado_en) desde memoria o disco. Con `max_age` también acepta
+        respuestas ya vencidas por TTL si tienen menos de `max_age` segundos (solo en disco).
+        Revalidación y precalentamiento consultan sin `count` para no sesgar las estadísticas.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if count:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if entry is not None:
+                return entry
+
+        if self.disk is None:
+            return None, None
+        value, stored_at = self.disk.get_entry(key, max_age, count=count)
+        if value is not None:
+            with self._lock:
+                self._cache[key] = (value, stored_at)  # ya vencida en memoria: el cache no la guarda
+        return value, stored_at
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._cache[key] = (value, time.time())
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def warm_from_disk(self, limit: int = Config.DISK_CACHE_WARM_ENTRIES) -> int:
+        """Cargar en memoria las claves más consultadas del disco que sigan vigentes según el TTL de memoria"""
+        if self.disk is None:
+            return 0
+        entries = self.disk.hot_entries(limit, max_age=self.ttl)
+        with self._lock:
+            for key, value, stored_at in entries:
+                self._cache.setdefault(key, (value, stored_at))
+        return len(entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """Estadísticas de uso del nivel en memoria; las del disco van en `disk`"""
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+class NegativeCache:
+    """Errores 4xx recientes por clave canónica: el mismo request inválido no vuelve al backend"""
+
+    def __init__(self, maxsize: int = Config.NEGATIVE_CACHE_MAX_ENTRIES, ttl: int = Config.NEGATIVE_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key: str):
+        with self._lock:
+            error = self._cache.get(key)
+            if error is not None:
+                self.hits += 1
+            return error
+
+    def set(self, key: str, error: str):
+        with self._lock:
+            self._cache[key] = error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits}
+
+
+def _create_disk_cache():
+    if not Config.DISK_CACHE_ENABLED:
+        return None
+    try:
+        return DiskCache()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+response_cache = ResponseCache(disk=_create_disk_cache())
+negative_cache = NegativeCache()
+
+_warmed_from_disk = False
+_warm_lock = threading.Lock()
+
+
+def ensure_warm_from_disk():
+    """Precalentar la memoria desde el disco una sola vez por proceso (en el primer rerun, no al importar)"""
+    global _warmed_from_disk
+    if _warmed_from_disk:
+        return
+    with _warm_lock:
+        if not _warmed_from_disk:
+            response_cache.warm_from_disk()
+            _warmed_from_disk = True
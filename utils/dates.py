@@ -0,0 +1,130 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Union
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pyarrow as pa
+
+from config.settings import Config
+
+LOCAL_TZ = ZoneInfo(Config.TIMEZONE)
+
+# Sufijo de los campos parseados que se agregan al response en la ingesta
+PARSED_SUFFIX = "_dt"
+
+DateLike = Union[str, datetime, None]
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_string(value: str) -> Optional[datetime]:
+    """Parsear un string ISO 8601 una sola vez (memoizado)"""
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=LOCAL_TZ)
+    return dt
+
+
+def parse_iso_datetime(value: DateLike) -> Optional[datetime]:
+    """Convertir un valor de fecha del backend a datetime con zona horaria"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=LOCAL_TZ)
+    if not value or not isinstance(value, str):
+        return None
+    return _parse_iso_string(value)
+
+
+def get_parsed_date(container: dict, field: str) -> Optional[datetime]:
+    """Obtener la fecha parseada en la ingesta, o parsearla si no existe"""
+    if not container:
+        return None
+    parsed = container.get(f"{field}{PARSED_SUFFIX}")
+    if parsed is not None:
+        return parsed
+    return parse_iso_datetime(container.get(field))
+
+
+def _with_parsed_date(container, field: str):
+    """Copia de `container` con `field` parseado (o el mismo objeto si no aplica)"""
+    if not isinstance(container, dict) or field not in container:
+        return container
+    return {**container, f"{field}{PARSED_SUFFIX}": parse_iso_datetime(container.get(field))}
+
+
+def normalize_response_dates(data: dict) -> dict:
+    """
+    Parsear todas las fechas del response una sola vez al ingerirlo. Devuelve una copia:
+    el original puede ser el objeto compartido del cache de respuestas.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    normalized = dict(data)
+    for key, field in (('request', 'fecha_compra'), ('resultado_final', 'fecha_entrega_estimada')):
+        if key in normalized:
+            normalized[key] = _with_parsed_date(normalized[key], field)
+    if isinstance(normalized.get('delivery_options'), list):
+        normalized['delivery_options'] = [
+            _with_parsed_date(option, 'fecha_entrega') for option in normalized['delivery_options']
+        ]
+    return normalized
+
+
+def strip_parsed_dates(data: dict) -> dict:
+    """Copia del response sin los campos parseados (para serializar a JSON)"""
+    if isinstance(data, dict):
+        return {
+            key: strip_parsed_dates(value) for key, value in data.items()
+            if not (key.endswith(PARSED_SUFFIX) and isinstance(value, datetime))
+        }
+    if isinstance(data, list):
+        return [strip_parsed_dates(item) for item in data]
+    return data
+
+
+@lru_cache(maxsize=4096)
+def _format_cached(dt: datetime, fmt: str) -> str:
+    """Formatear un datetime (memoizado por valor y formato)"""
+    return dt.strftime(fmt)
+
+
+def format_date(value: DateLike, fmt: str = '%d/%m/%Y', default: str = "N/A") -> str:
+    """Formatear una fecha ya parseada o un string ISO"""
+    dt = parse_iso_datetime(value)
+    if dt is None:
+        return default
+    return _format_cached(dt, fmt)
+
+
+def format_date_short(value: DateLike, default: str = "N/A") -> str:
+    """Fecha sin hora en formato ISO (YYYY-MM-DD); conserva el valor original si no es parseable"""
+    dt = parse_iso_datetime(value)
+    if dt is None:
+        return str(value) if value else default
+    return _format_cached(dt, '%Y-%m-%d')
+
+
+def dates_to_arrow(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Convertir columnas de fecha de un DataFrame a timestamps Arrow de forma vectorizada"""
+    arrow_type = pd.ArrowDtype(pa.timestamp('s', tz=Config.TIMEZONE))
+
+    for column in columns:
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            try:
+                values = pd.to_datetime(values, errors='coerce', format='ISO8601')
+            except (ValueError, TypeError):
+                # Offsets mezclados: normalizar a UTC y convertir después
+                values = pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True)
+        if values.dt.tz is None:
+            values = values.dt.tz_localize(LOCAL_TZ, ambiguous='NaT', nonexistent='shift_forward')
+        else:
+            values = values.dt.tz_convert(LOCAL_TZ)
+        df[column] = values.astype(arrow_type)
+
+    return df
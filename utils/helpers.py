@@ -1,6 +1,10 @@
 from datetime import datetime
 
+import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.dates import DateLike, format_date, format_date_short, get_parsed_date, dates_to_arrow
 
 
 def init_session_state():
@@ -15,6 +19,12 @@ def init_session_state():
         st.session_state.fecha_compra = datetime.now().date()
 
 
+def current_session_id() -> str:
+    """Id de la sesión de Streamlit del rerun actual (None fuera de un rerun)"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
 def format_currency(amount: float) -> str:
     """Formatear cantidad como moneda mexicana"""
     return f"${amount:,.2f}"
@@ -25,22 +35,19 @@ def format_percentage(value: float) -> str:
     return f"{value * 100:.1f}%"
 
 
-def format_datetime(datetime_str: str) -> str:
-    """Formatear datetime string"""
-    try:
-        dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-        return dt.strftime('%d/%m/%Y')
-    except:
-        return "N/A"
+def format_seconds(seconds: float) -> str:
+    """Formatear una duración corta (ms por debajo de un segundo)"""
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.1f} s"
 
 
-def format_datetime_with_time(datetime_str: str) -> str:
-    """Formatear datetime string con hora"""
-    try:
-        dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-        return dt.strftime('%d/%m/%Y a las %H:%M')
-    except:
-        return "N/A"
+def format_datetime(datetime_value: DateLike) -> str:
+    """Formatear fecha (string ISO o datetime ya parseado)"""
+    return format_date(datetime_value, '%d/%m/%Y')
+
+
+def format_datetime_with_time(datetime_value: DateLike) -> str:
+    """Formatear fecha con hora (string ISO o datetime ya parseado)"""
+    return format_date(datetime_value, '%d/%m/%Y a las %H:%M')
 
 
 def get_delivery_status_badge(tipo_entrega: str) -> str:
@@ -199,8 +206,7 @@ def render_single_option_detailed_analysis(option: dict, full_data: dict, is_rec
         st.metric("📈 Probabilidad", f"{option.get('probabilidad_cumplimiento', 0):.1%}")
 
     with col3:
-        fecha = option.get('fecha_entrega', 'N/A')
-        fecha_display = fecha.split('T')[0] if 'T' in str(fecha) else str(fecha)
+        fecha_display = format_date_short(get_parsed_date(option, 'fecha_entrega') or option.get('fecha_entrega'))
         st.metric("📅 Entrega", fecha_display)
 
     with col4:
@@ -228,64 +234,69 @@ def render_single_option_detailed_analysis(option: dict, full_data: dict, is_rec
         render_option_details_analysis(option, full_data)
 
 
-def render_option_stores_analysis(option: dict, full_data: dict):
-    """Análisis de tiendas origen para una opción específica"""
+def build_option_stores_dataframe(option: dict, full_data: dict) -> pd.DataFrame:
+    """Tabla de tiendas origen de una opción con su detalle de stock (sin renderizar)"""
+    tiendas_origen = option.get('tiendas_origen', [])
 
-    import pandas as pd
+    # Obtener información detallada de las tiendas desde el análisis completo
+    stock_analysis = full_data.get('evaluacion_detallada', {}).get('stock_analysis', {})
+    stock_encontrado = stock_analysis.get('stock_encontrado', [])
+    tiendas_cercanas = stock_analysis.get('tiendas_cercanas', [])
 
-    st.markdown("#### 🏪 Tiendas Origen de esta Opción")
+    stores_data = []
+    for i, tienda_nombre in enumerate(tiendas_origen):
+        # Buscar información detallada de la tienda
+        tienda_info = None
 
-    tiendas_origen = option.get('tiendas_origen', [])
+        # Buscar en stock encontrado
+        for stock_tienda in stock_encontrado:
+            if tienda_nombre in stock_tienda.get('nombre_tienda', ''):
+                tienda_info = stock_tienda
+                break
 
-    if tiendas_origen:
-        # Obtener información detallada de las tiendas desde el análisis completo
-        stock_analysis = full_data.get('evaluacion_detallada', {}).get('stock_analysis', {})
-        stock_encontrado = stock_analysis.get('stock_encontrado', [])
-        tiendas_cercanas = stock_analysis.get('tiendas_cercanas', [])
-
-        stores_data = []
-        for i, tienda_nombre in enumerate(tiendas_origen):
-            # Buscar información detallada de la tienda
-            tienda_info = None
-
-            # Buscar en stock encontrado
-            for stock_tienda in stock_encontrado:
-                if tienda_nombre in stock_tienda.get('nombre_tienda', ''):
-                    tienda_info = stock_tienda
+        # Buscar en tiendas cercanas si no se encontró
+        if not tienda_info:
+            for cercana in tiendas_cercanas:
+                if tienda_nombre in cercana.get('nombre', ''):
+                    tienda_info = cercana
                     break
 
-            # Buscar en tiendas cercanas si no se encontró
-            if not tienda_info:
-                for cercana in tiendas_cercanas:
-                    if tienda_nombre in cercana.get('nombre', ''):
-                        tienda_info = cercana
-                        break
+        if tienda_info:
+            stores_data.append({
+                '#': i + 1,
+                'Tienda Liverpool': tienda_nombre,
+                'Stock Disponible': tienda_info.get('stock_disponible', 'N/A'),
+                'Distancia (km)': f"{tienda_info.get('distancia_km', 0):.1f}",
+                'Estado': tienda_info.get('estado', 'N/A'),
+                'Zona Seguridad': tienda_info.get('zona_seguridad', 'N/A'),
+                'Precio Unitario': f"${tienda_info.get('precio_tienda', 0):,.2f}" if tienda_info.get(
+                    'precio_tienda') else 'N/A',
+                'Es Local': '🟢 Sí' if tienda_info.get('es_local', False) else '🔴 No'
+            })
+        else:
+            stores_data.append({
+                '#': i + 1,
+                'Tienda Liverpool': tienda_nombre,
+                'Stock Disponible': 'N/A',
+                'Distancia (km)': 'N/A',
+                'Estado': 'N/A',
+                'Zona Seguridad': 'N/A',
+                'Precio Unitario': 'N/A',
+                'Es Local': 'N/A'
+            })
+
+    return pd.DataFrame(stores_data)
 
-            if tienda_info:
-                stores_data.append({
-                    '#': i + 1,
-                    'Tienda Liverpool': tienda_nombre,
-                    'Stock Disponible': tienda_info.get('stock_disponible', 'N/A'),
-                    'Distancia (km)': f"{tienda_info.get('distancia_km', 0):.1f}",
-                    'Estado': tienda_info.get('estado', 'N/A'),
-                    'Zona Seguridad': tienda_info.get('zona_seguridad', 'N/A'),
-                    'Precio Unitario': f"${tienda_info.get('precio_tienda', 0):,.2f}" if tienda_info.get(
-                        'precio_tienda') else 'N/A',
-                    'Es Local': '🟢 Sí' if tienda_info.get('es_local', False) else '🔴 No'
-                })
-            else:
-                stores_data.append({
-                    '#': i + 1,
-                    'Tienda Liverpool': tienda_nombre,
-                    'Stock Disponible': 'N/A',
-                    'Distancia (km)': 'N/A',
-                    'Estado': 'N/A',
-                    'Zona Seguridad': 'N/A',
-                    'Precio Unitario': 'N/A',
-                    'Es Local': 'N/A'
-                })
 
-        df_stores = pd.DataFrame(stores_data)
+def render_option_stores_analysis(option: dict, full_data: dict):
+    """Análisis de tiendas origen para una opción específica"""
+
+    st.markdown("#### 🏪 Tiendas Origen de esta Opción")
+
+    tiendas_origen = option.get('tiendas_origen', [])
+
+    if tiendas_origen:
+        df_stores = build_option_stores_dataframe(option, full_data)
         st.dataframe(df_stores, use_container_width=True)
 
         # Métricas de las tiendas
@@ -293,7 +304,7 @@ def render_option_stores_analysis(option: dict, full_data: dict):
         with col1:
             st.metric("🏪 Total Tiendas", len(tiendas_origen))
         with col2:
-            locales = sum(1 for item in stores_data if item.get('Es Local') == '🟢 Sí')
+            locales = int((df_stores['Es Local'] == '🟢 Sí').sum())
             st.metric("🏠 Tiendas Locales", locales)
         with col3:
             nacionales = len(tiendas_origen) - locales
@@ -442,13 +453,11 @@ def render_option_metrics_analysis(option: dict, full_data: dict):
     ventana = option.get('ventana_entrega', {})
 
     if fecha_entrega:
-        from datetime import datetime
         try:
-            fecha_dt = datetime.fromisoformat(fecha_entrega.replace('Z', '+00:00'))
-            fecha_compra = full_data.get('request', {}).get('fecha_compra', '')
+            fecha_dt = get_parsed_date(option, 'fecha_entrega')
+            compra_dt = get_parsed_date(full_data.get('request', {}), 'fecha_compra')
 
-            if fecha_compra:
-                compra_dt = datetime.fromisoformat(fecha_compra.replace('Z', '+00:00'))
+            if compra_dt:
                 dias_diferencia = (fecha_dt - compra_dt).days
 
                 col1, col2, col3 = st.columns(3)
@@ -510,17 +519,8 @@ def render_option_details_analysis(option: dict, full_data: dict):
         st.info(f"**Horario:** {ventana.get('inicio', 'N/A')} - {ventana.get('fin', 'N/A')}")
 
 
-def render_cross_option_analysis(delivery_options: list, recommendation: dict, full_data: dict):
-    """Análisis cruzado y comparativo entre todas las opciones"""
-
-    st.markdown("---")
-    st.markdown("## 🔄 Análisis Comparativo Cruzado")
-
-    import pandas as pd
-
-    # TABLA COMPARATIVA COMPLETA
-    st.markdown("### 📊 Matriz Comparativa Completa")
-
+def build_cross_option_dataframe(delivery_options: list, recommendation: dict) -> pd.DataFrame:
+    """Matriz comparativa de opciones de entrega (sin renderizar)"""
     comparison_data = []
     for i, option in enumerate(delivery_options):
         is_recommended = option.get('opcion') == recommendation.get('opcion')
@@ -531,8 +531,7 @@ def render_cross_option_analysis(delivery_options: list, recommendation: dict, f
             'Opción': option.get('opcion', f'Opción {i + 1}').replace('_', ' ').title(),
             'Descripción': option.get('descripcion', 'N/A'),
             'Tipo': option.get('tipo_entrega', 'N/A'),
-            'Fecha': option.get('fecha_entrega', 'N/A').split('T')[0] if 'T' in str(
-                option.get('fecha_entrega', '')) else option.get('fecha_entrega', 'N/A'),
+            'Fecha': get_parsed_date(option, 'fecha_entrega'),
             'Costo ($)': f"{option.get('costo_envio', 0):,.2f}",
             'Prob. (%)': f"{option.get('probabilidad_cumplimiento', 0):.1%}",
             'Tiempo (h)': f"{logistica.get('tiempo_total_h', 0):.1f}",
@@ -541,8 +540,24 @@ def render_cross_option_analysis(delivery_options: list, recommendation: dict, f
             'Score Riesgo': f"{(1 - option.get('probabilidad_cumplimiento', 0)) * 100:.1f}%"
         })
 
-    df_comparison = pd.DataFrame(comparison_data)
-    st.dataframe(df_comparison, use_container_width=True)
+    return dates_to_arrow(pd.DataFrame(comparison_data), ['Fecha'])
+
+
+def render_cross_option_analysis(delivery_options: list, recommendation: dict, full_data: dict):
+    """Análisis cruzado y comparativo entre todas las opciones"""
+
+    st.markdown("---")
+    st.markdown("## 🔄 Análisis Comparativo Cruzado")
+
+    # TABLA COMPARATIVA COMPLETA
+    st.markdown("### 📊 Matriz Comparativa Completa")
+
+    df_comparison = build_cross_option_dataframe(delivery_options, recommendation)
+    st.dataframe(
+        df_comparison,
+        use_container_width=True,
+        column_config={'Fecha': st.column_config.DatetimeColumn('Fecha', format="YYYY-MM-DD")}
+    )
 
     # ANÁLISIS DE RANGOS
     st.markdown("### 📈 Análisis de Rangos")
@@ -555,7 +570,7 @@ def render_cross_option_analysis(delivery_options: list, recommendation: dict, f
 
     with col1:
         st.metric("💰 Costo Min-Max", f"${min(costos):,.0f} - ${max(costos):,.0f}")
-        st.metric("📊 Variación", f"{((max(costos) - min(costos)) / max(costos, 1) * 100):.1f}%")
+        st.metric("📊 Variación", f"{((max(costos) - min(costos)) / max(max(costos), 1) * 100):.1f}%")
 
     with col2:
         st.metric("📈 Prob. Min-Max", f"{min(probabilidades):.0%} - {max(probabilidades):.0%}")
@@ -563,7 +578,7 @@ def render_cross_option_analysis(delivery_options: list, recommendation: dict, f
 
     with col3:
         st.metric("⏱️ Tiempo Min-Max", f"{min(tiempos):.1f}h - {max(tiempos):.1f}h")
-        st.metric("📊 Variación", f"{((max(tiempos) - min(tiempos)) / max(tiempos, 1) * 100):.1f}%")
+        st.metric("📊 Variación", f"{((max(tiempos) - min(tiempos)) / max(max(tiempos), 1) * 100):.1f}%")
 
     with col4:
         st.metric("📦 Total Opciones", len(delivery_options))
@@ -587,7 +602,7 @@ def render_cross_option_analysis(delivery_options: list, recommendation: dict, f
 
         **📈 Probabilidad:** {recomendada_option.get('probabilidad_cumplimiento', 0):.1%}
 
-        **📅 Entrega:** {recomendada_option.get('fecha_entrega', 'N/A').split('T')[0] if 'T' in str(recomendada_option.get('fecha_entrega', '')) else recomendada_option.get('fecha_entrega', 'N/A')}
+        **📅 Entrega:** {format_date_short(get_parsed_date(recomendada_option, 'fecha_entrega') or recomendada_option.get('fecha_entrega'))}
 
         **🏪 Tiendas:** {', '.join(recomendada_option.get('tiendas_origen', []))}
 
@@ -1257,7 +1272,7 @@ def render_external_factors_analysis_corrected(data: dict):
 
     with col1:
         fecha_compra = request_data.get('fecha_compra', 'N/A')
-        st.metric("📅 Fecha de Compra", fecha_compra.split('T')[0] if 'T' in fecha_compra else fecha_compra)
+        st.metric("📅 Fecha de Compra", format_date_short(get_parsed_date(request_data, 'fecha_compra') or fecha_compra))
 
     with col2:
         evento = factores.get('evento_detectado', 'Normal')
@@ -1544,7 +1559,7 @@ def render_winner_analysis_corrected(data: dict):
 
         **Confianza:** {confianza:.1%}
 
-        **Fecha Entrega:** {fecha_entrega.split('T')[0] if 'T' in str(fecha_entrega) else fecha_entrega}
+        **Fecha Entrega:** {format_date_short(get_parsed_date(resultado_final, 'fecha_entrega_estimada') or fecha_entrega)}
 
         **Tipo Entrega:** {resultado_final.get('tipo_entrega', 'N/A')}
         """)
@@ -1584,8 +1599,7 @@ def render_consolidated_winner_table(data: dict):
         {"Categoría": "📋 PEDIDO", "Campo": "Cantidad", "Valor": f"{request_data.get('cantidad', 0)} unidades"},
         {"Categoría": "📋 PEDIDO", "Campo": "Código Postal Destino", "Valor": request_data.get('codigo_postal', 'N/A')},
         {"Categoría": "📋 PEDIDO", "Campo": "Fecha Compra",
-         "Valor": request_data.get('fecha_compra', 'N/A').split('T')[0] if 'T' in str(
-             request_data.get('fecha_compra', '')) else request_data.get('fecha_compra', 'N/A')},
+         "Valor": format_date_short(get_parsed_date(request_data, 'fecha_compra') or request_data.get('fecha_compra'))},
 
         # Información del ganador
         {"Categoría": "🏆 GANADOR", "Campo": "Tienda Seleccionada", "Valor": ganador_real.get('nombre_tienda', 'N/A')},
@@ -1630,9 +1644,8 @@ def render_consolidated_winner_table(data: dict):
         {"Categoría": "📈 RESULTADO", "Campo": "Confianza Predicción",
          "Valor": f"{resultado_final.get('confianza_prediccion', 0):.1%}"},
         {"Categoría": "📈 RESULTADO", "Campo": "Fecha Entrega",
-         "Valor": resultado_final.get('fecha_entrega_estimada', 'N/A').split('T')[0] if 'T' in str(
-             resultado_final.get('fecha_entrega_estimada', '')) else resultado_final.get('fecha_entrega_estimada',
-                                                                                         'N/A')},
+         "Valor": format_date_short(get_parsed_date(resultado_final, 'fecha_entrega_estimada') or
+                                    resultado_final.get('fecha_entrega_estimada'))},
         {"Categoría": "📈 RESULTADO", "Campo": "Ventana Entrega",
          "Valor": f"{resultado_final.get('ventana_entrega', {}).get('inicio', 'N/A')} - {resultado_final.get('ventana_entrega', {}).get('fin', 'N/A')}"},
         {"Categoría": "📈 RESULTADO", "Campo": "Tipo Entrega", "Valor": resultado_final.get('tipo_entrega', 'N/A')}
@@ -1682,6 +1695,45 @@ def render_consolidated_winner_table(data: dict):
             help="Distancia total de la ruta"
         )
 
+def summarize_prediction(data: dict) -> dict:
+    """Resumen plano de una predicción (simple o múltiple) para comparar respuestas"""
+    if not data:
+        return {}
+
+    if data.get('multiple_delivery_options') and data.get('delivery_options'):
+        delivery_options = data.get('delivery_options', [])
+        recomendada = data.get('recommendation', {}).get('opcion')
+        option = next((opt for opt in delivery_options if opt.get('opcion') == recomendada), delivery_options[0])
+        tiendas = set()
+        for opt in delivery_options:
+            tiendas.update(opt.get('tiendas_origen', []))
+        return {
+            'tipo_respuesta': data.get('tipo_respuesta', 'multiple_delivery_dates'),
+            'fecha_entrega': get_parsed_date(option, 'fecha_entrega'),
+            'tipo_entrega': option.get('tipo_entrega', 'N/A'),
+            'costo': option.get('costo_envio', 0),
+            'probabilidad': option.get('probabilidad_cumplimiento', 0),
+            'tiendas': sorted(option.get('tiendas_origen', [])),
+            'total_tiendas': len(tiendas),
+            'evento': data.get('factores_externos', {}).get('evento_detectado', 'Normal'),
+        }
+
+    resultado = data.get('resultado_final', {})
+    plan_asignacion = data.get('evaluacion_detallada', {}).get('stock_analysis', {}).get(
+        'asignacion_detallada', {}).get('plan_asignacion', [])
+    tiendas = sorted({t.get('nombre_tienda', 'Tienda') for t in plan_asignacion})
+    return {
+        'tipo_respuesta': data.get('tipo_respuesta', 'single_delivery_date'),
+        'fecha_entrega': get_parsed_date(resultado, 'fecha_entrega_estimada'),
+        'tipo_entrega': resultado.get('tipo_entrega', 'N/A'),
+        'costo': resultado.get('costo_mxn', 0),
+        'probabilidad': resultado.get('probabilidad_exito', 0),
+        'tiendas': tiendas,
+        'total_tiendas': len(tiendas),
+        'evento': data.get('factores_externos', {}).get('evento_detectado', 'Normal'),
+    }
+
+
 def get_risk_level_color(probability: float) -> str:
     """Obtener color basado en probabilidad de cumplimiento"""
     if probability >= 0.8:
@@ -1841,6 +1893,50 @@ def render_status_indicator(status: str, message: str):
     """, unsafe_allow_html=True)
 
 
+def build_stock_dataframe(stock_encontrado: list) -> pd.DataFrame:
+    """Tabla de tiendas con stock disponible (sin renderizar)"""
+    stock_data = []
+    for i, tienda in enumerate(stock_encontrado):
+        # Determinar si es local o nacional
+        es_local = tienda.get('es_local', False)
+        categoria = "🏠 Local" if es_local else "🌍 Nacional"
+
+        stock_data.append({
+            '#': i + 1,
+            'Tienda Liverpool': tienda.get('nombre_tienda', 'N/A'),
+            'Categoría': categoria,
+            'Stock Disponible': tienda.get('stock_disponible', 0),
+            'Distancia (km)': f"{tienda.get('distancia_km', 0):.1f}",
+            'Precio Unitario': f"${tienda.get('precio_tienda', 0):,.2f}",
+            'Precio Total (3 und)': f"${tienda.get('precio_total', 0):,.2f}",
+            'Tienda ID': tienda.get('tienda_id', 'N/A')
+        })
+
+    return pd.DataFrame(stock_data)
+
+
+def build_assignment_dataframe(plan_asignacion: list) -> pd.DataFrame:
+    """Tabla del plan de asignación final (sin renderizar)"""
+    asignacion_data = []
+    for i, asign in enumerate(plan_asignacion):
+        asignacion_data.append({
+            '#': i + 1,
+            'Tienda Asignada': asign.get('nombre_tienda', 'N/A'),
+            'Cantidad Asignada': asign.get('cantidad_asignada', 0),
+            'Stock Disponible': asign.get('stock_disponible', 0),
+            'Distancia (km)': f"{asign.get('distancia_km', 0):.1f}",
+            'Tiempo Total (h)': f"{asign.get('tiempo_total_h', 0):.1f}",
+            'Costo Total': f"${asign.get('costo_total_mxn', 0):,.2f}",
+            'Score': f"{asign.get('score_total', 0):.3f}",
+            'Flota': asign.get('fleet_type', 'N/A'),
+            'Carrier': asign.get('carrier', 'N/A'),
+            'Precio Producto': f"${asign.get('precio_total', 0):,.2f}",
+            'Razón Selección': asign.get('razon_seleccion', 'N/A')
+        })
+
+    return pd.DataFrame(asignacion_data)
+
+
 def render_liverpool_analysis_corrected(data: dict):
     """Análisis Liverpool CORREGIDO con lógica correcta de tiendas"""
     st.markdown("### 🏪 Análisis Completo de Tiendas Liverpool")
@@ -1854,24 +1950,7 @@ def render_liverpool_analysis_corrected(data: dict):
     if stock_encontrado:
         st.markdown("#### ✅ Tiendas Liverpool con Stock Disponible")
 
-        stock_data = []
-        for i, tienda in enumerate(stock_encontrado):
-            # Determinar si es local o nacional
-            es_local = tienda.get('es_local', False)
-            categoria = "🏠 Local" if es_local else "🌍 Nacional"
-
-            stock_data.append({
-                '#': i + 1,
-                'Tienda Liverpool': tienda.get('nombre_tienda', 'N/A'),
-                'Categoría': categoria,
-                'Stock Disponible': tienda.get('stock_disponible', 0),
-                'Distancia (km)': f"{tienda.get('distancia_km', 0):.1f}",
-                'Precio Unitario': f"${tienda.get('precio_tienda', 0):,.2f}",
-                'Precio Total (3 und)': f"${tienda.get('precio_total', 0):,.2f}",
-                'Tienda ID': tienda.get('tienda_id', 'N/A')
-            })
-
-        df_stock = pd.DataFrame(stock_data)
+        df_stock = build_stock_dataframe(stock_encontrado)
         st.dataframe(df_stock, use_container_width=True)
 
         # Métricas resumen REALES
@@ -1984,24 +2063,7 @@ def render_liverpool_analysis_corrected(data: dict):
     if plan_asignacion:
         st.markdown("#### 📋 Plan de Asignación Final")
 
-        asignacion_data = []
-        for i, asign in enumerate(plan_asignacion):
-            asignacion_data.append({
-                '#': i + 1,
-                'Tienda Asignada': asign.get('nombre_tienda', 'N/A'),
-                'Cantidad Asignada': asign.get('cantidad_asignada', 0),
-                'Stock Disponible': asign.get('stock_disponible', 0),
-                'Distancia (km)': f"{asign.get('distancia_km', 0):.1f}",
-                'Tiempo Total (h)': f"{asign.get('tiempo_total_h', 0):.1f}",
-                'Costo Total': f"${asign.get('costo_total_mxn', 0):,.2f}",
-                'Score': f"{asign.get('score_total', 0):.3f}",
-                'Flota': asign.get('fleet_type', 'N/A'),
-                'Carrier': asign.get('carrier', 'N/A'),
-                'Precio Producto': f"${asign.get('precio_total', 0):,.2f}",
-                'Razón Selección': asign.get('razon_seleccion', 'N/A')
-            })
-
-        df_asignacion = pd.DataFrame(asignacion_data)
+        df_asignacion = build_assignment_dataframe(plan_asignacion)
         st.dataframe(df_asignacion, use_container_width=True)
 
         # Totales de asignación REALES
@@ -2226,7 +2288,7 @@ def render_external_factors_analysis_corrected(data: dict):
 
     with col1:
         fecha_compra = request_data.get('fecha_compra', 'N/A')
-        st.metric("📅 Fecha de Compra", fecha_compra.split('T')[0] if 'T' in fecha_compra else fecha_compra)
+        st.metric("📅 Fecha de Compra", format_date_short(get_parsed_date(request_data, 'fecha_compra') or fecha_compra))
 
     with col2:
         evento = factores.get('evento_detectado', 'Normal')
@@ -2513,7 +2575,7 @@ def render_winner_analysis_corrected(data: dict):
 
         **Confianza:** {confianza:.1%}
 
-        **Fecha Entrega:** {fecha_entrega.split('T')[0] if 'T' in str(fecha_entrega) else fecha_entrega}
+        **Fecha Entrega:** {format_date_short(get_parsed_date(resultado_final, 'fecha_entrega_estimada') or fecha_entrega)}
 
         **Tipo Entrega:** {resultado_final.get('tipo_entrega', 'N/A')}
         """)
@@ -2553,8 +2615,7 @@ def render_consolidated_winner_table(data: dict):
         {"Categoría": "📋 PEDIDO", "Campo": "Cantidad", "Valor": f"{request_data.get('cantidad', 0)} unidades"},
         {"Categoría": "📋 PEDIDO", "Campo": "Código Postal Destino", "Valor": request_data.get('codigo_postal', 'N/A')},
         {"Categoría": "📋 PEDIDO", "Campo": "Fecha Compra",
-         "Valor": request_data.get('fecha_compra', 'N/A').split('T')[0] if 'T' in str(
-             request_data.get('fecha_compra', '')) else request_data.get('fecha_compra', 'N/A')},
+         "Valor": format_date_short(get_parsed_date(request_data, 'fecha_compra') or request_data.get('fecha_compra'))},
 
         # Información del ganador
         {"Categoría": "🏆 GANADOR", "Campo": "Tienda Seleccionada", "Valor": ganador_real.get('nombre_tienda', 'N/A')},
@@ -2599,9 +2660,8 @@ def render_consolidated_winner_table(data: dict):
         {"Categoría": "📈 RESULTADO", "Campo": "Confianza Predicción",
          "Valor": f"{resultado_final.get('confianza_prediccion', 0):.1%}"},
         {"Categoría": "📈 RESULTADO", "Campo": "Fecha Entrega",
-         "Valor": resultado_final.get('fecha_entrega_estimada', 'N/A').split('T')[0] if 'T' in str(
-             resultado_final.get('fecha_entrega_estimada', '')) else resultado_final.get('fecha_entrega_estimada',
-                                                                                         'N/A')},
+         "Valor": format_date_short(get_parsed_date(resultado_final, 'fecha_entrega_estimada') or
+                                    resultado_final.get('fecha_entrega_estimada'))},
         {"Categoría": "📈 RESULTADO", "Campo": "Ventana Entrega",
          "Valor": f"{resultado_final.get('ventana_entrega', {}).get('inicio', 'N/A')} - {resultado_final.get('ventana_entrega', {}).get('fin', 'N/A')}"},
         {"Categoría": "📈 RESULTADO", "Campo": "Tipo Entrega", "Valor": resultado_final.get('tipo_entrega', 'N/A')}
@@ -3197,4 +3257,37 @@ def render_winner_analysis(data: dict):
             st.success("✅ Fecha confirmada")
         else:
             st.metric("📅 Fecha Entrega", "N/A")
-            st.warning("⚠️ Fecha pendiente")
\ No newline at end of file
+            st.warning("⚠️ Fecha pendiente")
+
+def prediction_key_fields(data: dict) -> dict:
+    """Campos que decide el usuario (fecha promesa, costo, tienda ganadora...) ya formateados"""
+    if data.get('multiple_delivery_options'):
+        recomendada = data.get('recommendation', {}).get('opcion')
+        opciones = data.get('delivery_options') or []
+        opcion = next((o for o in opciones if o.get('opcion') == recomendada), opciones[0] if opciones else {})
+        return {
+            "🏆 Opción recomendada": str(recomendada or 'N/A').replace('_', ' ').title(),
+            "📅 Fecha promesa": format_datetime_with_time(get_parsed_date(opcion, 'fecha_entrega')),
+            "💰 Costo": format_currency(opcion.get('costo_envio', 0)),
+            "📈 Probabilidad": format_percentage(opcion.get('probabilidad_cumplimiento', 0)),
+            "🏪 Tiendas origen": ", ".join(opcion.get('tiendas_origen') or []) or 'N/A',
+        }
+
+    resultado = data.get('resultado_final', {})
+    return {
+        "📅 Fecha promesa": format_datetime_with_time(get_parsed_date(resultado, 'fecha_entrega_estimada')),
+        "💰 Costo": format_currency(resultado.get('costo_mxn', 0)),
+        "📈 Probabilidad": format_percentage(resultado.get('probabilidad_exito', 0)),
+        "🚚 Tipo de entrega": resultado.get('tipo_entrega', 'N/A'),
+        "🏪 Tienda ganadora": data.get('evaluacion', {}).get('ganador', {}).get('tienda', 'N/A'),
+    }
+
+
+def diff_predictions(old: dict, new: dict) -> list:
+    """Campos clave que cambiaron entre dos respuestas de la misma consulta"""
+    antes, ahora = prediction_key_fields(old), prediction_key_fields(new)
+    return [
+        {"campo": campo, "antes": antes.get(campo, 'N/A'), "ahora": valor}
+        for campo, valor in ahora.items()
+        if antes.get(campo) != valor
+    ]
@@ -0,0 +1,148 @@
+"""
+Modo de memoria: tracemalloc alrededor del rerun (predicción y render).
+
+Reporta los sitios que más asignan, el tamaño profundo de lo que cada sesión
+guarda en `st.session_state` y el diff contra el snapshot del rerun anterior de
+la misma sesión para detectar fugas.
+
+tracemalloc es global al proceso: solo corre mientras alguna sesión tenga el modo
+activo (con rerun en los últimos `MEMORY_SESSION_IDLE_SECONDS`) y los diffs incluyen
+lo que asignen otras sesiones al mismo tiempo.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+from config.settings import Config
+from utils.dates import strip_parsed_dates
+from utils.perf import deep_sizeof, short_path
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# Último snapshot por sesión (LRU acotado: cada snapshot puede pesar varios MB)
+_previous_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+# Sesiones con el modo de memoria activo -> último rerun (time.monotonic)
+_memory_sessions = {}
+_tracing_started = False
+
+
+def _update_tracing(session_id: str, enabled: bool):
+    """Contar las sesiones en modo memoria; arrancar tracemalloc con la primera y detenerlo sin ninguna"""
+    global _tracing_started
+    now = time.monotonic()
+    with _snapshots_lock:
+        if enabled:
+            _memory_sessions[session_id] = now
+        else:
+            _memory_sessions.pop(session_id, None)
+        for sid, last_seen in list(_memory_sessions.items()):
+            if now - last_seen > Config.MEMORY_SESSION_IDLE_SECONDS:
+                del _memory_sessions[sid]
+
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(Config.MEMORY_TRACE_FRAMES)
+            _tracing_started = True
+        elif not _memory_sessions and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+            # Los snapshots de otra sesión de trazado no son comparables
+            _previous_snapshots.clear()
+        return len(_memory_sessions)
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def _site_label(traceback) -> str:
+    frame = traceback[0]
+    return f"{short_path(frame.filename)}:{frame.lineno}"
+
+
+def top_allocations(snapshot, limit: int = Config.MEMORY_TOP_N) -> list:
+    """Sitios con más memoria viva en el snapshot"""
+    return [
+        {"site": _site_label(stat.traceback), "size_kb": stat.size / 1024, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def snapshot_diff(old, new, limit: int = Config.MEMORY_TOP_N) -> list:
+    """Sitios cuya memoria viva más creció entre dos snapshots"""
+    stats = [stat for stat in new.compare_to(old, "lineno") if stat.size_diff > 0][:limit]
+    return [
+        {
+            "site": _site_label(stat.traceback),
+            "size_diff_kb": stat.size_diff / 1024,
+            "count_diff": stat.count_diff,
+            "size_kb": stat.size / 1024,
+        }
+        for stat in stats
+    ]
+
+
+def session_state_sizes(state: dict) -> list:
+    """Tamaño profundo por clave del session_state; prediction_data se desglosa"""
+    rows = [{"key": key, "size_kb": deep_sizeof(value) / 1024} for key, value in state.items()]
+
+    data = state.get("prediction_data")
+    if data:
+        rows.append({
+            "key": "prediction_data (JSON serializado)",
+            "size_kb": len(json.dumps(strip_parsed_dates(data), ensure_ascii=False, default=str)) / 1024,
+        })
+    return sorted(rows, key=lambda row: row["size_kb"], reverse=True)
+
+
+@contextmanager
+def memory_rerun(enabled: bool, session_id: str = None, state_getter=None):
+    """
+    Snapshots de tracemalloc al inicio y al final del bloque. Entrega un dict que se
+    llena al salir (o None si está deshabilitado).
+    """
+    if not enabled:
+        if _memory_sessions:
+            _update_tracing(session_id, enabled=False)
+        yield None
+        return
+
+    sesiones_trazadas = _update_tracing(session_id, enabled=True)
+
+    report = {}
+    started_at = datetime.now()
+    t0 = time.perf_counter()
+    before = take_snapshot()
+    try:
+        yield report
+    finally:
+        after = take_snapshot()
+        with _snapshots_lock:
+            previous = _previous_snapshots.pop(session_id, None)
+            _previous_snapshots[session_id] = after
+            while len(_previous_snapshots) > Config.MEMORY_MAX_SESSIONS:
+                _previous_snapshots.popitem(last=False)
+
+        current, peak = tracemalloc.get_traced_memory()
+        state = state_getter() if state_getter else {}
+        report.update({
+            "timestamp": started_at.isoformat(timespec="seconds"),
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+            "traced_current_kb": current / 1024,
+            "traced_peak_kb": peak / 1024,
+            "top_allocations": top_allocations(after),
+            "rerun_diff": snapshot_diff(before, after),
+            "previous_rerun_diff": snapshot_diff(previous, after) if previous is not None else [],
+            "session_total_kb": deep_sizeof(state) / 1024,
+            "traced_sessions": sesiones_trazadas,
+            "session_state": session_state_sizes(state),
+        })
@@ -0,0 +1,315 @@
+import cProfile
+import functools
+import json
+import marshal
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config.settings import Config
+
+# Prefijos de las funciones que se instrumentan (render y constructores de grafos)
+INSTRUMENTED_PREFIXES = (
+    "render_", "_render_", "build_", "_build_", "create_", "_create_",
+    "extract_", "calcular_", "summarize_", "merge_", "consolidate_",
+)
+
+_state = threading.local()
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class RenderProfiler:
+    """Acumula tiempos, llamadas y elementos emitidos por función durante un rerun"""
+
+    def __init__(self, page: str = "form"):
+        self.page = page
+        self.started_at = datetime.now()
+        self.t0 = time.perf_counter()
+        self.total_s = 0.0
+        self.elements = 0
+        self.functions = {}
+        self.spans = []
+        self._stack = []
+
+    def enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0, self.elements])
+
+    def exit(self):
+        name, start, child_s, elements_start = self._stack.pop()
+        end = time.perf_counter()
+        elapsed = end - start
+        stats = self.functions.setdefault(name, {"calls": 0, "total_s": 0.0, "self_s": 0.0, "elements": 0})
+        stats["calls"] += 1
+        stats["self_s"] += elapsed - child_s
+        stats["elements"] += self.elements - elements_start
+        # El tiempo inclusivo solo se suma en la llamada más externa (evita doble conteo en recursión)
+        if not any(frame[0] == name for frame in self._stack):
+            stats["total_s"] += elapsed
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        if len(self.spans) < Config.PERF_MAX_SPANS:
+            self.spans.append({
+                "name": name,
+                "depth": len(self._stack),
+                "start_ms": (start - self.t0) * 1000,
+                "duration_ms": elapsed * 1000,
+            })
+
+    def finish(self):
+        self.total_s = time.perf_counter() - self.t0
+
+    def rows(self) -> list:
+        """Estadísticas por función ordenadas por tiempo propio"""
+        return sorted(
+            ({"function": name, **stats} for name, stats in self.functions.items()),
+            key=lambda row: row["self_s"],
+            reverse=True
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.started_at.isoformat(timespec="seconds"),
+            "page": self.page,
+            "total_ms": round(self.total_s * 1000, 3),
+            "elements": self.elements,
+            "functions": [
+                {**row, "total_s": round(row["total_s"], 6), "self_s": round(row["self_s"], 6)}
+                for row in self.rows()
+            ],
+        }
+
+
+def current_profiler():
+    """Profiler activo del hilo actual (None si el rerun no se está midiendo)"""
+    return getattr(_state, "profiler", None)
+
+
+def timed(func=None, *, name: str = None):
+    """Decorador de instrumentación; sin profiler activo solo cuesta una lectura thread-local"""
+    if func is None:
+        return functools.partial(timed, name=name)
+    if getattr(func, "__perf_instrumented__", False):
+        return func
+
+    label = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = getattr(_state, "profiler", None)
+        if profiler is None:
+            return func(*args, **kwargs)
+        profiler.enter(label)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.exit()
+
+    wrapper.__perf_instrumented__ = True
+    return wrapper
+
+
+def instrument_namespaces(modules: list, namespaces: list = ()):
+    """
+    Envolver con @timed las funciones de render y constructores de los módulos dados.
+    Los nombres importados en otros módulos (o en `namespaces`) también se reemplazan.
+    Es idempotente: se puede llamar en cada rerun.
+    """
+    wrapped = {}
+    for module in modules:
+        for attr, value in list(vars(module).items()):
+            if (callable(value) and attr.startswith(INSTRUMENTED_PREFIXES)
+                    and getattr(value, "__module__", None) == module.__name__
+                    and not getattr(value, "__perf_instrumented__", False)):
+                wrapped[value] = timed(value, name=f"{module.__name__.rsplit('.', 1)[-1]}.{attr}")
+
+    if not wrapped:
+        return
+
+    for namespace in [vars(module) for module in modules] + list(namespaces):
+        for attr, value in list(namespace.items()):
+            try:
+                if value in wrapped:
+                    namespace[attr] = wrapped[value]
+            except TypeError:
+                continue
+
+
+def _hook_element_counter(profiler: RenderProfiler):
+    """Contar los deltas que el rerun envía al navegador (elementos emitidos)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None, None
+    if ctx is None:
+        return None, None
+
+    original_enqueue = ctx._enqueue
+
+    def counting_enqueue(msg):
+        if msg.WhichOneof("type") == "delta":
+            profiler.elements += 1
+        return original_enqueue(msg)
+
+    ctx._enqueue = counting_enqueue
+    return ctx, original_enqueue
+
+
+def deep_sizeof(obj, _seen: set = None) -> int:
+    """Tamaño aproximado en bytes de un objeto y todo lo que contiene"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def append_metrics_log(profiler: RenderProfiler, path: str = Config.PERF_LOG_PATH):
+    """Agregar las métricas del rerun al log local (JSONL)"""
+    log_path = Path(path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(profiler.to_dict(), ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def profile_rerun(enabled: bool, page: str = "form", log: bool = True):
+    """Medir un rerun completo; entrega el profiler (o None si está deshabilitado)"""
+    if not enabled:
+        yield None
+        return
+
+    profiler = RenderProfiler(page)
+    ctx, original_enqueue = _hook_element_counter(profiler)
+    _state.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _state.profiler = None
+        if ctx is not None:
+            ctx._enqueue = original_enqueue
+        profiler.finish()
+        if log:
+            try:
+                append_metrics_log(profiler)
+            except OSError:
+                pass
+
+
+def short_path(filename: str) -> str:
+    """Ruta relativa al repo o al paquete instalado, para etiquetas legibles"""
+    path = Path(filename)
+    for parent in (REPO_ROOT, *(Path(p) for p in sys.path if p.endswith("site-packages")),
+                   Path(sysconfig.get_paths()["stdlib"])):
+        try:
+            return str(path.relative_to(parent))
+        except ValueError:
+            continue
+    return filename
+
+
+def _function_label(func_key: tuple) -> str:
+    filename, line, name = func_key
+    if filename == "~":
+        return name
+    return f"{short_path(filename)}:{line}({name})"
+
+
+def profile_rows(stats: pstats.Stats, sort: str = "cumulative", limit: int = Config.PROFILE_TOP_N) -> list:
+    """Top de funciones de un perfil ordenadas por tiempo acumulado o propio"""
+    index = 3 if sort == "cumulative" else 2
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [
+        {
+            "function": _function_label(key),
+            "calls": nc,
+            "self_ms": tt * 1000,
+            "cumulative_ms": ct * 1000,
+        }
+        for key, (cc, nc, tt, ct, callers) in entries
+    ]
+
+
+def stats_to_collapsed(stats: pstats.Stats, max_depth: int = 60, min_s: float = 50e-6,
+                       max_nodes: int = 20000) -> str:
+    """
+    Aproximar stacks colapsados (formato flamegraph.pl) desde el grafo llamador→llamado
+    de cProfile; los valores son microsegundos de tiempo propio por stack. Las ramas de
+    menos de `min_s` se podan y el recorrido se corta en `max_nodes` para grafos grandes.
+    """
+    labels = {key: _function_label(key).replace(";", ":") for key in stats.stats}
+    callees = {}
+    for callee, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, caller_stats in callers.items():
+            callees.setdefault(caller, []).append((callee, caller_stats[2], caller_stats[3]))
+
+    lines = {}
+    visited = 0
+
+    def walk(func_key, stack, on_stack, self_s, cumulative_s):
+        nonlocal visited
+        visited += 1
+        stack = stack + [labels[func_key]]
+        if self_s > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0) + self_s
+        if len(stack) >= max_depth or visited >= max_nodes:
+            return
+        total_ct = stats.stats[func_key][3] or 1e-12
+        # Repartir el tiempo de cada hijo en proporción al tiempo que este llamador le aporta
+        scale = min(1.0, cumulative_s / total_ct)
+        on_stack.add(func_key)
+        for callee, tt, ct in sorted(callees.get(func_key, []), key=lambda edge: edge[2], reverse=True):
+            if ct * scale >= min_s and callee not in on_stack:
+                walk(callee, stack, on_stack, tt * scale, ct * scale)
+        on_stack.discard(func_key)
+
+    roots = sorted((key for key, value in stats.stats.items() if not value[4]),
+                   key=lambda key: stats.stats[key][3], reverse=True)
+    for root in roots:
+        walk(root, [], set(), stats.stats[root][2], stats.stats[root][3])
+
+    return "\n".join(f"{stack} {int(value * 1e6)}" for stack, value in lines.items() if int(value * 1e6) > 0)
+
+
+@contextmanager
+def cprofile_rerun(enabled: bool = True):
+    """
+    Perfilar con cProfile el bloque (un rerun completo). Entrega un dict que se llena al
+    salir, incluso si el rerun termina con st.rerun()/st.stop() (o None si está deshabilitado).
+    """
+    if not enabled:
+        yield None
+        return
+
+    report = {}
+    profiler = cProfile.Profile()
+    started_at = datetime.now()
+    t0 = time.perf_counter()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        report.update({
+            "timestamp": started_at.isoformat(timespec="seconds"),
+            "total_ms": (time.perf_counter() - t0) * 1000,
+            "top_cumulative": profile_rows(stats, "cumulative"),
+            "top_self": profile_rows(stats, "self"),
+            "prof": marshal.dumps(stats.stats),
+            "collapsed": stats_to_collapsed(stats),
+        })
@@ -0,0 +1,158 @@
+"""
+Profiler por muestreo en segundo plano para producción (opt-in).
+
+Un hilo daemon toma cada `SAMPLER_INTERVAL_MS` el stack de los hilos
+`ScriptRunner.scriptThread` vía `sys._current_frames()`, lo agrega como stack
+colapsado (memoria acotada) y cada `SAMPLER_FLUSH_SECONDS` escribe un archivo
+`.folded` listo para flamegraph.pl/speedscope en `SAMPLER_DIR`.
+
+Cada rerun etiqueta su hilo con la página y el tipo de respuesta; las etiquetas
+aparecen como frames raíz (`page=results;tipo=single_delivery_date;...`).
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config.settings import Config
+from utils.perf import short_path
+
+SCRIPT_THREAD_PREFIX = "ScriptRunner.scriptThread"
+OVERFLOW_STACK = "[otros stacks]"
+
+_thread_tags = {}
+_frame_labels = {}
+
+
+def tag_current_thread(**tags):
+    """Etiquetar las muestras del hilo del rerun actual (p. ej. page="results")"""
+    _thread_tags[threading.get_ident()] = ";".join(f"{k}={v}" for k, v in tags.items() if v)
+
+
+def clear_thread_tags():
+    _thread_tags.pop(threading.get_ident(), None)
+
+
+def _frame_label(code) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+        _frame_labels[code] = label
+    return label
+
+
+class SamplingProfiler:
+    """Muestreo periódico de stacks con conteo acotado y volcado a archivos .folded"""
+
+    def __init__(self, interval_ms: float = Config.SAMPLER_INTERVAL_MS, output_dir: str = Config.SAMPLER_DIR,
+                 max_stacks: int = Config.SAMPLER_MAX_STACKS, max_depth: int = Config.SAMPLER_MAX_DEPTH):
+        self.interval_s = interval_ms / 1000
+        self.base_interval_s = self.interval_s
+        self.output_dir = Path(output_dir)
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.counts = {}
+        self.samples = 0
+        self.busy_s = 0.0
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample_once(self):
+        """Una muestra de todos los hilos de script activos"""
+        t0 = time.perf_counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if not names.get(ident, "").startswith(SCRIPT_THREAD_PREFIX):
+                continue
+
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.reverse()
+            stack = ";".join([_thread_tags.get(ident) or "page=desconocida", *frames])
+
+            with self._lock:
+                if stack in self.counts or len(self.counts) < self.max_stacks:
+                    self.counts[stack] = self.counts.get(stack, 0) + 1
+                else:
+                    self.counts[OVERFLOW_STACK] = self.counts.get(OVERFLOW_STACK, 0) + 1
+                self.samples += 1
+        self.busy_s += time.perf_counter() - t0
+
+    def overhead(self) -> float:
+        """Fracción del tiempo de pared usada por el muestreo en la ventana actual"""
+        elapsed = time.perf_counter() - self.started_at
+        return self.busy_s / elapsed if elapsed > 0 else 0.0
+
+    def flush(self) -> Path:
+        """Escribir las muestras acumuladas a un archivo .folded y reiniciar la ventana"""
+        with self._lock:
+            counts, self.counts = self.counts, {}
+        if not counts:
+            return None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"samples_{os.getpid()}_{datetime.now():%Y%m%dT%H%M%S}.folded"
+        path.write_text("\n".join(f"{stack} {count}" for stack, count in counts.items()) + "\n",
+                        encoding="utf-8")
+
+        # Conservar solo los archivos más recientes
+        archivos = sorted(self.output_dir.glob("samples_*.folded"), key=lambda p: p.stat().st_mtime)
+        for viejo in archivos[:-Config.SAMPLER_MAX_FILES]:
+            try:
+                viejo.unlink()
+            except OSError:
+                pass
+        return path
+
+    def _run(self):
+        ultimo_flush = time.monotonic()
+        while not self._stop.wait(self.interval_s):
+            self.sample_once()
+            # Cada ventana de 5 s: si el costo supera el presupuesto, muestrear con menos frecuencia;
+            # si cabe con holgura (a la mitad el intervalo el costo se duplica), volver hacia el configurado
+            ventana_s = time.perf_counter() - self.started_at
+            if ventana_s >= 5:
+                overhead = self.overhead()
+                if overhead > Config.SAMPLER_MAX_OVERHEAD:
+                    self.interval_s = min(self.interval_s * 2, 1.0)
+                elif overhead < Config.SAMPLER_MAX_OVERHEAD / 2:
+                    self.interval_s = max(self.interval_s / 2, self.base_interval_s)
+                self.busy_s, self.started_at = 0.0, time.perf_counter()
+            if time.monotonic() - ultimo_flush >= Config.SAMPLER_FLUSH_SECONDS:
+                ultimo_flush = time.monotonic()
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def ensure_sampling_profiler():
+    """Arrancar el profiler de muestreo una sola vez por proceso si está habilitado"""
+    global _sampler
+    if not Config.SAMPLER_ENABLED or _sampler is not None:
+        return _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SamplingProfiler()
+            _sampler.start()
+    return _sampler
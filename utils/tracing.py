@@ -0,0 +1,205 @@
+"""
+Trazas ligeras con forma OpenTelemetry (OTLP/JSON) sin collector.
+
+Una traza nace en `process_prediction`, viaja al backend en el header
+`traceparent` y continúa en el rerun de resultados. Al cerrarse se agrega
+una línea `ExportTraceServiceRequest` al JSONL de `Config.TRACE_LOG_PATH`.
+"""
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.settings import Config
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_state = threading.local()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """
+    Traza de una predicción: span raíz abierto hasta `finish` y spans hijos anidados.
+    La usan el hilo del trabajo y el del rerun: cada hilo anida sus spans en su propia
+    pila (bajo la raíz) y un lock protege las pilas y la lista de spans cerrados.
+    """
+
+    def __init__(self, name: str, attributes: dict = None):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._stacks = {}  # ident del hilo -> spans abiertos por ese hilo
+        self._lock = threading.Lock()
+        self.finished = False
+        self.root = None
+        self.root = self._open(name, SPAN_KIND_INTERNAL, attributes)
+
+    def _parent(self, stack: list):
+        return stack[-1] if stack else self.root
+
+    def _open(self, name: str, kind: int, attributes: dict = None) -> dict:
+        with self._lock:
+            stack = self._stacks.setdefault(threading.get_ident(), [])
+            parent = self._parent(stack)
+            span = {
+                "spanId": secrets.token_hex(8),
+                "parentSpanId": parent["spanId"] if parent else "",
+                "name": name,
+                "kind": kind,
+                "start_ns": time.time_ns(),
+                "end_ns": None,
+                "depth": parent["depth"] + 1 if parent else 0,
+                "attributes": dict(attributes or {}),
+                "error": None,
+            }
+            stack.append(span)
+        return span
+
+    def _close(self, span: dict, error: str = None):
+        with self._lock:
+            self._close_locked(span, error)
+
+    def _close_locked(self, span: dict, error: str = None):
+        if span["end_ns"] is not None:
+            return  # ya lo cerró `finish` desde otro hilo
+        span["end_ns"] = time.time_ns()
+        span["error"] = error
+        for stack in self._stacks.values():
+            if span in stack:
+                stack.remove(span)
+                break
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        span = self._open(name, kind, attributes)
+        error = None
+        try:
+            yield span
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            # st.rerun()/st.stop() no heredan de Exception: cierran el span sin error
+            self._close(span, error=error)
+
+    def headers(self) -> dict:
+        """Headers de propagación (W3C traceparent) con el span actual del hilo como padre"""
+        with self._lock:
+            parent = self._parent(self._stacks.get(threading.get_ident(), []))["spanId"]
+        return {"traceparent": f"00-{self.trace_id}-{parent}-01", "X-Trace-Id": self.trace_id}
+
+    def finish(self, error: str = None, log: bool = True):
+        """Cerrar los spans abiertos de todos los hilos (la raíz al final) y exportar la traza"""
+        with self._lock:
+            if self.finished:
+                return
+            abiertos = [span for stack in self._stacks.values() for span in reversed(stack)]
+            for span in sorted(abiertos, key=lambda s: -s["depth"]):
+                self._close_locked(span, error=error if span is self.root else None)
+            self.finished = True
+        if log:
+            try:
+                append_trace_log(self)
+            except OSError:
+                pass
+
+    def to_otlp(self) -> dict:
+        """Traza como ExportTraceServiceRequest de OTLP/JSON"""
+        with self._lock:
+            cerrados = list(self.spans)
+        spans = []
+        for span in sorted(cerrados, key=lambda s: s["start_ns"]):
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span["spanId"],
+                "name": span["name"],
+                "kind": span["kind"],
+                "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["end_ns"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span["attributes"].items()],
+                "status": (
+                    {"code": STATUS_ERROR, "message": span["error"]} if span["error"] else {"code": STATUS_OK}
+                ),
+            }
+            if span["parentSpanId"]:
+                otlp_span["parentSpanId"] = span["parentSpanId"]
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": Config.TRACE_SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{"scope": {"name": "logistica_front"}, "spans": spans}],
+            }]
+        }
+
+    def waterfall_spans(self) -> list:
+        """Spans cerrados en el formato de `build_waterfall_chart` (ms relativos a la raíz)"""
+        t0 = self.root["start_ns"]
+        with self._lock:
+            cerrados = list(self.spans)
+        return [
+            {
+                "name": span["name"],
+                "depth": span["depth"],
+                "start_ms": (span["start_ns"] - t0) / 1e6,
+                "duration_ms": (span["end_ns"] - span["start_ns"]) / 1e6,
+            }
+            for span in cerrados
+        ]
+
+
+def current_trace():
+    """Traza activa del hilo actual (None fuera de una predicción)"""
+    return getattr(_state, "trace", None)
+
+
+@contextmanager
+def activate(trace):
+    """Hacer `trace` la traza activa del hilo mientras dure el bloque (None no hace nada)"""
+    previous = current_trace()
+    _state.trace = trace
+    try:
+        yield trace
+    finally:
+        _state.trace = previous
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Span hijo de la traza activa; sin traza activa solo cuesta una lectura thread-local"""
+    trace = current_trace()
+    if trace is None or trace.finished:
+        yield None
+        return
+    with trace.span(name, kind, **attributes) as opened:
+        yield opened
+
+
+def trace_headers() -> dict:
+    trace = current_trace()
+    return trace.headers() if trace is not None and not trace.finished else {}
+
+
+def append_trace_log(trace: Trace, path: str = Config.TRACE_LOG_PATH):
+    """Agregar la traza al JSONL local (una línea OTLP por traza)"""
+    log_path = Path(path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace.to_otlp(), ensure_ascii=False) + "\n")